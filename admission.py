@@ -0,0 +1,276 @@
+import os
+import math
+import time
+import socket
+import hashlib
+import secrets
+import logging
+import functools
+import threading
+
+from flask import request, jsonify, make_response
+from flask_login import current_user
+
+from metrics import ADMISSION_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+# Admission control for the endpoints that make paid vendor calls and hold a sync worker
+# for seconds. Each request must pass a token bucket (sustained rate and burst) and an
+# in-flight cap, both keyed per user (or session for anonymous calls) and per IP.
+# Turns and their reply audio have priority: an over-cap request waits briefly for its slot,
+# while ancillary calls (the replay and translate buttons) are refused at once, and are only
+# admitted while the dyno keeps TURN_RESERVED_WORKERS workers free for turns. Refusals are
+# 429 with Retry-After.
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+# Workers per dyno (Heroku sets WEB_CONCURRENCY for gunicorn)
+ADMISSION_WORKERS = int(os.environ.get('ADMISSION_WORKERS', os.environ.get('WEB_CONCURRENCY', '1')))
+TURN_RESERVED_WORKERS = int(os.environ.get('TURN_RESERVED_WORKERS', '1'))
+# A school's classroom shares one IP, so per-IP limits are this multiple of the per-user ones
+IP_LIMIT_MULTIPLIER = int(os.environ.get('IP_LIMIT_MULTIPLIER', '10'))
+# In-flight entries expire on their own if a worker dies without releasing them
+INFLIGHT_TTL_SECONDS = 120
+QUEUE_POLL_SECONDS = 0.1
+# How long a priority request waits for an in-flight slot before it is refused
+TURN_QUEUE_SECONDS = float(os.environ.get('TURN_QUEUE_SECONDS', '2'))
+
+
+def _limits(request_class, burst, rate, concurrency):
+    """(bucket size, tokens per second, max in flight), overridable as ADMISSION_<CLASS>=burst,rate,concurrency."""
+    spec = os.environ.get(f'ADMISSION_{request_class.upper()}')
+    if spec:
+        burst, rate, concurrency = (float(p) for p in spec.split(','))
+    return {'burst': float(burst), 'rate': float(rate), 'concurrency': int(concurrency)}
+
+
+# request class -> limits per user / session; queue_seconds > 0 marks the priority class
+REQUEST_CLASSES = {
+    'turn': dict(_limits('turn', 6, 0.2, 1), queue_seconds=TURN_QUEUE_SECONDS),
+    # /api/speak/stream: the audio of every streamed reply, fetched while the turn's stream is still open
+    'reply_audio': dict(_limits('reply_audio', 10, 0.5, 2), queue_seconds=TURN_QUEUE_SECONDS),
+    'speak': dict(_limits('speak', 20, 1.0, 3), queue_seconds=0.0),
+    'translate': dict(_limits('translate', 10, 0.5, 2), queue_seconds=0.0),
+}
+
+DYNO_ID = os.environ.get('DYNO') or socket.gethostname()
+BUCKET_KEY = 'admission:bucket:{}'
+INFLIGHT_KEY = 'admission:inflight:{}'
+
+# Refill every bucket, and take one token from each only if all have one.
+# Returns '0' when admitted, otherwise the seconds until a token is available.
+_TAKE_TOKENS = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return '0'
+"""
+
+# Add ARGV[3] to every in-flight set only if none is full. Returns 0, or the 1-based
+# index of the first full set.
+_ACQUIRE_SLOTS = """
+local now = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, ARGV[2], ARGV[3])
+    redis.call('EXPIRE', key, math.ceil(tonumber(ARGV[2]) - now))
+end
+return 0
+"""
+
+_redis = None
+_take_tokens = None
+_acquire_slots = None
+# Without Redis the same state is kept per worker
+_local_lock = threading.Lock()
+_local_buckets = {}   # key -> (tokens, ts)
+_local_inflight = {}  # key -> {member: expires}
+
+
+def init_admission(redis_client=None):
+    """Without Redis, limits apply per worker rather than across the dyno formation."""
+    global _redis, _take_tokens, _acquire_slots
+    _redis = redis_client
+    if redis_client is not None:
+        _take_tokens = redis_client.register_script(_TAKE_TOKENS)
+        _acquire_slots = redis_client.register_script(_ACQUIRE_SLOTS)
+
+
+def _take_tokens_local(buckets, now):
+    with _local_lock:
+        refilled = []
+        wait = 0.0
+        for key, capacity, rate in buckets:
+            tokens, ts = _local_buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            refilled.append(tokens)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+        if wait > 0:
+            return wait
+        for (key, _, _), tokens in zip(buckets, refilled):
+            _local_buckets[key] = (tokens - 1, now)
+        return 0.0
+
+
+def _acquire_slots_local(slots, member, now):
+    with _local_lock:
+        for i, (key, limit) in enumerate(slots, 1):
+            entries = _local_inflight.setdefault(key, {})
+            for stale in [m for m, expires in entries.items() if expires <= now]:
+                del entries[stale]
+            if len(entries) >= limit:
+                return i
+        for key, _ in slots:
+            _local_inflight[key][member] = now + INFLIGHT_TTL_SECONDS
+        return 0
+
+
+def take_tokens(buckets):
+    """buckets: [(key, capacity, rate)]. Returns 0 if admitted, else seconds to wait."""
+    now = time.time()
+    if _redis is not None:
+        try:
+            args = [now]
+            for _, capacity, rate in buckets:
+                args += [capacity, rate]
+            return float(_take_tokens(keys=[BUCKET_KEY.format(key) for key, _, _ in buckets], args=args))
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, using per-worker buckets: {e}")
+    return _take_tokens_local(buckets, now)
+
+
+def acquire_slots(slots, member):
+    """slots: [(key, limit)]. Returns 0 if a slot was taken in every set, else the index of the full one."""
+    now = time.time()
+    if _redis is not None:
+        try:
+            return int(_acquire_slots(keys=[INFLIGHT_KEY.format(key) for key, _ in slots],
+                                      args=[now, now + INFLIGHT_TTL_SECONDS, member] + [limit for _, limit in slots]))
+        except Exception as e:
+            logger.warning(f"Concurrency limiter unavailable, using per-worker slots: {e}")
+    return _acquire_slots_local(slots, member, now)
+
+
+def release_slots(slots, member):
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for key, _ in slots:
+                pipe.zrem(INFLIGHT_KEY.format(key), member)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to release in-flight slots (they expire in {INFLIGHT_TTL_SECONDS}s): {e}")
+    with _local_lock:
+        for key, _ in slots:
+            _local_inflight.get(key, {}).pop(member, None)
+
+
+def client_ip():
+    """The caller's address; Heroku's router appends it as the last X-Forwarded-For entry."""
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.split(',')[-1].strip()
+    return request.remote_addr or 'unknown'
+
+
+def _principal():
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    session_cookie = request.cookies.get('session')
+    if session_cookie:
+        return f"session:{hashlib.sha1(session_cookie.encode()).hexdigest()[:16]}"
+    return None
+
+
+def _too_many(request_class, reason, retry_after, message):
+    ADMISSION_DECISIONS.inc(request_class=request_class, result=reason)
+    retry_after = max(1, math.ceil(retry_after))
+    logger.warning(f"🚦 ADMISSION: {request_class} refused ({reason}), retry after {retry_after}s")
+    response = jsonify({'error': 'rate_limited', 'reason': reason, 'message': message, 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def admission_control(request_class):
+    """View decorator: rate and concurrency limits for an expensive endpoint.
+
+    The in-flight slot is held until the response is closed, so a streamed turn keeps
+    it for the whole stream.
+    """
+    limits = REQUEST_CLASSES[request_class]
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not ADMISSION_ENABLED:
+                return view(*args, **kwargs)
+            principal = _principal()
+            ip = f"ip:{client_ip()}"
+
+            buckets = [(f"{request_class}:{ip}", limits['burst'] * IP_LIMIT_MULTIPLIER,
+                        limits['rate'] * IP_LIMIT_MULTIPLIER)]
+            slots = [(f"{request_class}:{ip}", limits['concurrency'] * IP_LIMIT_MULTIPLIER)]
+            if principal:
+                buckets.insert(0, (f"{request_class}:{principal}", limits['burst'], limits['rate']))
+                slots.insert(0, (f"{request_class}:{principal}", limits['concurrency']))
+            if not limits['queue_seconds']:
+                # Ancillary calls may only use the dyno's workers beyond those kept for turns
+                slots.append((f"ancillary:{DYNO_ID}", max(1, ADMISSION_WORKERS - TURN_RESERVED_WORKERS)))
+
+            wait = take_tokens(buckets)
+            if wait > 0:
+                return _too_many(request_class, 'rate_limited', wait,
+                                 'Too many requests, please wait a moment and try again.')
+
+            member = secrets.token_hex(8)
+            queue_until = time.monotonic() + limits['queue_seconds']
+            queued = False
+            while True:
+                full = acquire_slots(slots, member)
+                if not full:
+                    break
+                if time.monotonic() >= queue_until:
+                    if slots[full - 1][0].startswith('ancillary:'):
+                        return _too_many(request_class, 'dyno_busy', 1, 'The server is busy, please try again in a moment.')
+                    return _too_many(request_class, 'concurrency', 1,
+                                     'Still working on your last request, please try again in a moment.')
+                queued = True
+                time.sleep(QUEUE_POLL_SECONDS)
+
+            ADMISSION_DECISIONS.inc(request_class=request_class, result='queued' if queued else 'admitted')
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                release_slots(slots, member)
+                raise
+            response.call_on_close(lambda: release_slots(slots, member))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,288 @@
+import os
+import json
+import queue
+import socket
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models import db, PageView, UserAction
+from metrics import EXECUTOR_QUEUE_DEPTH, register_gauge_callback
+
+logger = logging.getLogger(__name__)
+
+# Configuration from environment
+ANALYTICS_FLUSH_SIZE = int(os.environ.get('ANALYTICS_FLUSH_SIZE', '50'))
+ANALYTICS_FLUSH_INTERVAL = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', '2.0'))
+ANALYTICS_MAX_BUFFER = int(os.environ.get('ANALYTICS_MAX_BUFFER', '5000'))
+# When true (and Redis is available) every event goes straight to the Redis stream,
+# so all gunicorn workers share one queue. Otherwise the stream is only used as a spill.
+ANALYTICS_USE_STREAM = os.environ.get('ANALYTICS_USE_STREAM', 'false').lower() == 'true'
+
+ANALYTICS_STREAM_KEY = 'analytics:events'
+ANALYTICS_STREAM_GROUP = 'analytics-writers'
+ANALYTICS_STREAM_MAXLEN = 100000
+# Stream entries left unacked this long (e.g. by a recycled worker) are reclaimed
+ANALYTICS_STREAM_CLAIM_IDLE_MS = 60000
+# Rows the database rejects one by one are parked here (newest first) instead of
+# being retried forever, which would stall every event queued behind them
+ANALYTICS_DEAD_LETTER_KEY = 'analytics:dead_letter'
+ANALYTICS_DEAD_LETTER_MAXLEN = 1000
+
+EVENT_TABLES = {
+    'page_view': PageView.__table__,
+    'user_action': UserAction.__table__,
+}
+
+_app = None
+_redis = None
+_buffer = queue.Queue(maxsize=ANALYTICS_MAX_BUFFER)
+_wake = threading.Event()
+_flusher = None
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+_stream_ready = False
+
+
+def init_analytics_queue(app, redis_client=None):
+    """Bind the queue to the Flask app (for DB access) and an optional Redis client."""
+    global _app, _redis
+    _app = app
+    _redis = redis_client
+    atexit.register(flush_analytics)
+    register_gauge_callback(EXECUTOR_QUEUE_DEPTH, _buffer.qsize, pool='analytics')
+
+
+def enqueue_event(kind, row):
+    """Queue a PageView ('page_view') or UserAction ('user_action') row for bulk insert.
+
+    Never touches the database on the calling thread. `row` must already carry
+    `created_at` so the stored timestamp reflects the request, not the flush.
+    """
+    if kind not in EVENT_TABLES:
+        raise ValueError(f"Unknown analytics event kind: {kind}")
+    row = _fit_columns(EVENT_TABLES[kind], row)
+    row.setdefault('created_at', datetime.utcnow())
+
+    if ANALYTICS_USE_STREAM and _redis is not None:
+        if _spill_to_stream([(kind, row)]):
+            _ensure_flusher()
+            return
+
+    try:
+        _buffer.put_nowait((kind, row))
+    except queue.Full:
+        # Local buffer saturated (DB slow or down) - spill rather than block the request
+        if not _spill_to_stream([(kind, row)]):
+            logger.warning(f"Analytics buffer full, dropping {kind} event")
+    _ensure_flusher()
+    if _buffer.qsize() >= ANALYTICS_FLUSH_SIZE:
+        _wake.set()
+
+
+def flush_analytics():
+    """Drain the local buffer synchronously. Called by the flusher and at exit."""
+    while True:
+        batch = _drain_local(ANALYTICS_FLUSH_SIZE * 4)
+        if not batch:
+            return
+        if not _write_batch(batch):
+            _spill_to_stream(batch)
+            return
+
+
+def _ensure_flusher():
+    """Start the background flusher once per process (re-started after a fork)."""
+    global _flusher, _flusher_pid
+    pid = os.getpid()
+    if _flusher is not None and _flusher_pid == pid and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is not None and _flusher_pid == pid and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_loop, name='analytics-flusher', daemon=True)
+        _flusher_pid = pid
+        _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(ANALYTICS_FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            flush_analytics()
+            _drain_stream()
+        except Exception as e:
+            logger.error(f"Analytics flush loop error: {e}")
+
+
+def _fit_columns(table, row):
+    """Truncate strings to their column's length, so one oversized value can't fail a batch."""
+    fitted = dict(row)
+    for name, value in row.items():
+        column = table.columns.get(name)
+        length = getattr(column.type, 'length', None) if column is not None else None
+        if length and isinstance(value, str) and len(value) > length:
+            fitted[name] = value[:length]
+    return fitted
+
+
+def _drain_local(limit):
+    batch = []
+    while len(batch) < limit:
+        try:
+            batch.append(_buffer.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write_batch(batch):
+    """Bulk INSERT a batch grouped by table. Returns True once every event is stored or dead-lettered.
+
+    SQLAlchemy 1.4 + psycopg2 folds executemany() into multi-row INSERT ... VALUES,
+    so one statement per table covers the whole batch. If that fails, rows are
+    inserted one at a time and the ones the database rejects are dead-lettered;
+    False means the database itself is unreachable and the batch should be retried.
+    """
+    if _app is None:
+        logger.error("Analytics queue used before init_analytics_queue()")
+        return False
+
+    rows_by_kind = {}
+    for kind, row in batch:
+        rows_by_kind.setdefault(kind, []).append(row)
+
+    with _app.app_context():
+        try:
+            for kind, rows in rows_by_kind.items():
+                db.session.execute(EVENT_TABLES[kind].insert(), rows)
+            db.session.commit()
+            logger.info(f"Flushed {len(batch)} analytics events "
+                        f"({', '.join(f'{k}={len(v)}' for k, v in rows_by_kind.items())})")
+            return True
+        except Exception as e:
+            logger.error(f"Analytics bulk insert failed for {len(batch)} events, retrying row by row: {e}")
+            db.session.rollback()
+            return _write_rows(batch)
+        finally:
+            db.session.remove()
+
+
+def _write_rows(batch):
+    """Insert events one at a time, dead-lettering rejected rows. Runs inside an app context."""
+    rejected = []
+    written = 0
+    for kind, row in batch:
+        try:
+            db.session.execute(EVENT_TABLES[kind].insert(), [row])
+            db.session.commit()
+            written += 1
+        except Exception as e:
+            db.session.rollback()
+            rejected.append((kind, row, str(e)))
+    if rejected and not written:
+        # Nothing went in: tell a bad batch apart from a database that is down
+        try:
+            db.session.execute(text('SELECT 1'))
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Analytics database unavailable, keeping {len(batch)} events for retry: {e}")
+            return False
+    if rejected:
+        _dead_letter(rejected)
+    logger.info(f"Flushed {written} analytics events row by row, dead-lettered {len(rejected)}")
+    return True
+
+
+def _dead_letter(rejected):
+    for kind, row, error in rejected:
+        logger.error(f"Dropping {kind} analytics event rejected by the database: {error[:200]}")
+    if _redis is None:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for kind, row, error in rejected:
+            entry = _serialize(kind, row)
+            entry['error'] = error[:500]
+            pipe.lpush(ANALYTICS_DEAD_LETTER_KEY, json.dumps(entry, ensure_ascii=False))
+        pipe.ltrim(ANALYTICS_DEAD_LETTER_KEY, 0, ANALYTICS_DEAD_LETTER_MAXLEN - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to dead-letter {len(rejected)} analytics events: {e}")
+
+
+def _serialize(kind, row):
+    payload = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()}
+    return {'kind': kind, 'row': json.dumps(payload, ensure_ascii=False)}
+
+
+def _deserialize(fields):
+    kind = fields[b'kind'].decode('utf-8')
+    row = json.loads(fields[b'row'])
+    if row.get('created_at'):
+        row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return kind, row
+
+
+def _spill_to_stream(batch):
+    """Push events onto the shared Redis stream. Returns True if they were accepted."""
+    if _redis is None or not batch:
+        return False
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for kind, row in batch:
+            pipe.xadd(ANALYTICS_STREAM_KEY, _serialize(kind, row),
+                      maxlen=ANALYTICS_STREAM_MAXLEN, approximate=True)
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to spill {len(batch)} analytics events to Redis: {e}")
+        return False
+
+
+def _ensure_stream_group():
+    global _stream_ready
+    if _stream_ready:
+        return
+    try:
+        _redis.xgroup_create(ANALYTICS_STREAM_KEY, ANALYTICS_STREAM_GROUP, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+    _stream_ready = True
+
+
+def _drain_stream():
+    """Consume spilled events (from any worker) via a Redis consumer group."""
+    if _redis is None:
+        return
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        _ensure_stream_group()
+        entries = []
+        # Reclaim entries a dead worker read but never acked
+        try:
+            claimed = _redis.xautoclaim(ANALYTICS_STREAM_KEY, ANALYTICS_STREAM_GROUP, consumer,
+                                        ANALYTICS_STREAM_CLAIM_IDLE_MS, count=ANALYTICS_FLUSH_SIZE)
+            entries.extend(claimed[1])
+        except Exception:
+            pass
+        response = _redis.xreadgroup(ANALYTICS_STREAM_GROUP, consumer,
+                                     {ANALYTICS_STREAM_KEY: '>'}, count=ANALYTICS_FLUSH_SIZE * 4)
+        for _stream, stream_entries in response or []:
+            entries.extend(stream_entries)
+        if not entries:
+            return
+
+        entry_ids = [entry_id for entry_id, _fields in entries]
+        batch = [_deserialize(fields) for _entry_id, fields in entries if fields]
+        if batch and not _write_batch(batch):
+            return  # left pending; reclaimed on a later pass
+        _redis.xack(ANALYTICS_STREAM_KEY, ANALYTICS_STREAM_GROUP, *entry_ids)
+        _redis.xdel(ANALYTICS_STREAM_KEY, *entry_ids)
+    except Exception as e:
+        logger.error(f"Failed to drain analytics stream: {e}")
@@ -22,14 +22,40 @@ import json
 import tempfile
 import time
 import concurrent.futures
+import itertools
 import random
 from conversation_config import (CONVERSATION_TYPES, MODULES, TOPICS,
     GLOBAL_TUTOR_IDENTITY, GLOBAL_LANGUAGE_RULES, GLOBAL_CONVERSATION_FLOW,
     GLOBAL_RESPONSE_FORMAT, INITIAL_RESPONSE_FORMAT)
 
 # Import our models and auth
-from models import db, User, Conversation, ConversationAudio, AnalyticsHelper, PageView, UserAction, FunnelAnalytics, UserSticker, Educator, EducatorTopic
-from s3_audio import ENABLE_AUDIO_STORAGE, generate_s3_key, upload_audio_async, generate_presigned_url
+from models import db, User, Conversation, ConversationAudio, AnalyticsHelper, FunnelAnalytics, UserSticker, Educator, EducatorTopic
+from educator_topic_cache import topic_cache
+from webm_audio import read_webm_info, detect_voice_activity, VAD_MIN_VOICED_MS
+from analytics_queue import init_analytics_queue, enqueue_event
+from providers import (providers, PROVIDER_MODE, ProviderError, STTProvider, TTSProvider, LLMProvider,
+    TransliterationProvider)
+from tracing import span, current_span, wrap, trace_request, recent_traces, find_trace, format_summary
+from metrics import (init_metrics, render_metrics, STT_LATENCY, LLM_TTFT, LLM_LATENCY,
+                     TTS_LATENCY, TRANSLITERATION_LATENCY, DB_COMMIT_LATENCY, PROVIDER_FALLBACKS,
+                     LLM_JSON_FAILURES, TTS_CHARACTERS, TTS_TTFB)
+from profiler import init_profiler, profile_request, recent_profiles, find_profile
+from sse_stream import EventStream, negotiate_protocol
+from turn_streams import (init_turn_streams, start_turn_stream, open_turn_stream, follow_for_client,
+                          parse_last_event_id)
+from turn_committer import init_turn_committer, submit_turn, wait_for_turns
+from greeting_pool import init_greeting_pool, take_greeting
+from name_audio import init_name_audio
+from segment_library import init_segment_library, synthesize_with_segments, stream_with_segments
+from admission import init_admission, admission_control
+from translation import init_translation, translate, prefetch_translation
+from provider_router import init_provider_router, router, routing_status
+from deadlines import (Deadline, vendor_call, call_timeout, vendor_circuits, TURN_DEADLINE_SECONDS,
+                       FOLLOWUP_DEADLINE_SECONDS)
+from audio_store import (init_audio_store, store_audio, load_audio, negotiate_delivery, AUDIO_DELIVERY_URL,
+                         AUDIO_URL_TTL_SECONDS)
+from s3_audio import (ENABLE_AUDIO_STORAGE, generate_s3_key, queue_audio_upload, init_upload_queue,
+    generate_presigned_url, generate_presigned_urls)
 from auth import auth_bp, init_oauth
 from sticker_config import STICKER_CATALOG, PACK_TIERS
 import sentry_sdk
@@ -161,22 +187,44 @@ TTS_PROVIDER = os.getenv('TTS_PROVIDER', 'elevenlabs')  # Options: elevenlabs, s
 
 # Google STT model configuration
 GOOGLE_STT_MODEL = os.getenv('GOOGLE_STT_MODEL', 'chirp_3')  # Options: chirp_3, latest_long
+# Lowest STT quality tier the router may use (0: any backend, 1: Chirp 3 only)
+STT_ROUTING_MIN_QUALITY = int(os.getenv('STT_ROUTING_MIN_QUALITY', '0'))
+
+# Per-call vendor timeouts; a turn's deadline (deadlines.py) can shorten them further
+SARVAM_TIMEOUT_SECONDS = float(os.getenv('SARVAM_TIMEOUT_SECONDS', '5'))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv('GEMINI_TIMEOUT_SECONDS', '15'))
+GOOGLE_STT_TIMEOUT_SECONDS = float(os.getenv('GOOGLE_STT_TIMEOUT_SECONDS', '10'))
 
 # ASR correction configuration (Phase 4 - disabled by default)
 ENABLE_ASR_CORRECTION = os.getenv('ENABLE_ASR_CORRECTION', 'false').lower() == 'true'
 ASR_CORRECTION_TIMEOUT = float(os.getenv('ASR_CORRECTION_TIMEOUT', '2.0'))
 
-# Initialize Groq client
-try:
-    groq_client = Groq(api_key=GROQ_API_KEY)
-    logger.info("Groq client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Groq client: {e}")
-    raise
+# Client-side silence trimming: allowed gap between the reported trim and the received duration
+CLIENT_TRIM_TOLERANCE_MS = int(os.getenv('CLIENT_TRIM_TOLERANCE_MS', '80'))
+
+# Initialize Groq client (optional - the app starts without it, e.g. with PROVIDER_MODE=fake)
+groq_client = None
+if GROQ_API_KEY:
+    try:
+        groq_client = Groq(api_key=GROQ_API_KEY)
+        logger.info("Groq client initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize Groq client: {e}")
+else:
+    logger.warning("GROQ_API_KEY not set, Groq client disabled")
 
 # Initialize Gemini client
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+gemini_model = None
+gemini_eval_model = None
+gemini_hints_model = None
+# Model per tier: chat replies, grammar evaluation, hints / picks
+GEMINI_MODELS = {
+    'chat': 'gemini-2.0-flash-lite',
+    'eval': 'gemini-2.0-flash',
+    'hints': 'gemini-2.5-flash',
+}
 try:
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not found in environment variables")
 
@@ -204,27 +252,29 @@ try:
 
     # Create Gemini model instance
     gemini_model = genai.GenerativeModel(
-        model_name='gemini-2.0-flash-lite',
+        model_name=GEMINI_MODELS['chat'],
         safety_settings=safety_settings
     )
-    logger.info("Gemini client initialized successfully with model: gemini-2.0-flash-lite")
+    logger.info(f"Gemini client initialized successfully with model: {GEMINI_MODELS['chat']}")
 
     # Create separate model for evaluation (more accurate for grammar detection)
     gemini_eval_model = genai.GenerativeModel(
-        model_name='gemini-2.0-flash',
+        model_name=GEMINI_MODELS['eval'],
         safety_settings=safety_settings
     )
-    logger.info("Gemini evaluation model initialized: gemini-2.0-flash")
+    logger.info(f"Gemini evaluation model initialized: {GEMINI_MODELS['eval']}")
 
     # Create model for hints (higher quality suggestions)
     gemini_hints_model = genai.GenerativeModel(
-        model_name='gemini-2.5-flash',
+        model_name=GEMINI_MODELS['hints'],
         safety_settings=safety_settings
     )
-    logger.info("Gemini hints model initialized: gemini-2.5-flash")
+    logger.info(f"Gemini hints model initialized: {GEMINI_MODELS['hints']}")
 except Exception as e:
-    logger.error(f"Failed to initialize Gemini client: {e}")
-    raise
+    # Import still succeeds so fake providers (PROVIDER_MODE=fake) can run without keys;
+    # live LLM calls fail per request instead.
+    log = logger.info if PROVIDER_MODE == 'fake' else logger.error
+    log(f"Gemini client not initialized: {e}")
 
 
 # Module metadata with Hindi names, English names, taglines, and colors
@@ -273,70 +323,69 @@ SARVAM_STT_URL = "https://api.sarvam.ai/speech-to-text"
 SARVAM_TRANSLITERATE_URL = "https://api.sarvam.ai/transliterate"
 
 
+class SarvamTransliterationProvider(TransliterationProvider):
+    """Sarvam transliteration API (Devanagari <-> Roman)."""
+
+    def to_roman(self, text):
+        return self._transliterate(text, 'hi-IN', 'en-IN', 'SARVAM TRANSLITERATE', 'transliterate')
+
+    def to_hindi(self, text):
+        return self._transliterate(text, 'en-IN', 'hi-IN', 'SARVAM TO-HINDI', 'to-hindi')
+
+    def _transliterate(self, text, source_language, target_language, log_label, warn_label):
+        if not text or not text.strip() or not SARVAM_API_KEY:
+            return ''
+        start_ms = time.time()
+        try:
+            with vendor_call('sarvam', SARVAM_TIMEOUT_SECONDS) as timeout:
+                resp = requests.post(
+                    SARVAM_TRANSLITERATE_URL,
+                    headers={
+                        'api-subscription-key': SARVAM_API_KEY,
+                        'Content-Type': 'application/json'
+                    },
+                    json={
+                        'input': text,
+                        'source_language_code': source_language,
+                        'target_language_code': target_language
+                    },
+                    timeout=timeout
+                )
+                # Server errors and throttling count against the circuit; a rejected input doesn't
+                if resp.status_code >= 500 or resp.status_code == 429:
+                    raise ProviderError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            elapsed = (time.time() - start_ms) * 1000
+            if resp.status_code == 200:
+                result = resp.json().get('transliterated_text', '')
+                logger.info(f"🔤 {log_label}: {elapsed:.0f}ms for '{text[:40]}…' → '{result[:40]}…'")
+                return result
+            logger.warning(f"Sarvam {warn_label} returned {resp.status_code} in {elapsed:.0f}ms: {resp.text[:200]}")
+            return ''
+        except Exception as e:
+            elapsed = (time.time() - start_ms) * 1000
+            logger.warning(f"Sarvam {warn_label} failed in {elapsed:.0f}ms: {e}")
+            return ''
+
+
+providers.register('transliteration', 'sarvam', SarvamTransliterationProvider, default=True)
+
+
 def transliterate_to_roman(text):
-    """Convert Devanagari Hindi text to Roman script via Sarvam API.
+    """Convert Devanagari Hindi text to Roman script via the transliteration provider.
     Returns the transliterated text, or empty string on failure."""
-    if not text or not text.strip() or not SARVAM_API_KEY:
-        return ''
-    start_ms = time.time()
-    try:
-        resp = requests.post(
-            SARVAM_TRANSLITERATE_URL,
-            headers={
-                'api-subscription-key': SARVAM_API_KEY,
-                'Content-Type': 'application/json'
-            },
-            json={
-                'input': text,
-                'source_language_code': 'hi-IN',
-                'target_language_code': 'en-IN'
-            },
-            timeout=5
-        )
-        elapsed = (time.time() - start_ms) * 1000
-        if resp.status_code == 200:
-            result = resp.json().get('transliterated_text', '')
-            logger.info(f"🔤 SARVAM TRANSLITERATE: {elapsed:.0f}ms for '{text[:40]}…' → '{result[:40]}…'")
-            return result
-        logger.warning(f"Sarvam transliterate returned {resp.status_code} in {elapsed:.0f}ms: {resp.text[:200]}")
-        return ''
-    except Exception as e:
-        elapsed = (time.time() - start_ms) * 1000
-        logger.warning(f"Sarvam transliterate failed in {elapsed:.0f}ms: {e}")
-        return ''
+    provider = providers.get('transliteration')
+    with span('transliteration', provider=provider.name, direction='to_roman', chars=len(text or '')), \
+            TRANSLITERATION_LATENCY.time(provider=provider.name, direction='to_roman'):
+        return provider.to_roman(text)
 
 
 def transliterate_to_hindi(text):
-    """Convert Roman/English text to Devanagari Hindi via Sarvam API.
+    """Convert Roman/English text to Devanagari Hindi via the transliteration provider.
     Returns the transliterated text, or empty string on failure."""
-    if not text or not text.strip() or not SARVAM_API_KEY:
-        return ''
-    start_ms = time.time()
-    try:
-        resp = requests.post(
-            SARVAM_TRANSLITERATE_URL,
-            headers={
-                'api-subscription-key': SARVAM_API_KEY,
-                'Content-Type': 'application/json'
-            },
-            json={
-                'input': text,
-                'source_language_code': 'en-IN',
-                'target_language_code': 'hi-IN'
-            },
-            timeout=5
-        )
-        elapsed = (time.time() - start_ms) * 1000
-        if resp.status_code == 200:
-            result = resp.json().get('transliterated_text', '')
-            logger.info(f"🔤 SARVAM TO-HINDI: {elapsed:.0f}ms for '{text[:40]}…' → '{result[:40]}…'")
-            return result
-        logger.warning(f"Sarvam to-hindi returned {resp.status_code} in {elapsed:.0f}ms: {resp.text[:200]}")
-        return ''
-    except Exception as e:
-        elapsed = (time.time() - start_ms) * 1000
-        logger.warning(f"Sarvam to-hindi failed in {elapsed:.0f}ms: {e}")
-        return ''
+    provider = providers.get('transliteration')
+    with span('transliteration', provider=provider.name, direction='to_hindi', chars=len(text or '')), \
+            TRANSLITERATION_LATENCY.time(provider=provider.name, direction='to_hindi'):
+        return provider.to_hindi(text)
 
 
 # Initialize ElevenLabs client
@@ -402,27 +451,31 @@ You are on the SECOND-TO-LAST exchange. Start wrapping up NOW.
     # Early/mid conversation - no special instruction needed
     return ""
 
-def gemini_generate_content(system_prompt, conversation_history=None, response_format="json", use_eval_model=False, model_override=None):
-    """
-    Generate content using Gemini with optional JSON formatting
+def build_llm_prompt(system_prompt, conversation_history=None):
+    """Flatten the system prompt and conversation history into a single prompt string"""
+    full_prompt = system_prompt
 
-    Args:
-        system_prompt: The system prompt
-        conversation_history: Optional list of previous messages
-        response_format: "json" or "text"
-        use_eval_model: Use the more accurate evaluation model (gemini-2.0-flash)
-        model_override: Directly pass a model instance to use
-    """
-    try:
-        # Build the prompt with conversation history
-        full_prompt = system_prompt
+    if conversation_history:
+        full_prompt += "\n\nConversation history:\n"
+        for msg in conversation_history:
+            role = "Child" if msg["role"] == "user" else "Tutor"
+            full_prompt += f"{role}: {msg['content']}\n"
+    return full_prompt
+
+
+class GeminiLLMProvider(LLMProvider):
+    """Google Gemini models: flash-lite for chat, flash for evaluation, 2.5-flash for hints."""
 
-        if conversation_history:
-            full_prompt += "\n\nConversation history:\n"
-            for msg in conversation_history:
-                role = "Child" if msg["role"] == "user" else "Tutor"
-                full_prompt += f"{role}: {msg['content']}\n"
+    def model_for(self, tier):
+        return GEMINI_MODELS.get(tier, GEMINI_MODELS['chat'])
 
+    def _model(self, tier):
+        model = {'eval': gemini_eval_model, 'hints': gemini_hints_model}.get(tier, gemini_model)
+        if model is None:
+            raise RuntimeError("Gemini client is not initialized (GEMINI_API_KEY missing?)")
+        return model
+
+    def generate(self, prompt, response_format='json', tier='chat'):
         # Configure generation settings
         generation_config = {
             "temperature": 0.7,
@@ -437,30 +490,66 @@ def gemini_generate_content(system_prompt, conversation_history=None, response_f
             # Only use stop_sequences for non-JSON responses
             generation_config["stop_sequences"] = ["Child:", "User:", "Tutor:", "Assistant:"]
 
-        # Select appropriate model
-        if model_override:
-            model = model_override
-        elif use_eval_model:
-            model = gemini_eval_model
-        else:
-            model = gemini_model
+        with vendor_call(f"gemini/{self.model_for(tier)}", GEMINI_TIMEOUT_SECONDS) as timeout:
+            response = self._model(tier).generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options={'timeout': timeout}
+            )
+            return response.text
 
-        # Generate content
-        response = model.generate_content(
-            full_prompt,
-            generation_config=generation_config
-        )
+    def stream(self, prompt):
+        # Configure generation settings for streaming
+        generation_config = {
+            "temperature": 0.6,
+            "max_output_tokens": 1000,
+            "stop_sequences": ["Child:", "User:", "Tutor:", "Assistant:"]
+        }
 
-        # Validate JSON response if in JSON mode
-        if response_format == "json":
-            # Try to parse to ensure it's valid JSON
-            try:
-                json.loads(response.text)
-            except json.JSONDecodeError as json_err:
-                logger.error(f"Invalid JSON from Gemini: {response.text[:200]}")
-                raise ValueError(f"Gemini returned invalid JSON: {json_err}")
+        with vendor_call(f"gemini/{self.model_for('chat')}", GEMINI_TIMEOUT_SECONDS) as timeout:
+            response = self._model('chat').generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True,
+                request_options={'timeout': timeout}
+            )
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+
+providers.register('llm', 'gemini', GeminiLLMProvider, default=True)
+
+
+def gemini_generate_content(system_prompt, conversation_history=None, response_format="json", model_tier="chat"):
+    """
+    Generate content using the LLM provider with optional JSON formatting
+
+    Args:
+        system_prompt: The system prompt
+        conversation_history: Optional list of previous messages
+        response_format: "json" or "text"
+        model_tier: "chat" (default), "eval" (more accurate grammar detection) or "hints"
+    """
+    provider = providers.get('llm')
+    model = provider.model_for(model_tier)
+    try:
+        with span('llm.generate', provider=provider.name, tier=model_tier, response_format=response_format):
+            full_prompt = build_llm_prompt(system_prompt, conversation_history)
+            with LLM_LATENCY.time(provider=provider.name, model=model, mode='generate'):
+                text = provider.generate(full_prompt, response_format=response_format, tier=model_tier)
+
+            # Validate JSON response if in JSON mode
+            if response_format == "json":
+                # Try to parse to ensure it's valid JSON
+                try:
+                    json.loads(text)
+                except json.JSONDecodeError as json_err:
+                    LLM_JSON_FAILURES.inc(provider=provider.name, model=model)
+                    logger.error(f"Invalid JSON from LLM: {text[:200]}")
+                    raise ValueError(f"LLM returned invalid JSON: {json_err}")
 
-        return response.text
+            return text
 
     except Exception as e:
         logger.error(f"Gemini generation error: {e}")
@@ -468,47 +557,38 @@ def gemini_generate_content(system_prompt, conversation_history=None, response_f
 
 def gemini_stream_content(system_prompt, conversation_history=None):
     """
-    Stream content using Gemini (for plain text responses, not JSON)
+    Stream content using the LLM provider (for plain text responses, not JSON)
 
     Args:
         system_prompt: The system prompt
         conversation_history: Optional list of previous messages
 
     Yields:
-        Text chunks from Gemini
+        Text chunks from the LLM
     """
+    provider = providers.get('llm')
+    # Not a `with` block: the span stays open across yields, so it must not become the current span
+    stream_span = span('llm.stream', provider=provider.name)
+    model = provider.model_for('chat')
+    stream_start = time.perf_counter()
     try:
-        # Build the prompt with conversation history
-        full_prompt = system_prompt
-
-        if conversation_history:
-            full_prompt += "\n\nConversation history:\n"
-            for msg in conversation_history:
-                role = "Child" if msg["role"] == "user" else "Tutor"
-                full_prompt += f"{role}: {msg['content']}\n"
-
-        # Configure generation settings for streaming
-        generation_config = {
-            "temperature": 0.6,
-            "max_output_tokens": 1000,
-            "stop_sequences": ["Child:", "User:", "Tutor:", "Assistant:"]
-        }
-
-        # Generate content with streaming
-        response = gemini_model.generate_content(
-            full_prompt,
-            generation_config=generation_config,
-            stream=True
-        )
-
-        # Yield chunks
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
+        full_prompt = build_llm_prompt(system_prompt, conversation_history)
+        chunk_count = 0
+        for chunk in provider.stream(full_prompt):
+            if chunk_count == 0:
+                stream_span.set_attribute('ttft_ms', stream_span.duration_ms)
+                LLM_TTFT.observe(time.perf_counter() - stream_start, provider=provider.name, model=model)
+            chunk_count += 1
+            yield chunk
+        stream_span.set_attribute('chunks', chunk_count)
+        LLM_LATENCY.observe(time.perf_counter() - stream_start, provider=provider.name, model=model, mode='stream')
 
     except Exception as e:
+        stream_span.record_error(e)
         logger.error(f"Gemini streaming error: {e}")
         raise
+    finally:
+        stream_span.end()
 
 def get_streaming_system_prompt(base_prompt, sentences_count, child_name, child_age, child_gender, is_farewell=False, recast_context=None):
     """
@@ -611,16 +691,25 @@ def parse_educator_topic_key(conversation_type):
 
 def get_educator_topic(conversation_type):
     """Look up an EducatorTopic from a conversation_type like 'edu_12_school_trip'.
-    Returns the EducatorTopic or None."""
+    Served from the in-process topic cache (no DB read on a warm cache).
+    Returns a CachedEducatorTopic or None."""
     educator_id, topic_key = parse_educator_topic_key(conversation_type)
     if educator_id is None:
         return None
-    return EducatorTopic.query.filter_by(
-        educator_id=educator_id, topic_key=topic_key, is_active=True
-    ).first()
+    return topic_cache.get(f"edu_{educator_id}_{topic_key}")
 
 
 def get_educator_topic_prompts(educator_topic, prompt_type='conversation'):
+    """Return the system prompt for an educator topic, compiled once per cache version."""
+    cached_prompts = getattr(educator_topic, 'prompts', None)
+    if cached_prompts is None:
+        return build_educator_topic_prompts(educator_topic, prompt_type)
+    if prompt_type not in cached_prompts:
+        cached_prompts[prompt_type] = build_educator_topic_prompts(educator_topic, prompt_type)
+    return cached_prompts[prompt_type]
+
+
+def build_educator_topic_prompts(educator_topic, prompt_type='conversation'):
     """Build system prompts for an educator topic, mirroring built-in topic structure.
     Uses full stored prompts when available, falls back to dynamic composition.
     prompt_type: 'initial' or 'conversation'"""
@@ -744,7 +833,7 @@ Example: {{"hint": "मुझे पिज़्ज़ा पसंद है"}}
             system_prompt=hints_prompt,
             conversation_history=recent_history,
             response_format="json",
-            model_override=gemini_hints_model
+            model_tier="hints"
         )
 
         # Parse the JSON response
@@ -775,38 +864,52 @@ Example: {{"hint": "मुझे पिज़्ज़ा पसंद है"}}
         return []
 
 
+def get_initial_system_prompt(child_name, child_age, child_gender, conversation_type):
+    """System prompt for the opening turn, or None for an unknown type or an educator topic that no longer exists."""
+    if conversation_type.startswith('edu_'):
+        edu_topic = get_educator_topic(conversation_type)
+        if not edu_topic:
+            return None
+        return get_educator_topic_prompts(edu_topic, 'initial').format(
+            child_name=child_name,
+            child_age=child_age,
+            child_gender=child_gender,
+            exchange_number=1
+        )
+    if conversation_type not in CONVERSATION_TYPES:
+        return None
+    return CONVERSATION_TYPES[conversation_type]['system_prompts']['initial'].format(
+        child_name=child_name,
+        child_age=child_age,
+        child_gender=child_gender,
+        exchange_number=1
+    )
+
+
+def generate_initial_greeting(system_prompt):
+    """One opening line from the LLM. Raises if the call fails or returns no response."""
+    raw_content = gemini_generate_content(
+        system_prompt=system_prompt,
+        conversation_history=None,
+        response_format="json"
+    )
+    logger.info(f"Raw LLM response: {raw_content[:200]}")
+    response = json.loads(raw_content).get('response')
+    if not response:
+        raise ValueError("LLM greeting has no response field")
+    return response
+
+
+FALLBACK_GREETING = "नमस्ते! कैसा है आपका दिन?"
+
+
 def get_initial_conversation(child_name="दोस्त", child_age=6, child_gender="neutral", conversation_type="everyday"):
     """Generate initial conversation starter based on conversation type"""
     try:
-        # Get the appropriate system prompt for the conversation type
-        if conversation_type.startswith('edu_'):
-            edu_topic = get_educator_topic(conversation_type)
-            if edu_topic:
-                system_prompt = get_educator_topic_prompts(edu_topic, 'initial').format(
-                    child_name=child_name,
-                    child_age=child_age,
-                    child_gender=child_gender,
-                    exchange_number=1
-                )
-            else:
-                system_prompt = CONVERSATION_TYPES['everyday']['system_prompts']['initial'].format(
-                    child_name=child_name, child_age=child_age, child_gender=child_gender, exchange_number=1
-                )
-        elif conversation_type in CONVERSATION_TYPES:
-            system_prompt = CONVERSATION_TYPES[conversation_type]['system_prompts']['initial'].format(
-                child_name=child_name,
-                child_age=child_age,
-                child_gender=child_gender,
-                exchange_number=1
-            )
-        else:
-            # Fallback to everyday conversation
-            system_prompt = CONVERSATION_TYPES['everyday']['system_prompts']['initial'].format(
-                child_name=child_name,
-                child_age=child_age,
-                child_gender=child_gender,
-                exchange_number=1
-            )
+        system_prompt = get_initial_system_prompt(child_name, child_age, child_gender, conversation_type)
+        if system_prompt is None:
+            logger.warning(f"No initial prompt for conversation type {conversation_type}, using fallback greeting")
+            return FALLBACK_GREETING
 
         if conversation_type.startswith('edu_'):
             logger.info(f"[EDU_PROMPT_FINAL] topic={conversation_type} type=initial\n--- FINAL SYSTEM PROMPT TO GEMINI ---\n{system_prompt}\n--- END ---")
@@ -814,20 +917,13 @@ def get_initial_conversation(child_name="दोस्त", child_age=6, child_ge
         logger.info(f"Making Gemini API call for initial {conversation_type} conversation")
 
         # Use Gemini to generate initial greeting with JSON format
-        raw_content = gemini_generate_content(
-            system_prompt=system_prompt,
-            conversation_history=None,
-            response_format="json"
-        )
-
+        greeting = generate_initial_greeting(system_prompt)
         logger.info("Gemini API call successful")
-        logger.info(f"Raw LLM response: {raw_content[:200]}")
-        result = json.loads(raw_content)
-        return result.get('response', "नमस्ते! कैसा है आपका दिन?")
-        
+        return greeting
+
     except Exception as e:
         logger.error(f"Error in initial conversation: {str(e)}")
-        return "नमस्ते! कैसा है आपका दिन?"  # Fallback greeting
+        return FALLBACK_GREETING
 
 
 def show_completion_page():
@@ -855,7 +951,19 @@ def calculate_rewards(evaluation_result, good_response_count):
 
 class ResponseEvaluator:
     """Evaluates user responses for completeness and grammar"""
-    
+
+    @staticmethod
+    def default_evaluation(user_text):
+        """Neutral green result, used when the evaluation fails or misses the turn deadline"""
+        return {
+            "score": 5,
+            "is_complete": True,
+            "is_grammatically_correct": True,
+            "issues": [],
+            "corrected_response": user_text,
+            "feedback_type": "green"
+        }
+
     @staticmethod
     def evaluate_response(user_text, last_talker_response=None, conversation_type=None):
         """Evaluate user response and return corrected answer using Gemini"""
@@ -957,7 +1065,7 @@ class ResponseEvaluator:
                 system_prompt=system_prompt,
                 conversation_history=None,
                 response_format="json",
-                use_eval_model=True
+                model_tier="eval"
             )
 
             evaluation_data = json.loads(result)
@@ -973,24 +1081,10 @@ class ResponseEvaluator:
         except json.JSONDecodeError as json_err:
             logger.error(f"Error parsing evaluation JSON: {json_err}")
             logger.error(f"Raw response was: {result if 'result' in locals() else 'No result'}")
-            return {
-                "score": 5,
-                "is_complete": True,
-                "is_grammatically_correct": True,
-                "issues": [],
-                "corrected_response": user_text,
-                "feedback_type": "green"
-            }
+            return ResponseEvaluator.default_evaluation(user_text)
         except Exception as e:
             logger.error(f"Error in response evaluation: {str(e)}")
-            return {
-                "score": 5,
-                "is_complete": True,
-                "is_grammatically_correct": True,
-                "issues": [],
-                "corrected_response": user_text,
-                "feedback_type": "green"
-            }
+            return ResponseEvaluator.default_evaluation(user_text)
 
 class TalkerModule:
     """Handles conversation responses based on evaluation context"""
@@ -1065,18 +1159,21 @@ class ConversationController:
                     last_talker_response = message.get('content')
                     break
 
-            # Run evaluation and conversation response in PARALLEL
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            # Run evaluation and conversation response in PARALLEL; the evaluation is
+            # optional and gets the turn deadline, the reply is not cut short
+            turn_deadline = Deadline(TURN_DEADLINE_SECONDS)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+            try:
                 # Submit both API calls simultaneously
                 eval_future = executor.submit(
-                    self.evaluator.evaluate_response,
+                    wrap(turn_deadline.bind(self.evaluator.evaluate_response)),
                     user_text,
                     last_talker_response,
                     conversation_type
                 )
 
                 conv_future = executor.submit(
-                    self.talker.get_response,
+                    wrap(self.talker.get_response),
                     session_data['conversation_history'],
                     user_text,
                     session_data['sentences_count'],
@@ -1086,9 +1183,13 @@ class ConversationController:
                     child_gender
                 )
                 
-                # Wait for both to complete
-                evaluation = eval_future.result()
+                # Wait for the reply; the evaluation gets whatever is left of the deadline
                 conversation_response = conv_future.result()
+                evaluation = turn_deadline.result(eval_future, self.evaluator.default_evaluation(user_text),
+                                                  'evaluation')
+            finally:
+                # Don't hold the turn for an evaluation that missed the deadline
+                executor.shutdown(wait=False)
 
             # Check if conversation should end (server-side override based on count)
             should_end = conversation_response.get('should_end', False) if isinstance(conversation_response, dict) else False
@@ -1158,23 +1259,21 @@ def track_page_view(page, url_path):
         user_agent = request.headers.get('User-Agent')
         ip_address = request.remote_addr
         
-        page_view = PageView(
-            user_id=user_id,
-            session_id=session_id,
-            page=page,
-            url_path=url_path,
-            referrer=referrer,
-            user_agent=user_agent,
-            ip_address=ip_address
-        )
-        
-        db.session.add(page_view)
-        db.session.commit()
-        logger.info(f"Tracked page view: {page} for {'user_' + str(user_id) if user_id else 'anonymous'}")
+        # Queued for a background bulk insert - the request never waits on this write
+        enqueue_event('page_view', {
+            'user_id': user_id,
+            'session_id': session_id,
+            'page': page,
+            'url_path': url_path,
+            'referrer': referrer,
+            'user_agent': user_agent,
+            'ip_address': ip_address,
+            'created_at': datetime.utcnow()
+        })
+        logger.info(f"Queued page view: {page} for {'user_' + str(user_id) if user_id else 'anonymous'}")
         
     except Exception as e:
         logger.error(f"Error tracking page view: {str(e)}")
-        db.session.rollback()
 
 def track_user_action(action, page, metadata=None):
     """Track user action for analytics"""
@@ -1182,24 +1281,22 @@ def track_user_action(action, page, metadata=None):
         session_id = request.cookies.get('session', 'anonymous')
         user_id = current_user.id if current_user.is_authenticated else None
         
-        user_action = UserAction(
-            user_id=user_id,
-            session_id=session_id,
-            action=action,
-            page=page,
-            action_metadata=json.dumps(metadata, ensure_ascii=False) if metadata else None
-        )
-        
-        db.session.add(user_action)
-        db.session.commit()
-        logger.info(f"Tracked action: {action} on {page} for {'user_' + str(user_id) if user_id else 'anonymous'}")
+        enqueue_event('user_action', {
+            'user_id': user_id,
+            'session_id': session_id,
+            'action': action,
+            'page': page,
+            'action_metadata': json.dumps(metadata, ensure_ascii=False) if metadata else None,
+            'created_at': datetime.utcnow()
+        })
+        logger.info(f"Queued action: {action} on {page} for {'user_' + str(user_id) if user_id else 'anonymous'}")
         
     except Exception as e:
         logger.error(f"Error tracking user action: {str(e)}")
-        db.session.rollback()
 
 @app.route('/api/start_conversation', methods=['POST'])
 @login_required
+@trace_request('start_conversation')
 def start_conversation():
     """Endpoint to start the initial conversation"""
     try:
@@ -1222,15 +1319,26 @@ def start_conversation():
         child_age = current_user.child_age or 6
         child_gender = current_user.child_gender or 'neutral'
 
-        initial_message = get_initial_conversation(child_name, child_age, child_gender, conversation_type)
+        # Pre-generated opening turn with audio and roman text already computed, if one is warm
+        with span('greeting_pool.take', conversation_type=conversation_type) as pool_span:
+            greeting = take_greeting(conversation_type, child_name, child_age, child_gender)
+            pool_span.set_attribute('hit', greeting is not None)
 
-        # Run TTS and transliteration in parallel (transliteration ~200ms finishes within TTS ~500ms)
-        logger.info("Converting text to speech + transliterating in parallel")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as startup_executor:
-            tts_future = startup_executor.submit(text_to_speech_hindi, initial_message)
-            translit_future = startup_executor.submit(transliterate_to_roman, initial_message)
-            audio_response = tts_future.result()
-            text_roman = translit_future.result()
+        if greeting:
+            logger.info(f"👋 GREETING POOL: served pooled greeting for {conversation_type}")
+            initial_message = greeting['text']
+            text_roman = greeting['text_roman']
+            audio_response = greeting['audio']
+        else:
+            initial_message = get_initial_conversation(child_name, child_age, child_gender, conversation_type)
+
+            # Run TTS and transliteration in parallel (transliteration ~200ms finishes within TTS ~500ms)
+            logger.info("Converting text to speech + transliterating in parallel")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as startup_executor:
+                tts_future = startup_executor.submit(wrap(speech_audio), initial_message)
+                translit_future = startup_executor.submit(wrap(transliterate_to_roman), initial_message)
+                audio_response = tts_future.result()
+                text_roman = translit_future.result()
 
         if not audio_response:
             raise Exception("Failed to generate audio response")
@@ -1250,7 +1358,8 @@ def start_conversation():
         conversation.amber_data = []
         
         db.session.add(conversation)
-        db.session.commit()
+        with DB_COMMIT_LATENCY.time(operation='start_conversation'):
+            db.session.commit()
         
         # Initialize complete session data with all required fields
         session_store = FileSessionStore()
@@ -1278,13 +1387,14 @@ def start_conversation():
 
         # Save session with complete data including initial message
         session_store.save_session(session_id, session_data)
+        prefetch_translation(initial_message)
 
         logger.info("Conversation started successfully")
         
         return jsonify({
             'text': initial_message,
             'text_roman': text_roman,
-            'audio': audio_response,
+            **audio_payload(audio_response, negotiate_delivery(data.get('audio_delivery'))),
             'session_id': session_id,
             'corrections': None,  # Explicitly include corrections as None
             'max_turns': MAX_CONVERSATION_TURNS
@@ -1297,8 +1407,27 @@ def start_conversation():
         return jsonify({'error': str(e)}), 500
     
 
-def text_to_speech_hindi_elevenlabs(text, output_filename="response.wav"):
-    """Convert text to speech using ElevenLabs"""
+def elevenlabs_convert_stream(text):
+    """The ElevenLabs MP3 chunk iterator for text in Kiki's voice."""
+    return eleven_labs.text_to_speech.convert_as_stream(
+        text=text,
+        model_id=ElevenLabsTTSProvider.model,
+        language_code="hi",
+        voice_id="Sm1seazb4gs7RSlUVw7c", #
+        optimize_streaming_latency="2",
+        output_format="mp3_44100_128",
+        voice_settings=VoiceSettings(
+            stability=0.8,
+            similarity_boost=0.75,
+            style=0.05,
+            use_speaker_boost=False,
+            speed=0.8
+        )
+    )
+
+
+def text_to_speech_hindi_elevenlabs(text):
+    """Convert text to speech using ElevenLabs. Returns MP3 bytes; raises on failure (for tts_router)."""
     tts_function_start = time.time()
     logger.info(f"🔊 ELEVENLABS TTS: Starting synthesis for '{text[:50]}...'")
 
@@ -1306,37 +1435,17 @@ def text_to_speech_hindi_elevenlabs(text, output_filename="response.wav"):
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                audio_stream = eleven_labs.text_to_speech.convert_as_stream(
-                    text=text,
-                    model_id="eleven_multilingual_v2",
-                    language_code="hi",
-                    voice_id="Sm1seazb4gs7RSlUVw7c", #
-                    optimize_streaming_latency="2",
-                    output_format="mp3_44100_128",
-                    voice_settings=VoiceSettings(
-                        stability=0.8,
-                        similarity_boost=0.75,
-                        style=0.05,
-                        use_speaker_boost=False,
-                        speed=0.8
-                    )
-                )
+                audio_stream = elevenlabs_convert_stream(text)
 
                 audio_data = io.BytesIO()
                 for chunk in audio_stream:
                     audio_data.write(chunk)
 
-                audio_base64 = base64.b64encode(audio_data.getvalue()).decode('utf-8')
-
-                if output_filename:
-                    with open(output_filename, 'wb') as f:
-                        f.write(audio_data.getvalue())
-
                 tts_function_end = time.time()
                 api_time = (tts_function_end - tts_function_start) * 1000
                 logger.info(f"✅ ELEVENLABS TTS: Success in {api_time:.1f}ms")
 
-                return audio_base64
+                return audio_data.getvalue()
 
             except Exception as e:
                 if attempt == max_retries - 1:
@@ -1347,87 +1456,221 @@ def text_to_speech_hindi_elevenlabs(text, output_filename="response.wav"):
     except Exception as e:
         sentry_sdk.capture_exception(e)
         logger.error(f"TTS Error: {str(e)}")
+        raise
+
+
+def text_to_speech_hindi_elevenlabs_stream(text):
+    """Yield ElevenLabs MP3 chunks as they arrive. Retries only until the first chunk."""
+    tts_function_start = time.time()
+    logger.info(f"🔊 ELEVENLABS TTS: Starting streamed synthesis for '{text[:50]}...'")
+
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            audio_stream = iter(elevenlabs_convert_stream(text))
+            first_chunk = next(audio_stream, None)
+            break
+        except Exception as e:
+            if attempt == max_retries - 1:
+                sentry_sdk.capture_exception(e)
+                logger.error(f"TTS Error: {str(e)}")
+                return
+            logger.warning(f"TTS attempt {attempt + 1} failed: {e}")
+            time.sleep(0.1 * (attempt + 1))
+    if first_chunk is None:
+        return
+
+    logger.info(f"⚡ ELEVENLABS TTS: First chunk in {(time.time() - tts_function_start) * 1000:.1f}ms")
+    yield first_chunk
+    try:
+        for chunk in audio_stream:
+            yield chunk
+    except Exception as e:
+        # Already streaming to the client; the clip ends early rather than restarting
+        sentry_sdk.capture_exception(e)
+        logger.error(f"TTS stream interrupted: {str(e)}")
+        return
+    logger.info(f"✅ ELEVENLABS TTS: Streamed in {(time.time() - tts_function_start) * 1000:.1f}ms")
+
+
+# Only one voice is routed: switching vendors mid-conversation would change Kiki's voice
+# and invalidate the per-voice name / segment / greeting caches
+tts_router = router('tts')
+tts_router.add('elevenlabs', text_to_speech_hindi_elevenlabs, model='eleven_multilingual_v2')
+
+
+class ElevenLabsTTSProvider(TTSProvider):
+    content_type = 'audio/mpeg'
+    model = 'eleven_multilingual_v2'
+
+    def synthesize(self, text):
+        return tts_router.call(text)
+
+    def synthesize_stream(self, text):
+        return text_to_speech_hindi_elevenlabs_stream(text)
+
+
+providers.register('tts', 'elevenlabs', ElevenLabsTTSProvider, default=True)
+providers.configure('tts', TTS_PROVIDER)
+
+
+def synthesize_speech(text):
+    """Synthesize with the configured TTS provider. Returns raw audio bytes, or None on failure."""
+    provider = providers.get('tts')
+    with span('tts', provider=provider.name, chars=len(text or '')) as tts_span, \
+            TTS_LATENCY.time(provider=provider.name, model=provider.model):
+        audio_bytes = provider.synthesize(text)
+        tts_span.set_attribute('bytes', len(audio_bytes or b''))
+    if audio_bytes:
+        TTS_CHARACTERS.inc(len(text), source='synthesized')
+    return audio_bytes
+
+
+def stream_synthesized_speech(text):
+    """Yield audio chunks from the configured TTS provider as they are produced."""
+    provider = providers.get('tts')
+    started = time.time()
+    received = 0
+    for chunk in provider.synthesize_stream(text):
+        if not received:
+            TTS_TTFB.observe(time.time() - started, provider=provider.name, model=provider.model)
+        received += len(chunk)
+        yield chunk
+    if received:
+        TTS_LATENCY.observe(time.time() - started, provider=provider.name, model=provider.model)
+        TTS_CHARACTERS.inc(len(text), source='synthesized')
+
+
+def stream_speech(text):
+    """Yield audio chunks for a tutor line, using library sentences where possible."""
+    chunks = stream_with_segments(text, stream_synthesized_speech)
+    return chunks if chunks is not None else stream_synthesized_speech(text)
+
+
+def speech_audio(text):
+    """Raw audio for a tutor line, or None on failure.
+    Sentences found in the TTS segment library are reused instead of re-synthesized."""
+    return synthesize_with_segments(text) or synthesize_speech(text)
+
+
+def text_to_speech_hindi(text):
+    """Synthesize with the configured TTS provider. Returns base64 audio, or None on failure."""
+    audio_bytes = speech_audio(text)
+    if not audio_bytes:
         return None
+    return base64.b64encode(audio_bytes).decode('utf-8')
 
 
-def text_to_speech_hindi(text, output_filename="response.wav"):
-    """Route TTS to the configured provider"""
-    if TTS_PROVIDER.lower() == 'sarvam':
-        return text_to_speech_hindi_sarvam(text, output_filename)
-    else:
-        return text_to_speech_hindi_elevenlabs(text, output_filename)
+def audio_payload(audio_bytes, delivery):
+    """Response fields for synthesized audio: a short-lived URL to the raw bytes, or base64."""
+    if delivery == AUDIO_DELIVERY_URL:
+        content_type = providers.get('tts').content_type
+        audio_id = store_audio(audio_bytes, content_type)
+        return {'audio_url': url_for('get_audio', audio_id=audio_id), 'audio_content_type': content_type}
+    return {'audio': base64.b64encode(audio_bytes).decode('utf-8')}
 
 
-def validate_audio_duration(audio_data, min_duration=0.05, max_duration=15.0):
-    """Validate audio duration to filter out noise and incomplete recordings"""
+def validate_audio_duration(audio_data, min_duration=0.3, max_duration=60.0):
+    """Validate audio duration to filter out noise and incomplete recordings.
+    Duration is read from the WebM container; non-WebM uploads are allowed through."""
     try:
-        # Estimate duration: 16-bit mono audio at 44.1kHz (standard WAV)
-        # Each sample is 2 bytes, so duration = bytes / (2 * sample_rate)
-        estimated_duration = len(audio_data) / (2 * 44100)
+        webm_info = read_webm_info(audio_data)
+        if webm_info is None:
+            logger.info("⚠️ AUDIO VALIDATION: Not a WebM upload, skipping duration check")
+            return True
+        duration = webm_info['duration_ms'] / 1000.0
 
-        if estimated_duration < min_duration:
-            logger.info(f"🔇 AUDIO VALIDATION: Too short ({estimated_duration:.2f}s < {min_duration}s) - likely noise")
+        if duration < min_duration:
+            logger.info(f"🔇 AUDIO VALIDATION: Too short ({duration:.2f}s < {min_duration}s) - likely noise")
             return False
-        elif estimated_duration > max_duration:
-            logger.info(f"🔇 AUDIO VALIDATION: Too long ({estimated_duration:.2f}s > {max_duration}s) - likely incomplete")
+        elif duration > max_duration:
+            logger.info(f"🔇 AUDIO VALIDATION: Too long ({duration:.2f}s > {max_duration}s) - likely incomplete")
             return False
         else:
-            logger.info(f"✅ AUDIO VALIDATION: Duration OK ({estimated_duration:.2f}s)")
+            logger.info(f"✅ AUDIO VALIDATION: Duration OK ({duration:.2f}s, {webm_info['packets']} packets)")
             return True
 
     except Exception as e:
-        logger.warning(f"⚠️ AUDIO VALIDATION: Could not estimate duration - {str(e)}")
+        logger.warning(f"⚠️ AUDIO VALIDATION: Could not read duration - {str(e)}")
         return True  # Default to allowing audio if validation fails
 
 
-# Audio optimization functions for Google Cloud STT
-def trim_audio_silence(audio_data):
-    """
-    Remove silence from beginning and end of audio to reduce processing time
+def audio_has_speech(audio_data):
+    """Reject empty or noise-only clips before paying for a cloud STT call.
+    Uses the container duration, then the energy VAD when NumPy + ffmpeg are available."""
+    if not validate_audio_duration(audio_data):
+        return False
+    try:
+        vad_start = time.time()
+        vad = detect_voice_activity(audio_data)
+        if vad is None:
+            return True
+        vad_ms = (time.time() - vad_start) * 1000
+        if vad['voiced_ms'] < VAD_MIN_VOICED_MS:
+            logger.info(f"🔇 VAD: Only {vad['voiced_ms']}ms voiced of {vad['total_ms']}ms "
+                        f"(noise floor {vad['noise_floor_dbfs']} dBFS) - skipping STT ({vad_ms:.0f}ms)")
+            return False
+        logger.info(f"✅ VAD: {vad['voiced_ms']}ms voiced of {vad['total_ms']}ms ({vad_ms:.0f}ms)")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ VAD failed, sending audio to STT anyway: {e}")
+        return True
+
+
+def verify_client_trim(audio_data, form):
+    """Check the silence trim the browser applied before upload and log what it saved.
+
+    The client sends trim_lead_ms, trim_trail_ms, original_duration_ms and original_size
+    next to the trimmed WebM. The received duration (read from the container) must equal
+    original - lead - trail within CLIENT_TRIM_TOLERANCE_MS. Returns a summary dict, or
+    None when the upload was not trimmed.
     """
     try:
-        # Find first and last bytes above silence threshold
-        silence_threshold = 10
-        audio_bytes = audio_data if isinstance(audio_data, (bytes, bytearray)) else bytes(audio_data)
-        first_idx = -1
-        last_idx = -1
-        for i, b in enumerate(audio_bytes):
-            if b > silence_threshold:
-                if first_idx == -1:
-                    first_idx = i
-                last_idx = i
-
-        if first_idx != -1:
-            # Keep small buffer around speech to avoid cutting off words
-            buffer_size = 100
-            start_idx = max(0, first_idx - buffer_size)
-            end_idx = min(len(audio_data), last_idx + buffer_size)
-
-            trimmed_audio = audio_data[start_idx:end_idx]
-
-            # Log reduction if significant
-            original_size = len(audio_data) / 1024
-            trimmed_size = len(trimmed_audio) / 1024
-            reduction_percent = ((original_size - trimmed_size) / original_size) * 100
-
-            if reduction_percent > 10:  # Only log if significant reduction
-                logger.info(f"🔇 Audio trimmed: {original_size:.1f}KB → {trimmed_size:.1f}KB ({reduction_percent:.1f}% reduction)")
-                return trimmed_audio
-
-        return audio_data
+        lead_ms = int(form.get('trim_lead_ms', 0))
+        trail_ms = int(form.get('trim_trail_ms', 0))
+        original_ms = int(form.get('original_duration_ms', 0))
+        original_size = int(form.get('original_size', 0))
+    except (TypeError, ValueError):
+        logger.warning("⚠️ CLIENT TRIM: Malformed trim fields, ignoring")
+        return None
+    if not original_ms or (lead_ms <= 0 and trail_ms <= 0):
+        return None
+
+    webm_info = read_webm_info(audio_data)
+    if webm_info is None:
+        logger.warning("⚠️ CLIENT TRIM: Trim reported but upload is not WebM")
+        return None
+
+    received_ms = webm_info['duration_ms']
+    expected_ms = original_ms - lead_ms - trail_ms
+    drift_ms = received_ms - expected_ms
+    verified = lead_ms >= 0 and trail_ms >= 0 and abs(drift_ms) <= CLIENT_TRIM_TOLERANCE_MS
+    saved_bytes = max(0, original_size - len(audio_data))
+    summary = {
+        'lead_ms': lead_ms,
+        'trail_ms': trail_ms,
+        'original_ms': original_ms,
+        'received_ms': received_ms,
+        'saved_ms': original_ms - received_ms,
+        'saved_bytes': saved_bytes,
+        'verified': verified,
+    }
+    if verified:
+        saved_pct = 100.0 * (original_ms - received_ms) / original_ms
+        logger.info(f"✂️ CLIENT TRIM: {original_ms}ms → {received_ms}ms (lead {lead_ms}ms, trail {trail_ms}ms, "
+                    f"{saved_pct:.0f}% saved, {saved_bytes / 1024:.1f}KB less upload)")
+    else:
+        logger.warning(f"⚠️ CLIENT TRIM: Mismatch - expected {expected_ms}ms "
+                       f"({original_ms} - {lead_ms} - {trail_ms}) but received {received_ms}ms")
+    return summary
 
-    except Exception as e:
-        logger.warning(f"⚠️ Audio trimming failed, using original: {e}")
-        return audio_data
 
 def optimize_audio_for_google_cloud(audio_data):
     """
     Apply optimizations for Google Cloud Speech-to-Text
-    Note: Silence trimming disabled - doesn't work with compressed WEBM_OPUS format.
-    The trim_audio_silence function incorrectly treats compressed bytes as raw PCM
-    amplitude values, causing random truncation of longer recordings.
+    Note: Compressed WEBM_OPUS is sent unchanged. Silence/noise gating happens on
+    decoded PCM in audio_has_speech() before any STT provider is called.
     """
-    # Return audio unchanged - silence trimming only works for raw PCM, not compressed formats
     return audio_data
 
 # Initialize Google Cloud Speech client with connection pooling
@@ -1458,7 +1701,11 @@ else:
 
 
 def speech_to_text_hindi_chirp3(audio_data, child_name=None):
-    """Transcribe using Chirp 3 model (V2 API) with auto language detection"""
+    """Transcribe using Chirp 3 model (V2 API) with auto language detection.
+
+    Returns None for an empty transcript; raises on failure so stt_router falls back.
+    """
+    timeout = call_timeout(GOOGLE_STT_TIMEOUT_SECONDS)  # raises DeadlineExceeded for the router
     stt_start_time = time.time()
     logger.info(f"🎙️ CHIRP 3 STT: Starting transcription...")
 
@@ -1479,7 +1726,7 @@ def speech_to_text_hindi_chirp3(audio_data, child_name=None):
             content=audio_data,
         )
 
-        response = google_speech_client_v2.recognize(request=request)
+        response = google_speech_client_v2.recognize(request=request, timeout=timeout)
 
         # Extract transcription
         transcriptions = []
@@ -1500,24 +1747,21 @@ def speech_to_text_hindi_chirp3(audio_data, child_name=None):
     except Exception as e:
         total_time = (time.time() - stt_start_time) * 1000
         logger.error(f"❌ CHIRP 3 STT: Failed after {total_time:.1f}ms - {e}")
-        return None
+        raise
 
 
 def speech_to_text_hindi_google_v1(audio_data, child_name=None):
-    """V1 API implementation - Convert Hindi speech to text using Google Cloud Speech-to-Text"""
+    """V1 API implementation - Convert Hindi speech to text using Google Cloud Speech-to-Text.
+
+    Returns None for an empty transcript; raises on failure so stt_router falls back.
+    """
+    timeout = call_timeout(GOOGLE_STT_TIMEOUT_SECONDS)  # raises DeadlineExceeded for the router
     stt_start_time = time.time()
     logger.info(f"🎙️ GOOGLE CLOUD STT: Starting transcription with model={GOOGLE_STT_MODEL}...")
 
     try:
-        # Validate audio duration (same as other providers)
-        audio_duration = len(audio_data) / (48000 * 2)  # Assuming 16kHz, 16-bit
-        if audio_duration < 0.05 or audio_duration > 30:
-            logger.info("❌ GOOGLE CLOUD STT: Audio rejected due to invalid duration")
-            return None
-
         if not google_speech_client:
-            logger.error("❌ GOOGLE CLOUD STT: No API key configured")
-            return None
+            raise ProviderError("Google Cloud STT client not configured")
 
         # Apply audio optimizations
         preprocessing_start = time.time()
@@ -1547,16 +1791,7 @@ def speech_to_text_hindi_google_v1(audio_data, child_name=None):
 
         # Make API request with timing
         api_start_time = time.time()
-        try:
-            response = google_speech_client.recognize(config=config, audio=audio)
-        except Exception as api_error:
-            # If SDK fails (authentication, credentials, etc.), fallback to REST API
-            error_msg = str(api_error).lower()
-            if any(keyword in error_msg for keyword in ["authentication", "credentials", "permission", "forbidden"]):
-                logger.info("🔄 GOOGLE CLOUD STT: SDK authentication failed, trying REST API with API key...")
-                return speech_to_text_hindi_google_rest(optimized_audio, stt_start_time, child_name)
-            else:
-                raise api_error
+        response = google_speech_client.recognize(config=config, audio=audio, timeout=timeout)
 
         api_end_time = time.time()
         api_response_time = (api_end_time - api_start_time) * 1000
@@ -1589,13 +1824,22 @@ def speech_to_text_hindi_google_v1(audio_data, child_name=None):
         stt_end_time = time.time()
         total_latency = (stt_end_time - stt_start_time) * 1000
         logger.error(f"❌ GOOGLE CLOUD STT: Failed after {total_latency:.1f}ms - {str(e)}")
-        return None
+        raise
+
+def speech_to_text_hindi_google_rest(audio_data, child_name=None):
+    """Fallback REST API implementation for Google Cloud Speech-to-Text.
 
-def speech_to_text_hindi_google_rest(audio_data, stt_start_time, child_name=None):
-    """Fallback REST API implementation for Google Cloud Speech-to-Text"""
+    Returns None for an empty transcript; raises on failure so stt_router falls back.
+    """
+    timeout = call_timeout(GOOGLE_STT_TIMEOUT_SECONDS)  # raises DeadlineExceeded for the router
+    stt_start_time = time.time()
     try:
         logger.info(f"🌐 GOOGLE CLOUD STT: Using REST API with API key, model={GOOGLE_STT_MODEL}...")
 
+        if not GOOGLE_CLOUD_API_KEY:
+            raise ProviderError("GOOGLE_CLOUD_API_KEY not configured")
+        audio_data = optimize_audio_for_google_cloud(audio_data)
+
         # Encode audio as base64
         audio_base64 = base64.b64encode(audio_data).decode('utf-8')
 
@@ -1627,7 +1871,7 @@ def speech_to_text_hindi_google_rest(audio_data, stt_start_time, child_name=None
             "https://speech.googleapis.com/v1/speech:recognize",
             headers=headers,
             json=payload,
-            timeout=10
+            timeout=timeout
         )
 
         api_end_time = time.time()
@@ -1664,31 +1908,54 @@ def speech_to_text_hindi_google_rest(audio_data, stt_start_time, child_name=None
         stt_end_time = time.time()
         total_latency = (stt_end_time - stt_start_time) * 1000
         logger.error(f"❌ GOOGLE CLOUD STT REST: Failed after {total_latency:.1f}ms - {str(e)}")
-        return None
+        raise
+
+# Chirp 3, V1 and REST are routed by live latency / error rate (provider_router.py);
+# Chirp 3 is a quality tier above the others and is only used when GOOGLE_STT_MODEL asks for it
+stt_router = router('stt', min_quality=STT_ROUTING_MIN_QUALITY)
+stt_router.add('chirp_3', speech_to_text_hindi_chirp3, model='chirp_3', quality=1,
+               available=lambda: GOOGLE_STT_MODEL == 'chirp_3' and google_speech_client_v2 is not None)
+stt_router.add('v1', speech_to_text_hindi_google_v1, model='latest_long',
+               available=lambda: google_speech_client is not None)
+stt_router.add('rest', speech_to_text_hindi_google_rest, model=GOOGLE_STT_MODEL,
+               available=lambda: bool(GOOGLE_CLOUD_API_KEY))
+
 
 def speech_to_text_hindi_google(audio_data, child_name=None):
-    """Route to appropriate STT implementation based on model config"""
+    """Transcribe with the fastest healthy Google backend, falling through the others on failure.
 
-    # Try Chirp 3 (V2) if configured and available
-    if GOOGLE_STT_MODEL == 'chirp_3' and google_speech_client_v2:
-        result = speech_to_text_hindi_chirp3(audio_data, child_name)
-        if result:
-            return result
-        # Fallback to V1 on Chirp 3 failure
-        logger.info("🔄 Chirp 3 failed, falling back to V1 API...")
+    An empty transcript (silence) is a successful call and is returned as None without failover.
+    """
+    return stt_router.call(audio_data, child_name)
+
+
+class GoogleSTTProvider(STTProvider):
+    """Chirp 3 (V2), V1 and REST, picked per call by stt_router."""
+    model = GOOGLE_STT_MODEL
+
+    def transcribe(self, audio_data, child_name=None):
+        return speech_to_text_hindi_google(audio_data, child_name)
 
-    # V1 fallback (latest_long model)
-    return speech_to_text_hindi_google_v1(audio_data, child_name)
+
+providers.register('stt', 'google', GoogleSTTProvider, default=True)
+providers.configure('stt', STT_PROVIDER)
 
 
 def speech_to_text_hindi(audio_data, child_name=None):
     """Convert Hindi speech to text using the configured STT provider"""
-    if STT_PROVIDER.lower() == 'groq':
-        return speech_to_text_hindi_groq(audio_data)
-    elif STT_PROVIDER.lower() == 'google':
-        return speech_to_text_hindi_google(audio_data, child_name)
-    else:
-        return speech_to_text_hindi_sarvam(audio_data)
+    provider = providers.get('stt')
+    with span('stt', provider=provider.name, bytes=len(audio_data)) as stt_span:
+        # Empty / noise-only clips are treated as no speech without a vendor round trip
+        with span('vad'):
+            has_speech = audio_has_speech(audio_data)
+        if not has_speech:
+            stt_span.set_attribute('no_speech', True)
+            return None
+
+        with STT_LATENCY.time(provider=provider.name, model=provider.model):
+            transcript = provider.transcribe(audio_data, child_name=child_name)
+        stt_span.set_attribute('empty', not transcript)
+        return transcript
 
 
 def is_correction_safe(raw, corrected, confidence):
@@ -1998,11 +2265,7 @@ def completion_celebration():
         # For educator topics, suggest other topics from the same educator
         edu_topic = get_educator_topic(completed_topic)
         if edu_topic:
-            sibling_topics = EducatorTopic.query.filter(
-                EducatorTopic.educator_id == edu_topic.educator_id,
-                EducatorTopic.is_active == True,
-                EducatorTopic.id != edu_topic.id
-            ).order_by(EducatorTopic.display_order).limit(3).all()
+            sibling_topics = topic_cache.siblings(edu_topic, limit=3)
             for t in sibling_topics:
                 related_topics.append({
                     'id': t.full_key,
@@ -2070,25 +2333,68 @@ def serve_js():
     )
 
 @app.route('/api/speak', methods=['POST'])
+@admission_control('speak')
 def speak_text():
     try:
         text = request.form.get('text')
         if not text:
             return jsonify({'error': 'No text provided'}), 400
             
-        # Use the existing TTS function
-        audio_response = text_to_speech_hindi(text)
+        audio_bytes = speech_audio(text)
         
-        if not audio_response:
+        if not audio_bytes:
             return jsonify({'error': 'Text-to-speech failed'}), 500
             
-        return jsonify({'audio': audio_response})
+        return jsonify(audio_payload(audio_bytes, negotiate_delivery(request.form.get('audio_delivery'))))
         
     except Exception as e:
         print(f"Speak Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/speak/stream', methods=['POST'])
+@admission_control('reply_audio')
+def speak_text_stream():
+    """Stream a tutor line's audio as the TTS provider produces it (chunked transfer).
+
+    The client feeds the chunks to MediaSource so playback starts with the first one.
+    """
+    text = request.form.get('text')
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    content_type = providers.get('tts').content_type
+
+    chunks = stream_speech(text)
+    try:
+        first_chunk = next(chunks, None)
+    except Exception as e:
+        logger.error(f"Speak stream error: {e}")
+        first_chunk = None
+    if first_chunk is None:
+        return jsonify({'error': 'Text-to-speech failed'}), 500
+    return Response(itertools.chain([first_chunk], chunks), mimetype=content_type,
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/audio/<audio_id>')
+def get_audio(audio_id):
+    """Raw synthesized audio by id, with Range support so the <audio> element can seek / stream."""
+    audio_bytes, content_type = load_audio(audio_id)
+    if audio_bytes is None:
+        return jsonify({'error': 'Audio not found or expired'}), 404
+    response = Response(audio_bytes, mimetype=content_type)
+    response.set_etag(audio_id)
+    response.headers['Cache-Control'] = f'private, max-age={AUDIO_URL_TTL_SECONDS}, immutable'
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(audio_bytes))
+
+def translate_with_llm(text):
+    """English translation of a tutor line from the LLM (the uncached path behind translation.translate)."""
+    system_prompt = f"""You are a translator. Translate the given text to English. Provide only the translation, no additional text.
+
+Text to translate: {text}"""
+    return gemini_generate_content(system_prompt, conversation_history=None, response_format="text").strip()
+
+
 @app.route('/api/translate', methods=['POST'])
+@admission_control('translate')
 def translate_text():
     try:
         data = request.json
@@ -2097,17 +2403,8 @@ def translate_text():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
 
-        # Use Gemini for translation
-        system_prompt = f"""You are a translator. Translate the given text to English. Provide only the translation, no additional text.
-
-Text to translate: {text}"""
-
-        # Use Gemini streaming for translation (faster response)
-        translation_chunks = []
-        for chunk in gemini_stream_content(system_prompt, conversation_history=None):
-            translation_chunks.append(chunk)
-
-        translation = ''.join(translation_chunks).strip()
+        # Served from the glossary or translation cache when possible (replies are prefetched)
+        translation = translate(text)
         return jsonify({'translation': translation})
 
     except Exception as e:
@@ -2130,6 +2427,9 @@ def api_transliterate_name():
 # process_audio() is only a fallback to process_audio_stream()
 @app.route('/api/process_audio', methods=['POST'])
 @login_required
+@admission_control('turn')
+@trace_request('turn')
+@profile_request('turn')
 def process_audio():
     request_start_time = time.time()
     logger.info("🚀 PROCESS AUDIO: Request started")
@@ -2150,6 +2450,7 @@ def process_audio():
             return jsonify({'error': 'No session ID provided'}), 400
         
         
+        wait_for_turns(session_id=session_id)
         session_data = session_store.load_session(session_id)
         if not session_data:
             logger.error(f"Invalid session ID: {session_id}")
@@ -2162,6 +2463,12 @@ def process_audio():
         session_data['sentences_count'] += 1
         logger.info(f"Updated sentence count: {session_data['sentences_count']}")
         session_store.save_session(session_id, session_data)
+        current_span().set_attributes(
+            session=session_id[:8],
+            conversation_id=session_data.get('conversation_id'),
+            conversation_type=session_data.get('conversation_type', 'everyday'),
+            turn_index=session_data['sentences_count'],
+        )
 
         # Extract child info for speech context
         child_name = session_data.get('child_name', 'दोस्त')
@@ -2176,6 +2483,7 @@ def process_audio():
 
             with open(temp_file.name, 'rb') as f:
                 audio_bytes = f.read()
+                verify_client_trim(audio_bytes, request.form)
                 raw_transcript = speech_to_text_hindi(audio_bytes, child_name=child_name)
 
         file_end_time = time.time()
@@ -2184,11 +2492,12 @@ def process_audio():
         if not raw_transcript:
             return jsonify({'error': 'no_speech', 'message': "Sorry, we couldn't hear you. Please try recording again."}), 200
 
-        # Submit background S3 upload for kid's audio
+        # Queue durable S3 upload for kid's audio; the pending row is saved with the turn
+        pending_audio = None
         if ENABLE_AUDIO_STORAGE and 'conversation_id' in session_data:
             turn_index = len(conversation_history)
-            upload_audio_async(
-                app, audio_bytes,
+            pending_audio = queue_audio_upload(
+                audio_bytes,
                 user_id=current_user.id,
                 conversation_id=session_data['conversation_id'],
                 turn_index=turn_index,
@@ -2240,12 +2549,13 @@ def process_audio():
         # Step 4: Convert response to speech
         tts_start_time = time.time()
         logger.info("🔊 TTS: Starting text-to-speech...")
-        audio_response = text_to_speech_hindi(controller_result['response'])
+        audio_response = speech_audio(controller_result['response'])
         tts_end_time = time.time()
         logger.info(f"✅ TTS: Complete in {(tts_end_time - tts_start_time) * 1000:.1f}ms")
         
         if not audio_response:
             return jsonify({'error': 'Text-to-speech failed'}), 500
+        prefetch_translation(controller_result['response'])
         
         # Update conversation history
         session_data['conversation_history'].extend([
@@ -2256,15 +2566,19 @@ def process_audio():
         # Update database conversation record
         if 'conversation_id' in session_data:
             try:
-                conversation = Conversation.query.get(session_data['conversation_id'])
-                if conversation:
-                    conversation.sentences_count = session_data['sentences_count']
-                    conversation.good_response_count = controller_result['good_response_count']
-                    conversation.reward_points = session_data['reward_points'] - session_data.get('base_reward_points', 0)
-                    conversation.conversation_data = session_data['conversation_history']
-                    conversation.amber_data = session_data.get('amber_responses', [])
-                    conversation.updated_at = datetime.utcnow()
-                    db.session.commit()
+                with span('db.commit'):
+                    conversation = Conversation.query.get(session_data['conversation_id'])
+                    if conversation:
+                        conversation.sentences_count = session_data['sentences_count']
+                        conversation.good_response_count = controller_result['good_response_count']
+                        conversation.reward_points = session_data['reward_points'] - session_data.get('base_reward_points', 0)
+                        conversation.conversation_data = session_data['conversation_history']
+                        conversation.amber_data = session_data.get('amber_responses', [])
+                        conversation.updated_at = datetime.utcnow()
+                        if pending_audio is not None:
+                            db.session.add(pending_audio)
+                        with DB_COMMIT_LATENCY.time(operation='turn'):
+                            db.session.commit()
             except Exception as e:
                 logger.error(f"Failed to update conversation in database: {e}")
 
@@ -2283,7 +2597,7 @@ def process_audio():
         
         response_data = {
             'text': controller_result['response'],
-            'audio': audio_response,
+            **audio_payload(audio_response, negotiate_delivery(request.form.get('audio_delivery'))),
             'transcript': transcript,
             'evaluation': controller_result['evaluation'],
             'sentence_count': session_data['sentences_count'],
@@ -2309,6 +2623,9 @@ def process_audio():
 
 @app.route('/api/process_audio_stream', methods=['POST'])
 @login_required
+@admission_control('turn')
+@trace_request('turn')
+@profile_request('turn')
 def process_audio_stream():
     """Enhanced process_audio with streaming text response for typewriter effect"""
     request_start_time = time.time()
@@ -2322,9 +2639,11 @@ def process_audio_stream():
             return jsonify({'error': 'No audio file'}), 400
 
         session_id = request.form.get('session_id')
+        stream_protocol = negotiate_protocol(request.form.get('stream_protocol'))
         if not session_id:
             return jsonify({'error': 'No session ID provided'}), 400
 
+        wait_for_turns(session_id=session_id)
         session_data = session_store.load_session(session_id)
         if not session_data:
             logger.error(f"Invalid session ID: {session_id}")
@@ -2334,6 +2653,12 @@ def process_audio_stream():
         session_data['sentences_count'] += 1
         current_count = session_data['sentences_count']
         session_store.save_session(session_id, session_data)
+        current_span().set_attributes(
+            session=session_id[:8],
+            conversation_id=session_data.get('conversation_id'),
+            conversation_type=session_data.get('conversation_type', 'everyday'),
+            turn_index=current_count,
+        )
 
         # Get conversation context (extract early for STT)
         conversation_type = session_data.get('conversation_type', 'everyday')
@@ -2348,16 +2673,21 @@ def process_audio_stream():
             audio_file.save(temp_file.name)
             with open(temp_file.name, 'rb') as f:
                 audio_bytes = f.read()
+                verify_client_trim(audio_bytes, request.form)
+                # STT has no degraded result (a miss would tell the child we couldn't hear them),
+                # so it gets only its vendor timeout and circuits; the turn budget starts after it
                 raw_transcript = speech_to_text_hindi(audio_bytes, child_name=child_name)
+        turn_deadline = Deadline(TURN_DEADLINE_SECONDS)
 
         if not raw_transcript:
             return jsonify({'error': 'no_speech', 'message': "Sorry, we couldn't hear you. Please try recording again."}), 200
 
-        # Submit background S3 upload for kid's audio
+        # Queue durable S3 upload for kid's audio; the pending row is saved with the turn
+        pending_audio = None
         if ENABLE_AUDIO_STORAGE and 'conversation_id' in session_data:
             turn_index = len(conversation_history)
-            upload_audio_async(
-                app, audio_bytes,
+            pending_audio = queue_audio_upload(
+                audio_bytes,
                 user_id=current_user.id,
                 conversation_id=session_data['conversation_id'],
                 turn_index=turn_index,
@@ -2395,14 +2725,14 @@ def process_audio_stream():
         controller = ConversationController()
         eval_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
         eval_future = eval_executor.submit(
-            controller.evaluator.evaluate_response,
+            wrap(turn_deadline.bind(controller.evaluator.evaluate_response)),
             transcript,
             last_talker_response,
             conversation_type
         )
-        transcript_translit_future = eval_executor.submit(transliterate_to_roman, transcript)
+        transcript_translit_future = eval_executor.submit(wrap(turn_deadline.bind(transliterate_to_roman)), transcript)
 
-        # Pre-resolve system prompt base (DB queries need request context, generator won't have it)
+        # Pre-resolve system prompt base (served from the topic cache, compiled once per version)
         if conversation_type.startswith('edu_'):
             edu_topic = get_educator_topic(conversation_type)
             if edu_topic:
@@ -2417,20 +2747,23 @@ def process_audio_stream():
         # Streaming response generator
         def generate_streaming_response():
             nonlocal should_end
+            stream = EventStream(stream_protocol)
 
             try:
-                # Wait for transcript transliteration (~200ms, eval runs in parallel ~1-2s)
-                transcript_roman = transcript_translit_future.result(timeout=5)
+                # Wait for transcript transliteration (~200ms, eval runs in parallel ~1-2s);
+                # past the turn deadline the transcript goes out without roman text
+                transcript_roman = turn_deadline.result(transcript_translit_future, '', 'transcript_transliteration')
 
                 # Send transcript with roman version so client can show user message
-                yield f"data: {json.dumps({'type': 'transcript', 'transcript': transcript, 'transcript_roman': transcript_roman})}\n\n"
+                yield stream.event({'type': 'transcript', 'transcript': transcript, 'transcript_roman': transcript_roman})
 
-                # Wait for evaluation result (may already be done by now)
-                evaluation = eval_future.result()
+                # Wait for evaluation result (may already be done by now), defaulting to green at the deadline
+                evaluation = turn_deadline.result(eval_future, controller.evaluator.default_evaluation(transcript),
+                                                  'evaluation')
                 eval_executor.shutdown(wait=False)
 
                 # Send evaluation as separate event
-                yield f"data: {json.dumps({'type': 'evaluation', 'evaluation': evaluation})}\n\n"
+                yield stream.event({'type': 'evaluation', 'evaluation': evaluation})
 
                 # Prepare recast context from evaluation (only recast for amber feedback)
                 recast_context = {
@@ -2463,35 +2796,24 @@ def process_audio_stream():
                     conversation_history=gemini_history
                 )
 
-                # Word buffering for smooth display
-                word_buffer = ""
-                accumulated_text = ""
-                word_count = 0
+                # Reply text is coalesced into one event per SSE_COALESCE_MS window
                 first_words_sent = False
 
                 for chunk_text in response_stream:
                     # Gemini streams text directly, not delta objects
-                    content = chunk_text
-                    word_buffer += content
-                    accumulated_text += content
-
-                    # Send buffered words (2-3 words or on punctuation)
-                    if (' ' in word_buffer and word_count >= 2) or any(p in word_buffer for p in '.!?,।'):
-                        words_to_send = word_buffer.strip()
-                        if words_to_send:
-                            if not first_words_sent:
-                                first_words_time = time.time()
-                                logger.info(f"📝 FIRST WORDS: {(first_words_time - request_start_time) * 1000:.1f}ms")
-                                first_words_sent = True
-                            yield f"data: {json.dumps({'type': 'words', 'content': words_to_send, 'accumulated': accumulated_text})}\n\n"
-                        word_buffer = ""
-                        word_count = 0
-                    elif ' ' in word_buffer:
-                        word_count += 1
+                    words_event = stream.add_text(chunk_text)
+                    if words_event:
+                        if not first_words_sent:
+                            first_words_time = time.time()
+                            logger.info(f"📝 FIRST WORDS: {(first_words_time - request_start_time) * 1000:.1f}ms")
+                            first_words_sent = True
+                        yield words_event
 
                 # Send remaining buffer
-                if word_buffer.strip():
-                    yield f"data: {json.dumps({'type': 'words', 'content': word_buffer.strip(), 'accumulated': accumulated_text})}\n\n"
+                words_event = stream.flush_text()
+                if words_event:
+                    yield words_event
+                accumulated_text = stream.text
 
                 # Track good responses
                 if evaluation['feedback_type'] == 'green':
@@ -2550,35 +2872,42 @@ def process_audio_stream():
                     logger.info(f"🎉 Conversation ending - added function_call to redirect to completion_celebration")
 
                 logger.info(f"📤 Sending completion data: should_end={should_end}, sentence_count={current_count}, is_milestone={is_milestone}")
-                yield f"data: {json.dumps(completion_data)}\n\n"
+                yield stream.complete(completion_data)
+                prefetch_translation(accumulated_text)
 
                 # Fire response + amber transliteration immediately (~200ms)
-                # Send BEFORE hints so the frontend swaps text while TTS is still playing
+                # Send BEFORE hints so the frontend swaps text while TTS is still playing.
+                # Roman text and hints share a follow-up deadline; what misses it is skipped
+                followup_deadline = Deadline(FOLLOWUP_DEADLINE_SECONDS)
                 translit_executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
-                response_translit_future = translit_executor.submit(transliterate_to_roman, accumulated_text)
+                bound_transliterate = wrap(followup_deadline.bind(transliterate_to_roman))
+                response_translit_future = translit_executor.submit(bound_transliterate, accumulated_text)
 
                 # Collect amber correction texts for batch transliteration
                 amber_for_popup = completion_data.get('amber_responses', [])
                 amber_translit_futures = {}
                 for idx, amber in enumerate(amber_for_popup):
                     amber_translit_futures[f'user_{idx}'] = translit_executor.submit(
-                        transliterate_to_roman, amber.get('user_response', ''))
+                        bound_transliterate, amber.get('user_response', ''))
                     amber_translit_futures[f'corrected_{idx}'] = translit_executor.submit(
-                        transliterate_to_roman, amber.get('corrected_response', ''))
+                        bound_transliterate, amber.get('corrected_response', ''))
 
                 # Wait for response+amber transliteration (~200ms) and send immediately
                 translit_data = {'type': 'transliteration'}
-                translit_data['final_text_roman'] = response_translit_future.result(timeout=5)
+                translit_data['final_text_roman'] = followup_deadline.result(response_translit_future, '',
+                                                                             'response_transliteration')
 
                 if amber_for_popup:
                     translit_data['amber_responses_roman'] = []
                     for idx in range(len(amber_for_popup)):
                         translit_data['amber_responses_roman'].append({
-                            'user_response_roman': amber_translit_futures[f'user_{idx}'].result(timeout=5),
-                            'corrected_response_roman': amber_translit_futures[f'corrected_{idx}'].result(timeout=5)
+                            'user_response_roman': followup_deadline.result(
+                                amber_translit_futures[f'user_{idx}'], '', 'amber_transliteration'),
+                            'corrected_response_roman': followup_deadline.result(
+                                amber_translit_futures[f'corrected_{idx}'], '', 'amber_transliteration')
                         })
 
-                yield f"data: {json.dumps(translit_data)}\n\n"
+                yield stream.event(translit_data)
 
                 # Generate hints AFTER transliteration is sent (non-blocking for TTS)
                 hints = []
@@ -2587,14 +2916,16 @@ def process_audio_stream():
                         {"role": "user", "content": transcript},
                         {"role": "assistant", "content": accumulated_text}
                     ]
-                    hints = generate_hints(temp_history, conversation_type, child_name, child_age) or []
+                    with span('hints'), followup_deadline.scope():
+                        hints = generate_hints(temp_history, conversation_type, child_name, child_age) or []
                     if hints:
-                        yield f"data: {json.dumps({'type': 'hints', 'hints': hints})}\n\n"
+                        yield stream.event({'type': 'hints', 'hints': hints})
                         # Transliterate hints and send as separate event
                         hints_joined = ' या '.join(hints)
-                        hints_roman = transliterate_to_roman(hints_joined)
+                        with followup_deadline.scope():
+                            hints_roman = transliterate_to_roman(hints_joined)
                         if hints_roman:
-                            yield f"data: {json.dumps({'type': 'hints_transliteration', 'hints_roman': hints_roman})}\n\n"
+                            yield stream.event({'type': 'hints_transliteration', 'hints_roman': hints_roman})
 
                 translit_executor.shutdown(wait=False)
 
@@ -2604,42 +2935,40 @@ def process_audio_stream():
                     {"role": "assistant", "content": accumulated_text}
                 ])
 
-                # Update database
-                if 'conversation_id' in session_data:
-                    try:
-                        with app.app_context():
-                            conversation = Conversation.query.get(session_data['conversation_id'])
-                            if conversation:
-                                conversation.sentences_count = current_count
-                                conversation.good_response_count = session_data.get('good_response_count', 0)
-                                conversation.reward_points = session_data.get('reward_points', 0) - session_data.get('base_reward_points', 0)
-                                conversation.conversation_data = session_data['conversation_history']
-                                conversation.amber_data = session_data.get('amber_responses', [])
-                                conversation.updated_at = datetime.utcnow()
-                                db.session.commit()
-                    except Exception as e:
-                        logger.error(f"Failed to update conversation in database: {e}")
-
-                session_store.save_session(session_id, session_data)
+                # Journal the turn; the committer writes the DB row and session off the stream
+                with span('turn.submit'):
+                    submit_turn(session_id, session_data, current_count, pending_audio)
 
             except Exception as e:
+                current_span().record_error(e)
                 sentry_sdk.capture_exception(e)
                 logger.error(f"Streaming error: {str(e)}")
-                yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+                yield stream.event({'type': 'error', 'message': str(e)})
             finally:
+                current_span().set_attributes(sse_protocol=stream.protocol, sse_events=stream.events_sent,
+                                              sse_bytes=stream.bytes_sent)
                 if temp_file:
                     try:
                         os.unlink(temp_file.name)
                     except Exception as e:
                         logger.error(f"Failed to delete temporary file: {e}")
 
+            # Protocol 2 clients resume until they see this, so a cut connection isn't mistaken for the end
+            if stream.protocol >= 2:
+                yield stream.event({'type': 'end'})
+
+        # The turn runs to completion (and is persisted) even if the client drops;
+        # a reconnect replays the missed events from /api/process_audio_stream/<stream_id>
+        turn_stream = start_turn_stream(generate_streaming_response(), current_user.id)
         return Response(
-            generate_streaming_response(),
+            follow_for_client(turn_stream, 0, 'process_audio_stream'),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
                 'Connection': 'keep-alive',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                'X-Stream-Protocol': str(stream_protocol),
+                'X-Stream-Id': turn_stream.stream_id
             }
         )
 
@@ -2648,6 +2977,27 @@ def process_audio_stream():
         logger.exception("Full traceback:")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/process_audio_stream/<stream_id>', methods=['GET'])
+@login_required
+def resume_audio_stream(stream_id):
+    """Replay a turn's SSE events after Last-Event-ID, then follow it until it finishes"""
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    reader = open_turn_stream(stream_id, current_user.id)
+    if reader is None:
+        return jsonify({'error': 'stream_not_found'}), 404
+
+    logger.info(f"🔁 SSE RESUME: stream {stream_id[:8]} after event {last_event_id}")
+    return Response(
+        follow_for_client(reader, last_event_id, 'process_audio_stream_resume'),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Stream-Id': stream_id
+        }
+    )
+
 @app.route('/api/clear_amber_responses', methods=['POST'])
 def clear_amber_responses():
     """Clear amber responses from session after correction popup"""
@@ -2658,6 +3008,7 @@ def clear_amber_responses():
         if not session_id:
             return jsonify({'error': 'No session ID provided'}), 400
         
+        wait_for_turns(session_id=session_id)
         session_data = session_store.load_session(session_id)
         if not session_data:
             return jsonify({'error': 'Invalid session'}), 400
@@ -2683,6 +3034,7 @@ def get_hints():
         if not session_id:
             return jsonify({'error': 'No session ID provided'}), 400
         
+        wait_for_turns(session_id=session_id)
         session_data = session_store.load_session(session_id)
         if not session_data:
             return jsonify({'error': 'Invalid session'}), 400
@@ -2785,87 +3137,152 @@ def get_dashboard_comparison():
         logger.error(f"Dashboard comparison API error: {e}")
         return jsonify({'error': 'Failed to fetch comparison data'}), 500
 
+# Display metadata for built-in conversation types in the history sidebar
+CONVERSATION_TYPE_DISPLAY = {
+    'things_i_love': {'name': 'Things I Love', 'icon': '🤩'},
+    'how_im_feeling': {'name': 'How I Feel', 'icon': '😄'},
+    'my_day': {'name': 'My Day', 'icon': '🫡'},
+    'what_i_can_do': {'name': 'What I can Do', 'icon': '⛹🏻'},
+    'family_members': {'name': 'Family Members', 'icon': '👨‍👩‍👧‍👦'},
+    'talking_to_grandparents': {'name': 'Talking to Grandparents', 'icon': '👵'},
+    'talking_to_chacha_mausi': {'name': 'Talking to Uncles/Aunts', 'icon': '👴'},
+    'family_gathering': {'name': 'At a family gathering', 'icon': '👩‍👦‍👦'},
+    'what_i_like_to_eat': {'name': 'What I like to eat', 'icon': '🥘'},
+    'at_the_dinner_table': {'name': 'At the dinner table', 'icon': '🍽️'},
+    'at_dadi_house': {'name': "Food at Grandparents'", 'icon': '👨‍🍳'},
+    'festival_foods': {'name': 'Festival Foods', 'icon': '🍬'},
+    'diwali': {'name': 'Diwali', 'icon': '🪔'},
+    'holi': {'name': 'Holi', 'icon': '🎨'},
+    'raksha_bandhan': {'name': 'Raksha Bandhan', 'icon': '🏵️'},
+    'indian_birthdays': {'name': 'Indian Birthdays', 'icon': '🎂'},
+    'animals_i_like': {'name': 'Animals I Like', 'icon': '🦁'},
+    'indian_animals': {'name': 'Indian Animals', 'icon': '🦚'},
+    'weather_today': {'name': 'Weather today', 'icon': '🌧️'},
+    'my_favorite_place': {'name': 'My favorite place', 'icon': '🎡'},
+    'panchatantra_monkey_crocodile': {'name': 'Panchatantra: Monkey & Crocodile', 'icon': '🐵'},
+    'panchatantra_lion_rabbit': {'name': 'Panchatantra: Lion & Rabbit', 'icon': '🦁'},
+    'lets_make_a_story': {'name': 'Create your own Story!', 'icon': '🦸'},
+    'my_favorite_story': {'name': 'My Favorite Story', 'icon': '📖'}
+}
+DEFAULT_CONVERSATION_DISPLAY = {'name': 'Conversation', 'icon': '💬'}
+
+CONVERSATION_HISTORY_DAYS = 15
+CONVERSATION_HISTORY_PAGE_SIZE = 20
+CONVERSATION_HISTORY_MAX_PAGE_SIZE = 100
+
+
+def encode_history_cursor(created_at, conversation_id):
+    """Opaque keyset cursor for (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_history_cursor(cursor):
+    """Inverse of encode_history_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, conversation_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(conversation_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def get_conversation_display(conversation_type):
+    """Name and icon for a conversation type (built-in or educator topic)"""
+    if conversation_type.startswith('edu_'):
+        edu_t = get_educator_topic(conversation_type)
+        if edu_t:
+            return {'name': edu_t.name, 'icon': edu_t.icon}
+    return CONVERSATION_TYPE_DISPLAY.get(conversation_type, DEFAULT_CONVERSATION_DISPLAY)
+
+
 @app.route('/api/conversation-history', methods=['GET'])
 @login_required
 def get_conversation_history():
-    """API endpoint to fetch conversation history for last 15 days"""
+    """API endpoint to fetch conversation history for last 15 days, newest first.
+
+    Keyset-paginated: pass `before=<next_cursor>` for older pages or
+    `after=<prev_cursor>` for anything newer, with an optional `limit`.
+    Only summary columns are selected - transcripts are never loaded.
+    """
     try:
+        limit = request.args.get('limit', CONVERSATION_HISTORY_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, CONVERSATION_HISTORY_MAX_PAGE_SIZE))
+        before = request.args.get('before')
+        after = request.args.get('after')
+
+        try:
+            before_key = decode_history_cursor(before) if before else None
+            after_key = decode_history_cursor(after) if after else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
         # Calculate date 15 days ago
-        fifteen_days_ago = datetime.now() - timedelta(days=15)
-        
-        # Query conversations from last 15 days for current user
-        conversations = Conversation.query.filter(
+        fifteen_days_ago = datetime.now() - timedelta(days=CONVERSATION_HISTORY_DAYS)
+
+        query = db.session.query(
+            Conversation.id,
+            Conversation.conversation_type,
+            Conversation.created_at,
+            Conversation.last_user_preview,
+            Conversation.sentences_count,
+            Conversation.reward_points
+        ).filter(
             Conversation.user_id == current_user.id,
             Conversation.created_at >= fifteen_days_ago
-        ).order_by(Conversation.created_at.desc()).all()
-        
-        # Format conversation data for frontend
-        conversation_list = []
-        for conv in conversations:
-            # Get last message preview from conversation history
-            last_message = ""
-            if conv.conversation_history:
-                try:
-                    history = json.loads(conv.conversation_history)
-                    if history and len(history) > 0:
-                        # Get the last user message
-                        for msg in reversed(history):
-                            if msg.get('role') == 'user':
-                                last_message = msg.get('content', '')[:50] + "..." if len(msg.get('content', '')) > 50 else msg.get('content', '')
-                                break
-                except:
-                    last_message = "Conversation started"
-            
-            # Map conversation type to display info
-            type_info = {
-                'things_i_love': {'name': 'Things I Love', 'icon': '🤩'},
-                'how_im_feeling': {'name': 'How I Feel', 'icon': '😄'},
-                'my_day': {'name': 'My Day', 'icon': '🫡'},
-                'what_i_can_do': {'name': 'What I can Do', 'icon': '⛹🏻'},
-                'family_members': {'name': 'Family Members', 'icon': '👨‍👩‍👧‍👦'},
-                'talking_to_grandparents': {'name': 'Talking to Grandparents', 'icon': '👵'},
-                'talking_to_chacha_mausi': {'name': 'Talking to Uncles/Aunts', 'icon': '👴'},
-                'family_gathering': {'name': 'At a family gathering', 'icon': '👩‍👦‍👦'},
-                'what_i_like_to_eat': {'name': 'What I like to eat', 'icon': '🥘'},
-                'at_the_dinner_table': {'name': 'At the dinner table', 'icon': '🍽️'},
-                'at_dadi_house': {'name': "Food at Grandparents'", 'icon': '👨‍🍳'},
-                'festival_foods': {'name': 'Festival Foods', 'icon': '🍬'},
-                'diwali': {'name': 'Diwali', 'icon': '🪔'},
-                'holi': {'name': 'Holi', 'icon': '🎨'},
-                'raksha_bandhan': {'name': 'Raksha Bandhan', 'icon': '🏵️'},
-                'indian_birthdays': {'name': 'Indian Birthdays', 'icon': '🎂'},
-                'animals_i_like': {'name': 'Animals I Like', 'icon': '🦁'},
-                'indian_animals': {'name': 'Indian Animals', 'icon': '🦚'},
-                'weather_today': {'name': 'Weather today', 'icon': '🌧️'},
-                'my_favorite_place': {'name': 'My favorite place', 'icon': '🎡'},
-                'panchatantra_monkey_crocodile': {'name': 'Panchatantra: Monkey & Crocodile', 'icon': '🐵'},
-                'panchatantra_lion_rabbit': {'name': 'Panchatantra: Lion & Rabbit', 'icon': '🦁'},
-                'lets_make_a_story': {'name': 'Create your own Story!', 'icon': '🦸'},
-                'my_favorite_story': {'name': 'My Favorite Story', 'icon': '📖'}
-            }
-            
-            conv_type = type_info.get(conv.conversation_type, {'name': 'Conversation', 'icon': '💬'})
+        )
 
-            # Look up educator topic info for edu_ types
-            if conv.conversation_type.startswith('edu_'):
-                edu_t = get_educator_topic(conv.conversation_type)
-                if edu_t:
-                    conv_type = {'name': edu_t.name, 'icon': edu_t.icon}
+        if before_key:
+            cursor_at, cursor_id = before_key
+            query = query.filter(db.or_(
+                Conversation.created_at < cursor_at,
+                db.and_(Conversation.created_at == cursor_at, Conversation.id < cursor_id)
+            ))
+        if after_key:
+            cursor_at, cursor_id = after_key
+            query = query.filter(db.or_(
+                Conversation.created_at > cursor_at,
+                db.and_(Conversation.created_at == cursor_at, Conversation.id > cursor_id)
+            ))
+
+        # Walking forward from an `after` cursor reads ascending, then flips to newest-first
+        if after_key and not before_key:
+            rows = query.order_by(Conversation.created_at.asc(), Conversation.id.asc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = list(reversed(rows[:limit]))
+        else:
+            rows = query.order_by(Conversation.created_at.desc(), Conversation.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
 
+        # Format conversation data for frontend
+        conversation_list = []
+        for conv in rows:
+            conv_type = get_conversation_display(conv.conversation_type)
             conversation_list.append({
                 'id': conv.id,
                 'conversation_type': conv.conversation_type,
                 'type_name': conv_type['name'],
                 'type_icon': conv_type['icon'],
                 'created_at': conv.created_at.isoformat(),
-                'last_message_preview': last_message or "New conversation",
+                'last_message_preview': conv.last_user_preview or "New conversation",
                 'sentence_count': conv.sentences_count or 0,
                 'reward_points': conv.reward_points or 0
             })
+
+        next_cursor = None
+        prev_cursor = None
+        if rows:
+            if has_more or after_key:
+                next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id)
+            prev_cursor = encode_history_cursor(rows[0].created_at, rows[0].id)
         
         return jsonify({
             'success': True,
-            'conversations': conversation_list
+            'conversations': conversation_list,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
         })
         
     except Exception as e:
@@ -2890,10 +3307,13 @@ def get_conversation_audio(conversation_id):
             ConversationAudio.upload_status == 'uploaded',
         ).order_by(ConversationAudio.turn_index).all()
 
+        # Sign all turns in one batch (cached URLs are reused across page views)
+        playback_urls = generate_presigned_urls([rec.s3_key for rec in audio_records])
+
         results = []
         for rec in audio_records:
             entry = rec.to_dict()
-            entry['playback_url'] = generate_presigned_url(rec.s3_key)
+            entry['playback_url'] = playback_urls[rec.s3_key]
             results.append(entry)
 
         return jsonify({'success': True, 'audio': results})
@@ -2964,7 +3384,7 @@ Return ONLY a JSON object: {{"best_turn": <number>, "reason": "<brief reason in
                 result = gemini_generate_content(
                     prompt,
                     response_format="json",
-                    model_override=gemini_hints_model
+                    model_tier="hints"
                 )
                 parsed = json.loads(result)
                 best_index = int(parsed.get('best_turn', 1)) - 1  # Convert 1-based to 0-based
@@ -3013,6 +3433,8 @@ def resume_conversation():
         
         if not conversation_id:
             return jsonify({'error': 'Conversation ID is required'}), 400
+
+        wait_for_turns(conversation_id=conversation_id)
         
         # Find the conversation and verify ownership
         conversation = Conversation.query.filter(
@@ -3077,6 +3499,8 @@ def track_analytics():
         
         if not action or not page:
             return jsonify({'error': 'Missing required fields: action, page'}), 400
+        if not isinstance(action, str) or not isinstance(page, str):
+            return jsonify({'error': 'action and page must be strings'}), 400
         
         track_user_action(action, page, metadata)
         
@@ -3163,6 +3587,81 @@ def admin_all_users():
         logger.error(f"Error getting all users: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/admin/traces')
+def admin_traces():
+    """Recent turn traces from this worker (newest first)"""
+    auth = request.authorization
+    if not auth or auth.username != 'admin' or auth.password != os.getenv('ADMIN_PASSWORD', 'admin123'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    name = request.args.get('name')
+    traces = [t for t in recent_traces(limit) if not name or t['name'] == name]
+    return jsonify({
+        'worker_pid': os.getpid(),
+        'traces': [{
+            'trace_id': t['trace_id'],
+            'name': t['name'],
+            'start': t['start'],
+            'duration_ms': t['duration_ms'],
+            'attributes': t['attributes'],
+            'summary': format_summary(t),
+        } for t in traces]
+    })
+
+@app.route('/api/admin/traces/<trace_id>')
+def admin_trace_detail(trace_id):
+    """All spans of one trace with start offsets, for a waterfall view"""
+    auth = request.authorization
+    if not auth or auth.username != 'admin' or auth.password != os.getenv('ADMIN_PASSWORD', 'admin123'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    trace = find_trace(trace_id)
+    if not trace:
+        return jsonify({'error': 'Trace not found on this worker'}), 404
+    return jsonify(trace)
+
+@app.route('/api/admin/routing')
+def admin_routing():
+    """Per-backend latency / error telemetry, circuit state and recent routing decisions,
+    plus this worker's per-vendor circuits (Gemini, Sarvam)"""
+    auth = request.authorization
+    if not auth or auth.username != 'admin' or auth.password != os.getenv('ADMIN_PASSWORD', 'admin123'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    status = routing_status(limit)
+    status['vendor_circuits'] = vendor_circuits()
+    return jsonify(status)
+
+@app.route('/api/admin/profiles')
+def admin_profiles():
+    """Recent sampled turn profiles (newest first)"""
+    auth = request.authorization
+    if not auth or auth.username != 'admin' or auth.password != os.getenv('ADMIN_PASSWORD', 'admin123'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    return jsonify({'profiles': recent_profiles(limit)})
+
+@app.route('/api/admin/profiles/<profile_id>')
+def admin_profile_download(profile_id):
+    """Collapsed stacks of one profile, ready for flamegraph.pl or speedscope"""
+    auth = request.authorization
+    if not auth or auth.username != 'admin' or auth.password != os.getenv('ADMIN_PASSWORD', 'admin123'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    profile = find_profile(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(profile)
+    return Response(
+        profile['collapsed'],
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.folded'}
+    )
+
 def authenticate():
     """Send a 401 response with WWW-Authenticate header"""
     return jsonify({'error': 'Unauthorized'}), 401, {'WWW-Authenticate': 'Basic realm="Admin Login Required"'}
@@ -3178,11 +3677,29 @@ def health_check():
         # Check database connection
         db.session.execute('SELECT 1')
         
-        return jsonify({'status': 'healthy'}), 200
+        return jsonify({'status': 'healthy', 'providers': providers.describe()}), 200
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape target, aggregated across all workers via Redis.
+
+    Requires the METRICS_TOKEN bearer token, or the admin basic auth (never open).
+    """
+    metrics_token = os.getenv('METRICS_TOKEN')
+    has_token = bool(metrics_token) and request.headers.get('Authorization') == f"Bearer {metrics_token}"
+    auth = request.authorization
+    is_admin = auth and auth.username == 'admin' and auth.password == os.getenv('ADMIN_PASSWORD', 'admin123')
+    if not has_token and not is_admin:
+        return jsonify({'error': 'Unauthorized'}), 401
+    try:
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        logger.error(f"Metrics render failed: {e}")
+        return jsonify({'error': 'Metrics unavailable'}), 503
+
 # Session storage interface
 class SessionStore:
     def save_session(self, session_id, data):
@@ -3292,6 +3809,7 @@ class RedisSessionStore(SessionStore):
             logger.info(f"Session saved successfully: {session_id}")
         except Exception as e:
             logger.error(f"Failed to save session to Redis: {e}")
+            PROVIDER_FALLBACKS.inc(component='session_store', from_backend='redis', to_backend='file')
             # Fallback to file storage if Redis fails
             fallback_store = FileSessionStore()
             fallback_store.save_session(session_id, data)
@@ -3318,6 +3836,7 @@ class RedisSessionStore(SessionStore):
             return None
         except Exception as e:
             logger.error(f"Failed to load session from Redis: {e}")
+            PROVIDER_FALLBACKS.inc(component='session_store', from_backend='redis', to_backend='file')
             # Try fallback to file storage on exception
             fallback_store = FileSessionStore()
             return fallback_store.load_session(session_id)
@@ -3341,6 +3860,7 @@ def get_session_store():
         except Exception as e:
             logger.error(f"Redis connection failed: {e}")
             logger.warning("Falling back to file storage")
+            PROVIDER_FALLBACKS.inc(component='session_store', from_backend='redis', to_backend='file')
             return FileSessionStore()
     return FileSessionStore()
 
@@ -3348,6 +3868,68 @@ def get_session_store():
 # Initialize the appropriate session store
 session_store = get_session_store()
 
+# Educator topics are cached per process; CLI edits invalidate it over Redis pub/sub
+topic_cache.init_app(app, redis_client=getattr(session_store, 'redis', None))
+
+# Kid audio uploads go through a Redis-backed retry queue drained by background workers
+init_upload_queue(app, redis_client=getattr(session_store, 'redis', None))
+
+# Analytics events are buffered and bulk-inserted off the request path;
+# reuse the session store's Redis connection for the multi-worker spill stream
+init_analytics_queue(app, redis_client=getattr(session_store, 'redis', None))
+
+# Provider latency / cache / queue metrics; workers flush to Redis so /metrics covers all of them
+init_metrics(redis_client=getattr(session_store, 'redis', None))
+
+# Sampled turn profiles are kept in Redis so the admin download works from any worker
+init_profiler(redis_client=getattr(session_store, 'redis', None))
+
+# Rate / concurrency limits for turns, speak and translate are shared across workers through Redis
+init_admission(redis_client=getattr(session_store, 'redis', None))
+
+# Workers publish their provider routing state so /api/admin/routing shows every dyno
+init_provider_router(redis_client=getattr(session_store, 'redis', None))
+
+# Translations of tutor lines are shared across workers through Redis and prefetched per reply
+init_translation(redis_client=getattr(session_store, 'redis', None), translate=translate_with_llm)
+
+# Turn SSE events are buffered in Redis so a reconnect on any worker can replay them
+init_turn_streams(redis_client=getattr(session_store, 'redis', None))
+
+# Streamed turns are journaled in Redis and persisted by a background committer
+init_turn_committer(app, redis_client=getattr(session_store, 'redis', None), session_store=session_store)
+
+# Child names are rendered once per voice and spliced into pooled greetings
+init_name_audio(redis_client=getattr(session_store, 'redis', None),
+                synthesize=synthesize_speech, transliterate=transliterate_to_roman)
+
+# Synthesized audio is served as raw bytes from /api/audio/<id>; Redis lets any worker serve it
+init_audio_store(redis_client=getattr(session_store, 'redis', None))
+
+# Recurring reply sentences are pre-synthesized by build_segment_library.py and stitched in
+init_segment_library(redis_client=getattr(session_store, 'redis', None), synthesize=synthesize_speech)
+
+# Opening turns are pre-generated per topic / child profile so start_conversation is a pool pop
+init_greeting_pool(app, redis_client=getattr(session_store, 'redis', None),
+                   initial_prompt=get_initial_system_prompt, generate=generate_initial_greeting,
+                   synthesize=synthesize_speech, transliterate=transliterate_to_roman)
+
+
+def backfill_conversation_previews(batch_size=500):
+    """One-off: populate last_user_preview for rows written before the column existed"""
+    last_id = 0
+    while True:
+        batch = Conversation.query.filter(
+            Conversation.id > last_id,
+            Conversation.last_user_preview.is_(None)
+        ).order_by(Conversation.id).limit(batch_size).all()
+        if not batch:
+            break
+        for conv in batch:
+            conv.last_user_preview = Conversation.build_preview(conv.conversation_data)
+        last_id = batch[-1].id
+        db.session.commit()
+
 
 def init_database():
     """Initialize database tables"""
@@ -3366,6 +3948,27 @@ def init_database():
                 db.session.execute(text('ALTER TABLE "user" ADD COLUMN transliteration_enabled BOOLEAN DEFAULT 0'))
                 db.session.commit()
                 logger.info("Migration: added transliteration_enabled column to user table")
+            conversation_cols = [c['name'] for c in inspector.get_columns('conversation')]
+            if 'last_user_preview' not in conversation_cols:
+                db.session.execute(text('ALTER TABLE conversation ADD COLUMN last_user_preview VARCHAR(60)'))
+                db.session.commit()
+                backfill_conversation_previews()
+                logger.info("Migration: added last_user_preview column to conversation table")
+            db.session.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_conversation_user_created_id '
+                'ON conversation (user_id, created_at, id)'
+            ))
+            audio_cols = [c['name'] for c in inspector.get_columns('conversation_audio')]
+            for col in ('duration_ms', 'bitrate_kbps'):
+                if col not in audio_cols:
+                    db.session.execute(text(f'ALTER TABLE conversation_audio ADD COLUMN {col} INTEGER'))
+                    db.session.commit()
+                    logger.info(f"Migration: added {col} column to conversation_audio table")
+            db.session.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_conversation_audio_s3_key '
+                'ON conversation_audio (s3_key)'
+            ))
+            db.session.commit()
             logger.info("Database tables created successfully")
         except Exception as e:
             logger.error(f"Failed to create database tables: {e}")
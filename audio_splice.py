@@ -0,0 +1,54 @@
+import io
+import wave
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def strip_id3(data):
+    """Drop a leading ID3v2 and trailing ID3v1 tag so MP3 frames can be butted together."""
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = ((data[6] & 0x7f) << 21) | ((data[7] & 0x7f) << 14) | ((data[8] & 0x7f) << 7) | (data[9] & 0x7f)
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b'TAG':
+        data = data[:-128]
+    return data
+
+
+def _concat_wav(parts):
+    params = None
+    frames = []
+    for part in parts:
+        with wave.open(io.BytesIO(part), 'rb') as wav:
+            part_params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+            if params is None:
+                params = part_params
+            elif part_params != params:
+                raise ValueError(f"Cannot splice WAV segments with different formats: {params} vs {part_params}")
+            frames.append(wav.readframes(wav.getnframes()))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(params[0])
+        wav.setsampwidth(params[1])
+        wav.setframerate(params[2])
+        wav.writeframes(b''.join(frames))
+    return buffer.getvalue()
+
+
+def concat_audio(parts, content_type='audio/mpeg'):
+    """Join audio segments synthesized by the same TTS provider and voice into one clip.
+
+    MP3 is a sequence of self-contained frames, so segments are concatenated after
+    stripping their tags; WAV segments are re-wrapped under a single header.
+    """
+    parts = [part for part in parts if part]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    if content_type == 'audio/wav':
+        return _concat_wav(parts)
+    if content_type == 'audio/mpeg':
+        return b''.join(strip_id3(part) for part in parts)
+    raise ValueError(f"Cannot splice audio of type {content_type}")
@@ -0,0 +1,67 @@
+import os
+import time
+import secrets
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Synthesized audio is kept briefly under an unguessable id and served as raw bytes from
+# /api/audio/<id>, instead of being base64-encoded into the JSON response (33% larger,
+# and decoded on the client's main thread).
+AUDIO_URL_TTL_SECONDS = int(os.environ.get('AUDIO_URL_TTL_SECONDS', '600'))
+AUDIO_KEY = 'tts_audio:{}'
+# Clients opt in with `audio_delivery=url`; pages cached before a deploy keep getting base64
+AUDIO_DELIVERY_URL = 'url'
+AUDIO_DELIVERY_BASE64 = 'base64'
+
+_redis = None
+_local = {}  # audio_id -> (expires, audio bytes, content_type), when there is no Redis
+_local_lock = threading.Lock()
+
+
+def init_audio_store(redis_client=None):
+    """Without Redis, an audio URL only resolves on the worker that synthesized it."""
+    global _redis
+    _redis = redis_client
+
+
+def negotiate_delivery(value):
+    return AUDIO_DELIVERY_URL if value == AUDIO_DELIVERY_URL else AUDIO_DELIVERY_BASE64
+
+
+def store_audio(audio_bytes, content_type):
+    """Keep audio for AUDIO_URL_TTL_SECONDS and return its id."""
+    audio_id = secrets.token_urlsafe(16)
+    if _redis is not None:
+        try:
+            key = AUDIO_KEY.format(audio_id)
+            pipe = _redis.pipeline(transaction=False)
+            pipe.hset(key, mapping={'audio': audio_bytes, 'content_type': content_type})
+            pipe.expire(key, AUDIO_URL_TTL_SECONDS)
+            pipe.execute()
+            return audio_id
+        except Exception as e:
+            logger.warning(f"Failed to store audio in Redis, keeping it on this worker: {e}")
+    now = time.time()
+    with _local_lock:
+        for stale in [k for k, (expires, _, _) in _local.items() if expires < now]:
+            del _local[stale]
+        _local[audio_id] = (now + AUDIO_URL_TTL_SECONDS, audio_bytes, content_type)
+    return audio_id
+
+
+def load_audio(audio_id):
+    """(audio bytes, content_type), or (None, None) if unknown or expired."""
+    if _redis is not None:
+        try:
+            stored = _redis.hgetall(AUDIO_KEY.format(audio_id))
+            if stored:
+                return stored[b'audio'], stored[b'content_type'].decode()
+        except Exception as e:
+            logger.warning(f"Failed to load audio from Redis: {e}")
+    with _local_lock:
+        entry = _local.get(audio_id)
+    if entry is None or entry[0] < time.time():
+        return None, None
+    return entry[1], entry[2]
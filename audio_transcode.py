@@ -0,0 +1,126 @@
+import os
+import re
+import shutil
+import logging
+import tempfile
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Archival profiles keep the recording's container so it plays back where it was made:
+# WebM input becomes mono Opus in WebM, while Safari/iOS MP4 input stays mono AAC in MP4
+# (older iOS Safari can't play WebM/Opus)
+AUDIO_ARCHIVE_BITRATE = os.environ.get('AUDIO_ARCHIVE_BITRATE', '24k')
+AUDIO_ARCHIVE_SAMPLE_RATE = 48000
+AUDIO_ARCHIVE_AAC_BITRATE = os.environ.get('AUDIO_ARCHIVE_AAC_BITRATE', '32k')
+AUDIO_ARCHIVE_AAC_SAMPLE_RATE = 24000
+# Leading/trailing audio quieter than this is treated as silence
+AUDIO_SILENCE_THRESHOLD_DB = os.environ.get('AUDIO_SILENCE_THRESHOLD_DB', '-45dB')
+# Silence kept at each end so words aren't clipped
+AUDIO_SILENCE_PADDING_SECONDS = 0.15
+AUDIO_TRANSCODE_TIMEOUT_SECONDS = 30
+
+FFMPEG_PATH = shutil.which('ffmpeg')
+ENABLE_AUDIO_TRANSCODE = (
+    os.environ.get('ENABLE_AUDIO_TRANSCODE', 'true').lower() == 'true' and FFMPEG_PATH is not None
+)
+
+_TIME_PATTERN = re.compile(r'time=(\d+):(\d+):(\d+(?:\.\d+)?)')
+
+# silenceremove only trims the start, so trim, reverse, trim again, reverse back.
+# The filters run on the decoded PCM, never on the compressed bytes.
+_TRIM_FILTER = (
+    f"silenceremove=start_periods=1:start_threshold={AUDIO_SILENCE_THRESHOLD_DB}"
+    f":start_silence={AUDIO_SILENCE_PADDING_SECONDS},areverse,"
+    f"silenceremove=start_periods=1:start_threshold={AUDIO_SILENCE_THRESHOLD_DB}"
+    f":start_silence={AUDIO_SILENCE_PADDING_SECONDS},areverse"
+)
+
+
+def source_container(audio_bytes):
+    """'mp4' for an ISO BMFF recording (Safari / iOS MediaRecorder), otherwise 'webm'."""
+    return 'mp4' if audio_bytes[4:8] == b'ftyp' else 'webm'
+
+
+def _encode_args(container):
+    if container == 'mp4':
+        return ['-ar', str(AUDIO_ARCHIVE_AAC_SAMPLE_RATE), '-c:a', 'aac', '-b:a', AUDIO_ARCHIVE_AAC_BITRATE]
+    return ['-ar', str(AUDIO_ARCHIVE_SAMPLE_RATE), '-c:a', 'libopus', '-b:a', AUDIO_ARCHIVE_BITRATE,
+            '-application', 'voip']
+
+
+def _run_ffmpeg(audio_bytes, container):
+    """(returncode, encoded bytes, stderr text) for the archival encode of audio_bytes."""
+    cmd = [
+        FFMPEG_PATH, '-hide_banner', '-nostdin',
+        '-i', 'pipe:0',
+        '-vn', '-af', _TRIM_FILTER,
+        '-ac', '1',
+    ] + _encode_args(container)
+    if container != 'mp4':
+        cmd += ['-f', 'webm', 'pipe:1']
+        proc = subprocess.run(cmd, input=audio_bytes, capture_output=True,
+                              timeout=AUDIO_TRANSCODE_TIMEOUT_SECONDS)
+        return proc.returncode, proc.stdout, proc.stderr.decode('utf-8', 'replace')
+
+    # A plain (non-fragmented) MP4 needs a seekable output to write its index up front
+    with tempfile.TemporaryDirectory(prefix='archive-') as tmp_dir:
+        out_path = os.path.join(tmp_dir, 'archive.m4a')
+        cmd += ['-movflags', '+faststart', '-f', 'mp4', '-y', out_path]
+        proc = subprocess.run(cmd, input=audio_bytes, capture_output=True,
+                              timeout=AUDIO_TRANSCODE_TIMEOUT_SECONDS)
+        encoded = b''
+        if proc.returncode == 0 and os.path.exists(out_path):
+            with open(out_path, 'rb') as f:
+                encoded = f.read()
+        return proc.returncode, encoded, proc.stderr.decode('utf-8', 'replace')
+
+
+def transcode_for_archive(audio_bytes):
+    """Trim silence and re-encode an utterance to the archival profile for its container.
+
+    Returns (audio_bytes, info) where info has duration_ms, bitrate_kbps,
+    transcoded and content_type (of the returned bytes, when transcoded). Falls
+    back to the original bytes (transcoded=False) if ffmpeg is unavailable,
+    fails, or the result would not be smaller.
+    """
+    original = {'duration_ms': None, 'bitrate_kbps': None, 'transcoded': False}
+    if not ENABLE_AUDIO_TRANSCODE or not audio_bytes:
+        return audio_bytes, original
+
+    container = source_container(audio_bytes)
+    try:
+        returncode, encoded, stderr_text = _run_ffmpeg(audio_bytes, container)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.warning(f"Audio transcode failed to run, archiving original: {e}")
+        return audio_bytes, original
+
+    if returncode != 0 or not encoded:
+        logger.warning(f"Audio transcode exited {returncode}, archiving original: {stderr_text[-300:]}")
+        return audio_bytes, original
+
+    duration_ms = _parse_duration_ms(stderr_text)
+    if duration_ms is not None and duration_ms <= 0:
+        # All silence - keep the original so the recording isn't lost entirely
+        logger.info("Audio transcode produced empty output, archiving original")
+        return audio_bytes, original
+    if len(encoded) >= len(audio_bytes):
+        logger.info(f"Transcoded audio not smaller ({len(encoded)} >= {len(audio_bytes)} bytes), archiving original")
+        return audio_bytes, dict(original, duration_ms=duration_ms)
+
+    bitrate_kbps = None
+    if duration_ms:
+        bitrate_kbps = int(round(len(encoded) * 8 / duration_ms))
+    logger.info(f"🎚️ Audio transcoded ({container}): {len(audio_bytes) / 1024:.1f}KB → {len(encoded) / 1024:.1f}KB "
+                f"({duration_ms}ms @ {bitrate_kbps}kbps)")
+    return encoded, {'duration_ms': duration_ms, 'bitrate_kbps': bitrate_kbps, 'transcoded': True,
+                     'content_type': f'audio/{container}'}
+
+
+def _parse_duration_ms(stderr_text):
+    """Read the final `time=` progress stamp ffmpeg prints for the encoded output."""
+    matches = _TIME_PATTERN.findall(stderr_text)
+    if not matches:
+        return None
+    hours, minutes, seconds = matches[-1]
+    return int(round((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 1000))
@@ -5,6 +5,7 @@ from flask import Blueprint, request, redirect, url_for, session, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from authlib.integrations.flask_client import OAuth
 from models import User, Educator, db
+from name_audio import warm_name
 import secrets
 import sentry_sdk
 
@@ -171,6 +172,8 @@ def update_child_name():
         formatted_name = child_name.strip()
         formatted_gender = child_gender.lower()
 
+        name_changed = formatted_name != current_user.child_name
+
         # Update user profile
         current_user.child_name = formatted_name
         current_user.child_age = child_age
@@ -197,6 +200,10 @@ def update_child_name():
 
         db.session.commit()
 
+        # Render the name in the tutor voice now, so the first greeting doesn't wait for it
+        if name_changed:
+            warm_name(formatted_name)
+
         return jsonify({
             'success': True,
             'child_name': formatted_name,
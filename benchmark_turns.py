@@ -0,0 +1,366 @@
+"""End-to-end turn latency benchmark against the in-process fake providers.
+
+Drives start_conversation → N× process_audio_stream (+ /api/speak/stream for the reply) →
+get_hints through the Flask test client, timing each stage from the client's side,
+and writes a JSON report with p50/p95/p99 per stage that can be diffed between commits.
+
+Usage:
+    python benchmark_turns.py                                   # 20 conversations × 5 turns
+    python benchmark_turns.py --conversations 50 --concurrency 8 --output bench.json
+    python benchmark_turns.py --audio sample.webm --compare baseline.json
+    python benchmark_turns.py --conversation-type my_day
+    FAKE_LLM_FIRST_CHUNK_LATENCY_MS=900,2500 FAKE_STT_FAILURE_RATE=0.02 python benchmark_turns.py
+
+Fake latencies are set with FAKE_<STT|TTS|LLM|LLM_FIRST_CHUNK|LLM_CHUNK_GAP|TRANSLITERATION>_LATENCY_MS=median,p95
+(see providers.py); the streamed reply's time to first words follows LLM_FIRST_CHUNK. The app runs against a throwaway SQLite database unless
+DATABASE_URL is set. Exits non-zero if any request errored or a stage got no samples,
+so a broken run is never mistaken for a result.
+"""
+
+import argparse
+import codecs
+import io
+import json
+import math
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Configure the app for an offline run before it is imported
+os.environ.setdefault('PROVIDER_MODE', 'fake')
+os.environ.setdefault('ENABLE_AUDIO_STORAGE', 'false')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')}")
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('ADMISSION_ENABLED', 'false')  # every simulated user shares one IP
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = (
+    'start_conversation',
+    'time_to_transcript',
+    'time_to_evaluation',
+    'time_to_first_words',
+    'time_to_complete',
+    'time_to_stream_hints',
+    'stream_total',
+    'speak_first_audio',
+    'speak',
+    'get_hints',
+    'turn_total',
+)
+
+# SSE event type → stage measured from the start of the process_audio_stream request
+EVENT_STAGES = {
+    'transcript': 'time_to_transcript',
+    'evaluation': 'time_to_evaluation',
+    'words': 'time_to_first_words',
+    'delta': 'time_to_first_words',
+    'complete': 'time_to_complete',
+    'hints': 'time_to_stream_hints',
+}
+
+
+def synthetic_webm(duration_ms=2000):
+    """A minimal WebM/Opus clip (20ms packets) that passes the container duration check."""
+    def element(id_bytes, payload):
+        return id_bytes + bytes([0x01]) + len(payload).to_bytes(7, 'big') + payload
+
+    header = element(bytes.fromhex('1A45DFA3'), element(b'\x42\x82', b'webm'))
+    info = element(bytes.fromhex('1549A966'), element(bytes.fromhex('2AD7B1'), (1000000).to_bytes(3, 'big')))
+    tracks = element(bytes.fromhex('1654AE6B'),
+                     element(b'\xAE', element(b'\xD7', b'\x01') + element(b'\x86', b'A_OPUS')))
+    cluster = bytes.fromhex('1F43B675') + bytes([0x01] + [0xFF] * 7) + b'\xE7\x81\x00'
+    for i in range(duration_ms // 20):
+        payload = b'\x81' + struct.pack('>h', i * 20) + b'\x80' + bytes([1 << 3]) + os.urandom(40)
+        cluster += b'\xA3' + bytes([0x80 | len(payload)]) + payload
+    segment = bytes.fromhex('18538067') + bytes([0x01] + [0xFF] * 7) + info + tracks + cluster
+    return header + segment
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(samples):
+    values = sorted(samples)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 50), 1),
+        'p95': round(percentile(values, 95), 1),
+        'p99': round(percentile(values, 99), 1),
+        'mean': round(sum(values) / len(values), 1),
+        'min': round(values[0], 1),
+        'max': round(values[-1], 1),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {stage: [] for stage in STAGES}
+        self.errors = {}
+
+    def add(self, stage, elapsed_ms):
+        with self._lock:
+            self.samples[stage].append(elapsed_ms)
+
+    def error(self, kind):
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def read_sse(response, on_event):
+    """Feed each SSE `data:` payload to on_event(data) as the generator yields it."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    for chunk in response.iter_encoded():
+        buffer += decoder.decode(chunk)
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            for line in block.split('\n'):
+                if line.startswith('data: '):
+                    on_event(json.loads(line[6:]))
+
+
+def run_conversation(app, user_id, audio_bytes, turns, recorder, stream_protocol=2, audio_delivery='stream',
+                     conversation_type='things_i_love'):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    started = time.perf_counter()
+    response = client.post('/api/start_conversation', json={'conversation_type': conversation_type})
+    recorder.add('start_conversation', (time.perf_counter() - started) * 1000)
+    if response.status_code != 200:
+        recorder.error(f'start_conversation_{response.status_code}')
+        return
+    session_id = response.get_json()['session_id']
+
+    for _turn in range(turns):
+        turn_start = time.perf_counter()
+        seen = set()
+        final_text = {}
+
+        def on_event(data):
+            elapsed_ms = (time.perf_counter() - turn_start) * 1000
+            event_type = data.get('type')
+            stage = EVENT_STAGES.get(event_type)
+            if stage and stage not in seen:
+                seen.add(stage)
+                recorder.add(stage, elapsed_ms)
+            if event_type == 'complete':
+                final_text['text'] = data.get('final_text', '')
+                final_text['should_end'] = data.get('should_end')
+            elif event_type == 'error':
+                recorder.error('stream_error')
+
+        response = client.post(
+            '/api/process_audio_stream',
+            data={'audio': (io.BytesIO(audio_bytes), 'audio.webm'), 'session_id': session_id,
+                  'stream_protocol': str(stream_protocol)},
+            content_type='multipart/form-data',
+            buffered=False,
+        )
+        if response.mimetype != 'text/event-stream':
+            payload = response.get_json(silent=True) or {}
+            recorder.error(payload.get('error') or f'process_audio_stream_{response.status_code}')
+            continue
+        read_sse(response, on_event)
+        response.close()
+        recorder.add('stream_total', (time.perf_counter() - turn_start) * 1000)
+
+        if final_text.get('text'):
+            started = time.perf_counter()
+            if audio_delivery == 'stream':
+                # The browser starts playback on the first chunk
+                response = client.post('/api/speak/stream', data={'text': final_text['text']}, buffered=False)
+                first_audio = None
+                for chunk in response.iter_encoded():
+                    if chunk and first_audio is None:
+                        first_audio = (time.perf_counter() - started) * 1000
+                response.close()
+                if response.status_code == 200 and first_audio is not None:
+                    recorder.add('speak_first_audio', first_audio)
+            else:
+                response = client.post('/api/speak', data={'text': final_text['text'], 'audio_delivery': audio_delivery})
+                audio_url = (response.get_json(silent=True) or {}).get('audio_url')
+                if response.status_code == 200 and audio_url:
+                    # Include fetching the raw audio, as the browser does before playback starts
+                    response = client.get(audio_url)
+                if response.status_code == 200:
+                    recorder.add('speak_first_audio', (time.perf_counter() - started) * 1000)
+            recorder.add('speak', (time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                recorder.error(f'speak_{response.status_code}')
+
+        if not final_text.get('should_end'):
+            started = time.perf_counter()
+            response = client.post('/api/get_hints', json={'session_id': session_id})
+            recorder.add('get_hints', (time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                recorder.error(f'get_hints_{response.status_code}')
+
+        recorder.add('turn_total', (time.perf_counter() - turn_start) * 1000)
+        if final_text.get('should_end'):
+            break
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit')}):")
+    print(f"{'stage':<24}{'p50':>18}{'p95':>18}{'p99':>18}")
+    for stage, current in report['stages'].items():
+        previous = baseline['stages'].get(stage, {})
+        cells = []
+        for key in ('p50', 'p95', 'p99'):
+            if current.get(key) is None or previous.get(key) is None:
+                cells.append(f"{'-':>18}")
+                continue
+            delta = current[key] - previous[key]
+            pct = 100.0 * delta / previous[key] if previous[key] else 0.0
+            cells.append(f"{delta:>+9.1f} ({pct:>+5.1f}%)")
+        print(f"{stage:<24}{''.join(cells)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end turn latency with fake providers")
+    parser.add_argument('--conversations', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=5, help="turns per conversation (the app ends at MAX_CONVERSATION_TURNS)")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--audio', help="WebM recording to upload each turn (default: synthetic 2s clip)")
+    parser.add_argument('--stream-protocol', type=int, default=2, choices=(1, 2), help="SSE protocol to request")
+    parser.add_argument('--audio-delivery', default='stream', choices=('stream', 'url', 'base64'),
+                        help="how the reply audio is fetched (stream = /api/speak/stream)")
+    parser.add_argument('--conversation-type', default='things_i_love',
+                        help="CONVERSATION_TYPES key (or edu_ topic) to start each conversation with")
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--compare', help="previous report to diff against")
+    parser.add_argument('--verbose', action='store_true', help="keep the app's INFO logging")
+    args = parser.parse_args()
+
+    import logging
+    from app import app, init_database
+    from models import db, User
+    from providers import providers, FAKE_LATENCY_DEFAULTS, FAKE_PROVIDER_SEED
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    init_database()
+    with app.app_context():
+        user = User.query.filter_by(email='benchmark@example.com').first()
+        if user is None:
+            user = User(email='benchmark@example.com', name='Benchmark', child_name='आरव',
+                        child_age=7, child_gender='boy')
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.id
+
+    if args.audio:
+        with open(args.audio, 'rb') as f:
+            audio_bytes = f.read()
+    else:
+        audio_bytes = synthetic_webm()
+
+    recorder = Recorder()
+    pending = list(range(args.conversations))
+    pending_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with pending_lock:
+                if not pending:
+                    return
+                pending.pop()
+            try:
+                run_conversation(app, user_id, audio_bytes, args.turns, recorder, args.stream_protocol,
+                                 args.audio_delivery, args.conversation_type)
+            except Exception as e:
+                recorder.error(type(e).__name__)
+
+    print(f"Running {args.conversations} conversations × {args.turns} turns "
+          f"at concurrency {args.concurrency} (providers: {providers.describe()})")
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(max(1, args.concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_ms = (time.perf_counter() - wall_start) * 1000
+
+    latency_config = {}
+    for capability, (median_ms, p95_ms) in FAKE_LATENCY_DEFAULTS.items():
+        latency_config[capability] = {
+            'latency_ms': os.environ.get(f'FAKE_{capability.upper()}_LATENCY_MS', f'{median_ms},{p95_ms}'),
+            'failure_rate': float(os.environ.get(f'FAKE_{capability.upper()}_FAILURE_RATE', '0')),
+        }
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'conversations': args.conversations,
+            'turns': args.turns,
+            'concurrency': args.concurrency,
+            'audio': args.audio or 'synthetic',
+            'conversation_type': args.conversation_type,
+            'stream_protocol': args.stream_protocol,
+            'audio_delivery': args.audio_delivery,
+            'providers': providers.describe(),
+            'fake_latency': latency_config,
+            'seed': FAKE_PROVIDER_SEED,
+            'wall_ms': round(wall_ms, 1),
+        },
+        'stages': {stage: summarize(samples) for stage, samples in recorder.samples.items()},
+        'errors': recorder.errors,
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+    print(f"\n{'stage':<24}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in report['stages'].items():
+        if stats['count']:
+            print(f"{stage:<24}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+    if recorder.errors:
+        print(f"\nErrors: {recorder.errors}")
+    print(f"\nReport written to {args.output} ({wall_ms / 1000:.1f}s wall)")
+
+    if args.compare:
+        compare(report, args.compare)
+
+    empty = [stage for stage, stats in report['stages'].items() if not stats['count']]
+    if recorder.errors or empty:
+        if empty:
+            print(f"\nNo samples for: {', '.join(empty)}")
+        print("Benchmark run is not valid (see errors above)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
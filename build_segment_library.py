@@ -0,0 +1,138 @@
+"""CLI utility to build the TTS segment library from past conversations.
+
+Mines Kiki's replies for sentences that recur across many children, pre-synthesizes
+them in the current TTS voice and stores them in Redis, where text_to_speech_hindi
+stitches them into replies instead of synthesizing them again.
+
+Usage:
+    python build_segment_library.py mine --days 30 --min-users 5 --limit 300 --dry-run
+    python build_segment_library.py mine --prune
+    python build_segment_library.py list
+    python build_segment_library.py remove "बहुत अच्छा!"
+"""
+
+import argparse
+import sys
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Setup Flask app context for DB access
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app import app, synthesize_speech
+from models import Conversation
+from segment_library import (split_sentences, normalize, library_sentences, add_segments,
+                             remove_segments, voice_key)
+import segment_library
+
+# Long sentences are rarely repeated verbatim and cost the most to store
+MAX_SEGMENT_CHARS = 80
+
+
+def mine_sentences(days, min_users, limit, batch_size=500):
+    """Assistant sentences said to at least `min_users` different children, most common first.
+
+    Counting children rather than occurrences keeps out lines that mention one child's name.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    users_by_sentence = defaultdict(set)
+    last_id = 0
+    scanned = 0
+    with app.app_context():
+        while True:
+            batch = Conversation.query.filter(
+                Conversation.id > last_id,
+                Conversation.created_at >= since
+            ).order_by(Conversation.id).limit(batch_size).all()
+            if not batch:
+                break
+            for conv in batch:
+                for message in conv.conversation_data:
+                    if message.get('role') != 'assistant':
+                        continue
+                    for sentence in split_sentences(message.get('content', '')):
+                        sentence = normalize(sentence)
+                        if 1 < len(sentence) <= MAX_SEGMENT_CHARS:
+                            users_by_sentence[sentence].add(conv.user_id)
+            scanned += len(batch)
+            last_id = batch[-1].id
+    print(f"Scanned {scanned} conversations, {len(users_by_sentence)} distinct sentences")
+
+    ranked = sorted(((len(users), s) for s, users in users_by_sentence.items() if len(users) >= min_users),
+                    reverse=True)
+    return [(s, n) for n, s in ranked[:limit]]
+
+
+def mine(args):
+    if segment_library._redis is None:
+        print("Error: the segment library needs Redis (set REDIS_URL)")
+        sys.exit(1)
+
+    mined = mine_sentences(args.days, args.min_users, args.limit)
+    existing = library_sentences(refresh=True)
+    new = [(s, n) for s, n in mined if s not in existing]
+    print(f"{len(mined)} sentences qualify, {len(new)} not yet in {voice_key()}")
+    for sentence, users in new:
+        print(f"  {users:5d}  {sentence}")
+
+    if args.dry_run:
+        return
+
+    audio_by_sentence = {}
+    for sentence, _ in new:
+        audio = synthesize_speech(sentence)
+        if audio:
+            audio_by_sentence[sentence] = audio
+        else:
+            print(f"  Failed to synthesize: {sentence}")
+    add_segments(audio_by_sentence)
+    print(f"Added {len(audio_by_sentence)} segments ({sum(len(s) for s in audio_by_sentence)} characters)")
+
+    if args.prune:
+        keep = {s for s, _ in mined}
+        stale = [s for s in existing if s not in keep]
+        remove_segments(stale)
+        print(f"Pruned {len(stale)} segments that no longer qualify")
+
+
+def list_segments(args):
+    sentences = sorted(library_sentences(refresh=True))
+    print(f"{len(sentences)} segments in {voice_key()}")
+    for sentence in sentences:
+        print(f"  {sentence}")
+
+
+def remove(args):
+    remove_segments(args.sentences)
+    print(f"Removed {len(args.sentences)} segment(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the TTS segment library')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # mine
+    p_mine = subparsers.add_parser('mine', help='Mine recurring sentences and synthesize the new ones')
+    p_mine.add_argument('--days', type=int, default=30, help='Look back this many days (default: 30)')
+    p_mine.add_argument('--min-users', type=int, default=5,
+                        help='Minimum number of children a sentence was said to (default: 5)')
+    p_mine.add_argument('--limit', type=int, default=300, help='Maximum library size (default: 300)')
+    p_mine.add_argument('--prune', action='store_true', help='Remove segments that no longer qualify')
+    p_mine.add_argument('--dry-run', action='store_true', help='Only print what would be added')
+    p_mine.set_defaults(func=mine)
+
+    # list
+    p_list = subparsers.add_parser('list', help='List segments for the current voice')
+    p_list.set_defaults(func=list_segments)
+
+    # remove
+    p_remove = subparsers.add_parser('remove', help='Remove segments by sentence')
+    p_remove.add_argument('sentences', nargs='+', help='Sentence text')
+    p_remove.set_defaults(func=remove)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import app
 from models import db, Educator, EducatorTopic
+from educator_topic_cache import topic_cache
 
 # Ensure tables exist (dev: SQLite auto-creates)
 with app.app_context():
@@ -86,6 +87,7 @@ def add_topic(args):
         )
         db.session.add(topic)
         db.session.commit()
+        topic_cache.notify_changed()
         print(f"Added topic: {topic.name} (key: {topic.full_key})")
 
 
@@ -131,6 +133,7 @@ def update_topic(args):
             sys.exit(1)
 
         db.session.commit()
+        topic_cache.notify_changed()
         print(f"Updated topic '{topic.full_key}': {', '.join(updated)}")
 
 
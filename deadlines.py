@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+import functools
+import threading
+import contextvars
+import concurrent.futures
+from contextlib import contextmanager
+
+from providers import ProviderError, DeadlineExceeded
+from provider_router import CircuitBreaker
+from metrics import VENDOR_FAST_FAILS, DEADLINE_DEGRADED
+
+logger = logging.getLogger(__name__)
+
+# A turn has a time budget, and every vendor call made on its behalf gets at most what
+# is left of it, so a slow vendor costs the turn a degraded result (no roman text,
+# default green evaluation, no hints) instead of holding a worker for the vendor's
+# full timeout. The reply itself is not cut short; the budget bounds the work around it.
+# Time from the transcript until the reply starts streaming (transcript roman text,
+# evaluation). STT is outside it: it has no degraded result, only its vendor timeout.
+TURN_DEADLINE_SECONDS = float(os.environ.get('TURN_DEADLINE_SECONDS', '4'))
+# Time after the reply for its roman text and the hints
+FOLLOWUP_DEADLINE_SECONDS = float(os.environ.get('FOLLOWUP_DEADLINE_SECONDS', '3'))
+# Below this a vendor call can't succeed, so it isn't made
+MIN_CALL_TIMEOUT_SECONDS = 0.1
+
+_current = contextvars.ContextVar('deadline', default=None)
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpen(ProviderError):
+    """The vendor's circuit is open; the call was skipped."""
+
+
+class Deadline:
+    """A point in time by which a request's downstream work must finish."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() < MIN_CALL_TIMEOUT_SECONDS
+
+    @contextmanager
+    def scope(self):
+        """Make this the deadline for vendor calls made in the block."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def bind(self, fn):
+        """fn running under this deadline, for submitting to an executor."""
+        @functools.wraps(fn)
+        def run_with_deadline(*args, **kwargs):
+            with self.scope():
+                return fn(*args, **kwargs)
+        return run_with_deadline
+
+    def result(self, future, default, component):
+        """future's result if it arrives in time, otherwise `default`."""
+        try:
+            return future.result(timeout=self.remaining())
+        except concurrent.futures.TimeoutError:
+            logger.warning(f"⏱️ DEADLINE: {component} not ready after {self.seconds:.1f}s budget, using fallback")
+            DEADLINE_DEGRADED.inc(component=component)
+            return default
+
+
+def call_timeout(timeout):
+    """`timeout` capped to the current deadline. Raises DeadlineExceeded when it is spent."""
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline.remaining()
+    if remaining < MIN_CALL_TIMEOUT_SECONDS:
+        raise DeadlineExceeded(f"deadline passed ({deadline.seconds:.1f}s budget)")
+    return min(timeout, remaining)
+
+
+def vendor_breaker(vendor):
+    with _breakers_lock:
+        if vendor not in _breakers:
+            _breakers[vendor] = CircuitBreaker(vendor)
+        return _breakers[vendor]
+
+
+@contextmanager
+def vendor_call(vendor, timeout):
+    """Guard one vendor request; yields the timeout to give the client.
+
+    Fast-fails with CircuitOpen or DeadlineExceeded instead of calling a vendor that is
+    down or that there is no time left for. An exception in the block counts against the
+    vendor, unless it is a timeout the deadline made shorter than the vendor's own.
+    """
+    breaker = vendor_breaker(vendor)
+    try:
+        effective = call_timeout(timeout)
+    except DeadlineExceeded:
+        VENDOR_FAST_FAILS.inc(vendor=vendor, reason='deadline')
+        raise
+    if not breaker.allow():
+        VENDOR_FAST_FAILS.inc(vendor=vendor, reason='circuit_open')
+        raise CircuitOpen(f"{vendor} circuit is open")
+    start = time.monotonic()
+    try:
+        yield effective
+    except Exception:
+        if effective < timeout and time.monotonic() - start >= effective * 0.95:
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release()  # e.g. the client went away mid-stream
+        raise
+    breaker.record_success()
+
+
+def vendor_circuits():
+    with _breakers_lock:
+        return {vendor: breaker.snapshot() for vendor, breaker in _breakers.items()}
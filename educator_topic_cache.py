@@ -0,0 +1,158 @@
+import os
+import logging
+import threading
+import time
+
+from flask import has_app_context
+
+from models import db, EducatorTopic
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) a worker re-checks the DB version stamp when no Redis
+# invalidation has arrived. Pub/sub makes updates visible immediately; this is the backstop.
+TOPIC_CACHE_RECHECK_SECONDS = float(os.environ.get('TOPIC_CACHE_RECHECK_SECONDS', '60'))
+
+TOPIC_CACHE_CHANNEL = 'educator_topics:invalidate'
+
+
+class CachedEducatorTopic:
+    """Detached, read-only copy of an EducatorTopic row.
+
+    Exposes the same attributes the request handlers read from the ORM object,
+    plus a `prompts` dict that memoizes compiled system prompts for this version.
+    """
+
+    FIELDS = ('id', 'educator_id', 'topic_key', 'name', 'name_hindi', 'description', 'icon',
+              'topic_focus', 'key_vocabulary', 'prompt_initial', 'prompt_conversation',
+              'display_order', 'is_active')
+
+    def __init__(self, topic):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(topic, field))
+        self.full_key = topic.full_key
+        self._dict = topic.to_dict()
+        self.prompts = {}
+
+    def to_dict(self):
+        return dict(self._dict)
+
+
+class EducatorTopicCache:
+    """Process-local cache of all active educator topics, rebuilt when the version stamp moves.
+
+    The version is (max(updated_at), count) over EducatorTopic, so edits, new topics and
+    deactivations all invalidate it. A lookup only touches the DB when the cache is cold
+    or the recheck interval has elapsed; a Redis invalidation message forces a rebuild.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._redis = None
+        self._lock = threading.Lock()
+        self._topics = None  # full_key -> CachedEducatorTopic
+        self._by_educator = {}  # educator_id -> [CachedEducatorTopic] ordered by display_order
+        self._version = None
+        self._checked_at = 0.0
+        self._subscriber_pid = None
+
+    def init_app(self, app, redis_client=None):
+        self._app = app
+        self._redis = redis_client
+
+    def get(self, full_key):
+        """Return the active topic for a key like 'edu_12_school_trip', or None."""
+        topics = self._current()
+        return topics.get(full_key) if topics is not None else None
+
+    def siblings(self, topic, limit=3):
+        """Other active topics from the same educator, in display order."""
+        self._current()
+        return [t for t in self._by_educator.get(topic.educator_id, []) if t.id != topic.id][:limit]
+
+    def invalidate(self):
+        with self._lock:
+            self._topics = None
+            self._version = None
+
+    def notify_changed(self):
+        """Drop this process's cache and tell every other worker to drop theirs."""
+        self.invalidate()
+        if self._redis is None:
+            return
+        try:
+            self._redis.publish(TOPIC_CACHE_CHANNEL, str(time.time()))
+        except Exception as e:
+            logger.warning(f"Failed to publish educator topic invalidation: {e}")
+
+    def _current(self):
+        self._ensure_subscriber()
+        now = time.time()
+        if self._topics is not None and now - self._checked_at < TOPIC_CACHE_RECHECK_SECONDS:
+            CACHE_REQUESTS.inc(cache='educator_topics', result='hit')
+            return self._topics
+        CACHE_REQUESTS.inc(cache='educator_topics', result='recheck')
+        with self._lock:
+            if self._topics is not None and now - self._checked_at < TOPIC_CACHE_RECHECK_SECONDS:
+                return self._topics
+            try:
+                self._with_app_context(self._refresh)
+            except Exception as e:
+                # Keep serving the last good snapshot if the DB is briefly unavailable
+                logger.error(f"Educator topic cache refresh failed: {e}")
+            self._checked_at = now
+            return self._topics
+
+    def _with_app_context(self, fn):
+        if has_app_context() or self._app is None:
+            return fn()
+        with self._app.app_context():
+            return fn()
+
+    def _refresh(self):
+        version = db.session.query(
+            db.func.max(EducatorTopic.updated_at), db.func.count(EducatorTopic.id)
+        ).one()
+        version = (version[0].isoformat() if version[0] else None, version[1])
+        if self._topics is not None and version == self._version:
+            return
+
+        rows = EducatorTopic.query.filter_by(is_active=True).order_by(
+            EducatorTopic.educator_id, EducatorTopic.display_order
+        ).all()
+        topics = {}
+        by_educator = {}
+        for row in rows:
+            cached = CachedEducatorTopic(row)
+            topics[cached.full_key] = cached
+            by_educator.setdefault(cached.educator_id, []).append(cached)
+
+        self._topics = topics
+        self._by_educator = by_educator
+        self._version = version
+        logger.info(f"Educator topic cache loaded: {len(topics)} active topics (version {version[0]})")
+
+    def _ensure_subscriber(self):
+        """Start one pub/sub listener per process (re-started after a fork)."""
+        if self._redis is None or self._subscriber_pid == os.getpid():
+            return
+        self._subscriber_pid = os.getpid()
+        thread = threading.Thread(target=self._listen, name='topic-cache-invalidator', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(TOPIC_CACHE_CHANNEL)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        logger.info("Educator topic cache invalidated via Redis")
+                        self.invalidate()
+            except Exception as e:
+                logger.warning(f"Educator topic invalidation listener error, retrying: {e}")
+                time.sleep(5)
+
+
+topic_cache = EducatorTopicCache()
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import deque
+
+from providers import providers
+from metrics import CACHE_REQUESTS
+from audio_splice import concat_audio
+from name_audio import name_speech
+
+logger = logging.getLogger(__name__)
+
+# Opening turns are generated ahead of time so start_conversation is a pool pop instead
+# of an LLM call plus TTS. Pools are kept per (conversation_type, child_gender, child_age)
+# for the profiles that actually started conversations in the last few days.
+GREETING_POOL_ENABLED = os.environ.get('GREETING_POOL_ENABLED', 'true').lower() == 'true'
+GREETING_POOL_SIZE = int(os.environ.get('GREETING_POOL_SIZE', '3'))
+# Older variants are discarded so greetings rotate and follow model / prompt tweaks
+GREETING_POOL_MAX_AGE_SECONDS = int(os.environ.get('GREETING_POOL_MAX_AGE_SECONDS', str(6 * 3600)))
+GREETING_POOL_REFILL_INTERVAL = 30
+GREETING_POOL_DEMAND_DAYS = 7
+# Upper bound on profiles warmed per pass, most recently requested first
+GREETING_POOL_MAX_PROFILES = 200
+GREETING_POOL_LOCK_SECONDS = 120
+
+GREETING_POOL_KEY = 'greeting_pool:{}'
+GREETING_DEMAND_KEY = 'greeting_pool:demand'
+GREETING_WARMER_LOCK_KEY = 'greeting_pool:warmer'
+
+# Greetings are generated for a stand-in name of the right gender and split on it;
+# the child's own name is spliced back in from the name audio cache (name_audio.py).
+NAME_PLACEHOLDERS = {'male': 'आरव', 'female': 'अनन्या'}
+DEFAULT_NAME_PLACEHOLDER = 'आरव'
+
+_app = None
+_redis = None
+_initial_prompt = None
+_generate = None
+_synthesize = None
+_transliterate = None
+_pools = {}        # pool key -> deque of entries, when there is no Redis
+_demand = {}       # profile -> last requested, when there is no Redis
+_local_lock = threading.Lock()
+_wake = threading.Event()
+_warmer_pid = None
+_warmer_lock = threading.Lock()
+
+
+def init_greeting_pool(app, redis_client=None, initial_prompt=None, generate=None, synthesize=None,
+                       transliterate=None):
+    """Wire the pool to the app's greeting pipeline.
+
+    initial_prompt(child_name, child_age, child_gender, conversation_type) -> system prompt or None
+    generate(system_prompt) -> greeting text (raises on failure)
+    synthesize(text) -> audio bytes or None; transliterate(text) -> roman text or ''
+    """
+    global _app, _redis, _initial_prompt, _generate, _synthesize, _transliterate
+    _app = app
+    _redis = redis_client
+    _initial_prompt = initial_prompt
+    _generate = generate
+    _synthesize = synthesize
+    _transliterate = transliterate
+    if GREETING_POOL_ENABLED:
+        _ensure_warmer()
+
+
+def take_greeting(conversation_type, child_name, child_age, child_gender):
+    """A ready opening turn for this child, or None on a pool miss or any pool error.
+
+    Returns {'text', 'text_roman', 'audio'} with raw audio bytes. A miss (or a hit)
+    marks the profile as in demand so the warmer keeps its pool topped up; types
+    without an initial prompt are never pooled and fall through to the live path.
+    """
+    if not GREETING_POOL_ENABLED or _initial_prompt is None:
+        return None
+    profile = (conversation_type, child_gender, child_age)
+    try:
+        key = _pool_key(profile)
+    except Exception as e:
+        logger.warning(f"Failed to build greeting pool key for {conversation_type}: {e}")
+        return None
+    if key is None:
+        return None
+    _record_demand(profile)
+    _ensure_warmer()
+
+    entry = _pop(key)
+    if entry is None:
+        CACHE_REQUESTS.inc(cache='greeting_pool', result='miss')
+        _wake.set()
+        return None
+    try:
+        greeting = _render(entry, child_name)
+    except Exception as e:
+        logger.warning(f"Failed to personalize pooled greeting for {conversation_type}: {e}")
+        CACHE_REQUESTS.inc(cache='greeting_pool', result='miss')
+        return None
+    CACHE_REQUESTS.inc(cache='greeting_pool', result='hit')
+    _wake.set()
+    return greeting
+
+
+def _placeholder(child_gender):
+    return NAME_PLACEHOLDERS.get((child_gender or '').lower(), DEFAULT_NAME_PLACEHOLDER)
+
+
+def _pool_key(profile):
+    """Pool key for a profile; changes whenever its prompt or the TTS voice changes."""
+    conversation_type, child_gender, child_age = profile
+    prompt = _initial_prompt(_placeholder(child_gender), child_age, child_gender, conversation_type)
+    if prompt is None:
+        return None
+    tts = providers.get('tts')
+    fingerprint = hashlib.sha1(f"{tts.name}:{tts.model}:{prompt}".encode('utf-8')).hexdigest()[:12]
+    return GREETING_POOL_KEY.format(f"{conversation_type}:{child_gender}:{child_age}:{fingerprint}")
+
+
+def _expired(entry):
+    return time.time() - entry['created'] > GREETING_POOL_MAX_AGE_SECONDS
+
+
+def _pop(key):
+    while True:
+        if _redis is not None:
+            try:
+                raw = _redis.lpop(key)
+            except Exception as e:
+                logger.warning(f"Failed to pop pooled greeting: {e}")
+                return None
+            entry = json.loads(raw) if raw else None
+        else:
+            with _local_lock:
+                pool = _pools.get(key)
+                entry = pool.popleft() if pool else None
+        if entry is None or not _expired(entry):
+            return entry
+
+
+def _render(entry, child_name):
+    """Splice the child's name into a pooled greeting's text, roman text and audio."""
+    text_parts = entry['text_parts']
+    name_audio, name_roman = None, ''
+    if len(text_parts) > 1:
+        name_audio, name_roman = name_speech(child_name)
+        if not name_audio:
+            raise ValueError("name synthesis failed")
+    segments = []
+    for i, part in enumerate(entry['audio_parts']):
+        if i:
+            segments.append(name_audio)
+        if part:
+            segments.append(base64.b64decode(part))
+    roman_parts = entry['roman_parts']
+    if roman_parts is None or (len(text_parts) > 1 and not name_roman):
+        text_roman = ''  # same as a failed transliteration on the live path
+    else:
+        text_roman = name_roman.join(roman_parts)
+    return {
+        'text': child_name.join(text_parts),
+        'text_roman': text_roman,
+        'audio': concat_audio(segments, entry['content_type']),
+    }
+
+
+def _record_demand(profile):
+    member = json.dumps(list(profile), ensure_ascii=False)
+    if _redis is not None:
+        try:
+            _redis.zadd(GREETING_DEMAND_KEY, {member: time.time()})
+        except Exception as e:
+            logger.warning(f"Failed to record greeting demand: {e}")
+        return
+    with _local_lock:
+        _demand[member] = time.time()
+
+
+def _demanded_profiles():
+    cutoff = time.time() - GREETING_POOL_DEMAND_DAYS * 86400
+    if _redis is not None:
+        _redis.zremrangebyscore(GREETING_DEMAND_KEY, 0, cutoff)
+        members = _redis.zrevrangebyscore(GREETING_DEMAND_KEY, '+inf', cutoff,
+                                          start=0, num=GREETING_POOL_MAX_PROFILES)
+    else:
+        with _local_lock:
+            recent = sorted(((ts, m) for m, ts in _demand.items() if ts >= cutoff), reverse=True)
+        members = [m for _, m in recent[:GREETING_POOL_MAX_PROFILES]]
+    return [tuple(json.loads(m)) for m in members]
+
+
+def _ensure_warmer():
+    """Start the warmer thread once per process (re-started after a fork)."""
+    global _warmer_pid
+    if _app is None or _warmer_pid == os.getpid():
+        return
+    with _warmer_lock:
+        if _warmer_pid == os.getpid():
+            return
+        _warmer_pid = os.getpid()
+        threading.Thread(target=_warmer_loop, name='greeting-warmer', daemon=True).start()
+
+
+def _warmer_loop():
+    while True:
+        _wake.wait(GREETING_POOL_REFILL_INTERVAL)
+        _wake.clear()
+        try:
+            _refill()
+        except Exception as e:
+            logger.warning(f"Greeting pool refill failed: {e}")
+
+
+def _refill():
+    """Top up every in-demand pool. With Redis, one worker at a time does this."""
+    if _redis is not None and not _redis.set(GREETING_WARMER_LOCK_KEY, os.getpid(), nx=True,
+                                             ex=GREETING_POOL_LOCK_SECONDS):
+        return
+    try:
+        built = 0
+        for profile in _demanded_profiles():
+            try:
+                key = _pool_key(profile)
+                if key is None:
+                    continue
+                for _ in range(GREETING_POOL_SIZE - _live_size(key)):
+                    entry = _build_entry(profile)
+                    if entry is None:
+                        break
+                    _push(key, entry)
+                    built += 1
+            except Exception as e:
+                # One bad profile (e.g. a type that no longer exists) must not starve the rest
+                logger.warning(f"Greeting pool refill failed for {profile}: {e}")
+            if _redis is not None:
+                _redis.expire(GREETING_WARMER_LOCK_KEY, GREETING_POOL_LOCK_SECONDS)
+        if built:
+            logger.info(f"👋 GREETING POOL: warmed {built} greetings")
+    finally:
+        if _redis is not None:
+            _redis.delete(GREETING_WARMER_LOCK_KEY)
+
+
+def _live_size(key):
+    """Pool size after dropping expired variants from the head (oldest first)."""
+    if _redis is not None:
+        while True:
+            head = _redis.lindex(key, 0)
+            if head is None or not _expired(json.loads(head)):
+                break
+            _redis.lpop(key)
+        return _redis.llen(key)
+    with _local_lock:
+        pool = _pools.get(key)
+        while pool and _expired(pool[0]):
+            pool.popleft()
+        return len(pool) if pool else 0
+
+
+def _push(key, entry):
+    if _redis is not None:
+        pipe = _redis.pipeline(transaction=False)
+        pipe.rpush(key, json.dumps(entry, ensure_ascii=False))
+        pipe.expire(key, GREETING_POOL_MAX_AGE_SECONDS)
+        pipe.execute()
+        return
+    with _local_lock:
+        _pools.setdefault(key, deque()).append(entry)
+
+
+def _keep_spacing(original, converted):
+    """Carry a fragment's surrounding whitespace over to its transliteration."""
+    stripped = original.strip()
+    if not stripped:
+        return original
+    start = original.index(stripped)
+    return original[:start] + converted.strip() + original[start + len(stripped):]
+
+
+def _build_entry(profile):
+    """Generate, split, synthesize and transliterate one greeting variant."""
+    conversation_type, child_gender, child_age = profile
+    placeholder = _placeholder(child_gender)
+    prompt = _initial_prompt(placeholder, child_age, child_gender, conversation_type)
+    try:
+        text = _generate(prompt)
+    except Exception as e:
+        logger.warning(f"Greeting generation failed for {conversation_type}: {e}")
+        return None
+
+    tts = providers.get('tts')
+    text_parts = text.split(placeholder)
+    audio_parts = []
+    roman_parts = []
+    for part in text_parts:
+        if not part.strip():
+            audio_parts.append(None)
+            roman_parts.append(part)
+            continue
+        audio = _synthesize(part.strip())
+        if not audio:
+            logger.warning(f"Greeting synthesis failed for {conversation_type}")
+            return None
+        audio_parts.append(base64.b64encode(audio).decode('ascii'))
+        roman = _transliterate(part.strip())
+        roman_parts.append(_keep_spacing(part, roman) if roman else None)
+    return {
+        'text_parts': text_parts,
+        'roman_parts': roman_parts if None not in roman_parts else None,
+        'audio_parts': audio_parts,
+        'content_type': tts.content_type,
+        'created': time.time(),
+    }
@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Each worker accumulates locally and flushes deltas to Redis on this interval, so an
+# observation never costs a network round trip. /metrics renders the Redis totals,
+# which aggregate every gunicorn worker on every dyno (the Heroku router can't scrape
+# workers individually anyway). Without Redis, /metrics shows this process only.
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+# Gauges from workers that haven't flushed for this long are dropped from the output
+METRICS_WORKER_TTL_SECONDS = 60
+METRICS_KEY = 'metrics:{}'
+METRICS_WORKERS_KEY = 'metrics:workers'
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0)
+
+_metrics = {}
+_redis = None
+_pending_lock = threading.Lock()
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+_gauge_callbacks = []
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def init_metrics(redis_client=None):
+    """Aggregate through redis_client across workers; None keeps metrics per process."""
+    global _redis
+    _redis = redis_client
+
+
+def _field(*parts):
+    return json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        if name in _metrics:
+            raise ValueError(f"Duplicate metric: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._totals = {}   # field -> value since process start
+        self._pending = {}  # field -> delta not yet flushed to Redis
+        _metrics[name] = self
+
+    def _labels(self, labels):
+        return tuple('' if labels.get(name) is None else str(labels[name]) for name in self.labelnames)
+
+    def _add(self, field, amount):
+        with _pending_lock:
+            self._totals[field] = self._totals.get(field, 0) + amount
+            self._pending[field] = self._pending.get(field, 0) + amount
+        _ensure_flusher()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self._add(_field(*self._labels(labels)), amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, seconds, **labels):
+        label_values = self._labels(labels)
+        # Stored per bucket (not cumulative); rendering accumulates
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with _pending_lock:
+            for field, amount in ((_field(*label_values, 'b', index), 1),
+                                  (_field(*label_values, 'sum'), seconds),
+                                  (_field(*label_values, 'count'), 1)):
+                self._totals[field] = self._totals.get(field, 0) + amount
+                self._pending[field] = self._pending.get(field, 0) + amount
+        _ensure_flusher()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class Gauge(_Metric):
+    """Point-in-time value per worker; the rendered value is the sum across live workers."""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with _pending_lock:
+            self._totals[_field(*self._labels(labels))] = value
+        _ensure_flusher()
+
+
+def register_gauge_callback(gauge, fn, **labels):
+    """Sample fn() into gauge on every flush (e.g. a queue's current depth)."""
+    _gauge_callbacks.append((gauge, fn, labels))
+
+
+def _sample_gauges():
+    for gauge, fn, labels in _gauge_callbacks:
+        try:
+            gauge.set(fn(), **labels)
+        except Exception as e:
+            logger.debug(f"Gauge callback for {gauge.name} failed: {e}")
+
+
+def _ensure_flusher():
+    """Start the flusher once per process (re-started after a fork)."""
+    global _flusher_pid, WORKER_ID
+    if _redis is None or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+        threading.Thread(target=_flush_loop, name='metrics-flusher', daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            flush_metrics()
+        except Exception as e:
+            logger.warning(f"Metrics flush failed: {e}")
+
+
+def flush_metrics():
+    """Push pending counter/histogram deltas and current gauge values to Redis."""
+    if _redis is None:
+        return
+    _sample_gauges()
+    with _pending_lock:
+        pending = {metric: metric._pending for metric in _metrics.values() if metric._pending}
+        for metric in pending:
+            metric._pending = {}
+        gauges = {metric: dict(metric._totals) for metric in _metrics.values() if metric.kind == 'gauge'}
+
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for metric, deltas in pending.items():
+            for field, amount in deltas.items():
+                pipe.hincrbyfloat(METRICS_KEY.format(metric.name), field, amount)
+        for metric, values in gauges.items():
+            for field, value in values.items():
+                labels = json.loads(field)
+                pipe.hset(METRICS_KEY.format(metric.name), _field(*labels, WORKER_ID), value)
+        pipe.hset(METRICS_WORKERS_KEY, WORKER_ID, time.time())
+        pipe.execute()
+    except Exception:
+        # Put the deltas back so they go out with the next flush
+        with _pending_lock:
+            for metric, deltas in pending.items():
+                for field, amount in deltas.items():
+                    metric._pending[field] = metric._pending.get(field, 0) + amount
+        raise
+
+
+def _read_values():
+    """name -> {field: value} from Redis (all workers), or local totals without Redis."""
+    if _redis is None:
+        _sample_gauges()
+        with _pending_lock:
+            return {name: dict(metric._totals) for name, metric in _metrics.items()}
+
+    pipe = _redis.pipeline(transaction=False)
+    names = list(_metrics)
+    for name in names:
+        pipe.hgetall(METRICS_KEY.format(name))
+    pipe.hgetall(METRICS_WORKERS_KEY)
+    results = pipe.execute()
+    workers = {k.decode() if isinstance(k, bytes) else k: float(v) for k, v in results[-1].items()}
+    live = {worker for worker, seen in workers.items() if time.time() - seen < METRICS_WORKER_TTL_SECONDS}
+
+    values = {}
+    for name, raw in zip(names, results[:-1]):
+        metric = _metrics[name]
+        fields = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            value = float(value)
+            if metric.kind == 'gauge':
+                *labels, worker = json.loads(field)
+                if worker not in live:
+                    continue
+                field = _field(*labels)
+            fields[field] = fields.get(field, 0) + value
+        values[name] = fields
+    return values
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    values = _read_values()
+    lines = []
+    for name, metric in _metrics.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        fields = values.get(name, {})
+        if metric.kind != 'histogram':
+            for field, value in sorted(fields.items()):
+                lines.append(f"{name}{_label_str(metric.labelnames, json.loads(field))} {_number(value)}")
+            continue
+
+        # Fields are [labels..., 'b', bucket_index], [labels..., 'sum'] or [labels..., 'count']
+        series = {}
+        for field, value in fields.items():
+            decoded = json.loads(field)
+            if len(decoded) >= 2 and decoded[-2] == 'b':
+                labels, key = tuple(decoded[:-2]), ('b', int(decoded[-1]))
+            else:
+                labels, key = tuple(decoded[:-1]), decoded[-1]
+            series.setdefault(labels, {})[key] = value
+        for labels, parts in sorted(series.items()):
+            cumulative = 0
+            bounds = [_number(bound) for bound in metric.buckets] + ['+Inf']
+            for index, bound in enumerate(bounds):
+                cumulative += parts.get(('b', index), 0)
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_label_str(metric.labelnames, labels, le)} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_label_str(metric.labelnames, labels)} {_number(parts.get('sum', 0))}")
+            lines.append(f"{name}_count{_label_str(metric.labelnames, labels)} {_number(parts.get('count', 0))}")
+    return '\n'.join(lines) + '\n'
+
+
+# ─── Metric definitions ───────────────────────────────────────────────
+
+STT_LATENCY = Histogram('stt_latency_seconds', 'Speech-to-text latency per call',
+                        ('provider', 'model'))
+LLM_TTFT = Histogram('llm_ttft_seconds', 'Time to first streamed LLM chunk',
+                     ('provider', 'model'))
+LLM_LATENCY = Histogram('llm_latency_seconds', 'Total LLM call latency',
+                        ('provider', 'model', 'mode'))
+TTS_LATENCY = Histogram('tts_latency_seconds', 'Text-to-speech latency per call',
+                        ('provider', 'model'))
+TTS_TTFB = Histogram('tts_ttfb_seconds', 'Time to first streamed text-to-speech audio chunk',
+                     ('provider', 'model'))
+TRANSLITERATION_LATENCY = Histogram('transliteration_latency_seconds', 'Transliteration latency per call',
+                                    ('provider', 'direction'), buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0))
+DB_COMMIT_LATENCY = Histogram('db_commit_seconds', 'Database commit latency',
+                              ('operation',), buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+PROVIDER_FALLBACKS = Counter('provider_fallbacks_total', 'Fallbacks from a primary backend to a secondary one',
+                             ('component', 'from_backend', 'to_backend'))
+PROVIDER_ROUTES = Counter('provider_routes_total', 'Calls by the backend the router chose first and why',
+                          ('component', 'backend', 'reason'))
+VENDOR_FAST_FAILS = Counter('vendor_fast_fails_total', 'Vendor calls skipped because the circuit was open or the deadline had passed',
+                            ('vendor', 'reason'))
+DEADLINE_DEGRADED = Counter('deadline_degraded_total', 'Results replaced by a fallback because the request deadline passed',
+                            ('component',))
+ADMISSION_DECISIONS = Counter('admission_decisions_total', 'Expensive-endpoint requests by admission outcome',
+                              ('request_class', 'result'))
+LLM_JSON_FAILURES = Counter('llm_json_parse_failures_total', 'LLM JSON-mode responses that failed to parse',
+                            ('provider', 'model'))
+SSE_DISCONNECTS = Counter('sse_disconnects_total', 'Streaming responses closed by the client before completion',
+                          ('route',))
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result',
+                         ('cache', 'result'))
+TTS_CHARACTERS = Counter('tts_characters_total', 'Characters of spoken text by where the audio came from',
+                         ('source',))
+EXECUTOR_QUEUE_DEPTH = Gauge('executor_queue_depth', 'Work items waiting in background pools and buffers',
+                             ('pool',))
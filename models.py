@@ -141,11 +141,17 @@ class Conversation(db.Model):
     # Conversation data
     conversation_history = db.Column(db.Text, nullable=True)  # JSON string
     amber_responses = db.Column(db.Text, nullable=True)  # JSON string
+    last_user_preview = db.Column(db.String(60), nullable=True)  # Maintained by conversation_data setter
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     ended_at = db.Column(db.DateTime, nullable=True)
+
+    # Keyset pagination for the history sidebar: (user_id, created_at, id)
+    __table_args__ = (
+        db.Index('ix_conversation_user_created_id', 'user_id', 'created_at', 'id'),
+    )
     
     # Computed properties
     @property
@@ -167,8 +173,18 @@ class Conversation(db.Model):
     
     @conversation_data.setter
     def conversation_data(self, data):
-        """Set conversation history as JSON"""
+        """Set conversation history as JSON and refresh the last-user-message preview"""
         self.conversation_history = json.dumps(data, ensure_ascii=False)
+        self.last_user_preview = Conversation.build_preview(data)
+
+    @staticmethod
+    def build_preview(history):
+        """Preview of the last user message (50 chars) for the history sidebar"""
+        for msg in reversed(history or []):
+            if msg.get('role') == 'user':
+                content = msg.get('content', '')
+                return content[:50] + "..." if len(content) > 50 else content
+        return None
     
     @property
     def amber_data(self):
@@ -206,9 +222,11 @@ class ConversationAudio(db.Model):
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False)
     turn_index = db.Column(db.Integer, nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'user' or 'assistant'
-    s3_key = db.Column(db.String(500), nullable=False)
+    s3_key = db.Column(db.String(500), nullable=False, index=True)
     audio_format = db.Column(db.String(20), default='webm')
     file_size_bytes = db.Column(db.Integer, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)  # Set after archival transcode
+    bitrate_kbps = db.Column(db.Integer, nullable=True)
     upload_status = db.Column(db.String(20), default='pending')  # pending / uploaded / failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -223,6 +241,8 @@ class ConversationAudio(db.Model):
             's3_key': self.s3_key,
             'audio_format': self.audio_format,
             'file_size_bytes': self.file_size_bytes,
+            'duration_ms': self.duration_ms,
+            'bitrate_kbps': self.bitrate_kbps,
             'upload_status': self.upload_status,
             'created_at': self.created_at.isoformat(),
         }
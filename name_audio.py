@@ -0,0 +1,101 @@
+import time
+import base64
+import hashlib
+import logging
+import threading
+
+from providers import providers
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# The child's name is the token TTS gets wrong most often. It is rendered once per voice
+# (at profile setup) and spliced into pooled greetings (greeting_pool.py), so every
+# greeting says the name the same way.
+NAME_AUDIO_TTL_SECONDS = 30 * 24 * 3600
+
+NAME_AUDIO_KEY = 'tts_name:{}'
+
+_redis = None
+_synthesize = None
+_transliterate = None
+_local = {}  # cache key -> (audio, roman), when there is no Redis
+_local_lock = threading.Lock()
+
+
+def init_name_audio(redis_client=None, synthesize=None, transliterate=None):
+    """synthesize(text) -> audio bytes or None; transliterate(text) -> roman text or ''."""
+    global _redis, _synthesize, _transliterate
+    _redis = redis_client
+    _synthesize = synthesize
+    _transliterate = transliterate
+
+
+def _cache_key(pattern, text):
+    tts = providers.get('tts')
+    return pattern.format(hashlib.sha1(f"{tts.name}:{tts.model}:{text}".encode('utf-8')).hexdigest())
+
+
+def _lookup(cache, cache_key):
+    """(audio bytes, roman text) if cached, else None. Never synthesizes."""
+    if _redis is not None:
+        try:
+            cached = _redis.hgetall(cache_key)
+            if cached:
+                return base64.b64decode(cached[b'audio']), cached.get(b'roman', b'').decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Failed to read {cache} cache: {e}")
+        return None
+    with _local_lock:
+        return _local.get(cache_key)
+
+
+def _cached_speech(cache, pattern, ttl, text, with_roman=False):
+    """(audio bytes, roman text) for text in the tutor voice, synthesized at most once per TTL."""
+    cache_key = _cache_key(pattern, text)
+    cached = _lookup(cache, cache_key)
+    if cached:
+        CACHE_REQUESTS.inc(cache=cache, result='hit')
+        return cached
+
+    CACHE_REQUESTS.inc(cache=cache, result='miss')
+    audio = _synthesize(text)
+    if not audio:
+        return None, ''
+    roman = (_transliterate(text) or '') if with_roman else ''
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            pipe.hset(cache_key, mapping={'audio': base64.b64encode(audio), 'roman': roman})
+            pipe.expire(cache_key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to write {cache} cache: {e}")
+    else:
+        with _local_lock:
+            if len(_local) >= 1000:
+                _local.clear()
+            _local[cache_key] = (audio, roman)
+    return audio, roman
+
+
+def name_speech(name):
+    """(audio bytes, roman text) for a child's name in the tutor voice."""
+    return _cached_speech('name_audio', NAME_AUDIO_KEY, NAME_AUDIO_TTL_SECONDS, name, with_roman=True)
+
+
+def warm_name(name):
+    """Render a name in the background (called when a profile is saved)."""
+    if not name or _synthesize is None:
+        return
+
+    def render():
+        start = time.time()
+        try:
+            audio, roman = name_speech(name)
+            if audio:
+                logger.info(f"🗣️ NAME AUDIO: cached '{name}' ({roman}) in {(time.time() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"Failed to pre-render name audio: {e}")
+
+    threading.Thread(target=render, name='name-audio', daemon=True).start()
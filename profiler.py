@@ -0,0 +1,244 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import functools
+from collections import deque
+
+from flask import request, make_response
+
+from tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+# Fraction of decorated turns profiled without being asked (0 = only on request)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+# A request carrying `X-Profile: <PROFILE_TOKEN>` is always profiled. Unset disables the header.
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_HEADER = 'X-Profile'
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '10'))
+# Hard stop for a sampler, in case a stream is never closed
+PROFILE_MAX_SECONDS = 60
+# Concurrent profiles per worker; more would start to distort what they measure
+PROFILE_MAX_ACTIVE = 2
+PROFILE_RETENTION_SECONDS = 3 * 24 * 3600
+PROFILE_KEY = 'profile:{}'
+PROFILE_INDEX_KEY = 'profiles:index'
+SAMPLER_THREAD_NAME = 'profile-sampler'
+
+_redis = None
+_local = deque(maxlen=20)  # fallback store when there is no Redis
+_active = 0
+_active_lock = threading.Lock()
+
+
+def init_profiler(redis_client=None):
+    """Store finished profiles in Redis so any worker can serve the admin download."""
+    global _redis
+    _redis = redis_client
+
+
+def _thread_group(name):
+    """'ThreadPoolExecutor-12_3' -> 'ThreadPoolExecutor' so per-request pools merge."""
+    return re.sub(r'[-_]?\d+(_\d+)?$', '', name) or 'thread'
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Wall-clock stack sampler over every thread in the process.
+
+    Samples all threads rather than only the turn's: executor threads and GIL
+    holders from other requests are exactly what slows a turn down. The thread
+    that served the request is rooted at 'request'; others at their thread name.
+    """
+
+    def __init__(self, name, trigger):
+        self.profile_id = '%016x' % random.getrandbits(64)
+        self.name = name
+        self.trigger = trigger
+        self.interval = PROFILE_INTERVAL_MS / 1000.0
+        self.request_thread = threading.get_ident()
+        span = current_span()
+        self.trace_id = span.trace.trace_id if span.trace is not None else None
+        self.started = time.time()
+        self.duration_ms = None
+        self.samples = 0
+        self.truncated = False
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # The sampler saves the profile itself, so nothing is written on the request path
+        self._stop.set()
+
+    def _run(self):
+        global _active
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        try:
+            while not self._stop.wait(self.interval):
+                if time.monotonic() > deadline:
+                    self.truncated = True
+                    break
+                self._sample()
+            self.duration_ms = round((time.time() - self.started) * 1000, 1)
+            _save(self)
+            logger.info(f"🔥 PROFILE {self.profile_id[:8]}: {self.name} {self.duration_ms:.0f}ms, "
+                        f"{self.samples} samples, {len(self.counts)} stacks ({self.trigger})")
+        except Exception as e:
+            logger.warning(f"Profiler failed: {e}")
+        finally:
+            with _active_lock:
+                _active -= 1
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id, 'thread')
+            if name == SAMPLER_THREAD_NAME:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append('request' if thread_id == self.request_thread else _thread_group(name))
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Brendan Gregg's folded format: 'root;caller;callee count' per line."""
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+    def summary(self):
+        return {
+            'profile_id': self.profile_id,
+            'name': self.name,
+            'trigger': self.trigger,
+            'trace_id': self.trace_id,
+            'started': self.started,
+            'duration_ms': self.duration_ms,
+            'samples': self.samples,
+            'interval_ms': PROFILE_INTERVAL_MS,
+            'truncated': self.truncated,
+            'worker_pid': os.getpid(),
+        }
+
+
+def _trigger():
+    """Why this request should be profiled, or None."""
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return 'header'
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sampled'
+    return None
+
+
+def start_profile(name, trigger):
+    """Start sampling, or return None if this worker is already at PROFILE_MAX_ACTIVE."""
+    global _active
+    with _active_lock:
+        if _active >= PROFILE_MAX_ACTIVE:
+            return None
+        _active += 1
+    try:
+        return Profile(name, trigger).start()
+    except Exception:
+        with _active_lock:
+            _active -= 1
+        raise
+
+
+def _stop_after(iterable, profile):
+    try:
+        yield from iterable
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close:
+            close()
+        profile.stop()
+
+
+def profile_request(name):
+    """View decorator: sample stacks for the whole request, including a streamed body.
+
+    Apply under @trace_request so the profile is linked to the turn's trace.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            trigger = _trigger()
+            profile = start_profile(name, trigger) if trigger else None
+            if profile is None:
+                return view(*args, **kwargs)
+            current_span().set_attribute('profile_id', profile.profile_id)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                profile.stop()
+                raise
+            response.headers['X-Profile-Id'] = profile.profile_id
+            if response.is_streamed:
+                response.response = _stop_after(iter(response.response), profile)
+            else:
+                profile.stop()
+            return response
+        return wrapper
+    return decorator
+
+
+def _save(profile):
+    record = dict(profile.summary(), collapsed=profile.collapsed())
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            pipe.setex(PROFILE_KEY.format(profile.profile_id), PROFILE_RETENTION_SECONDS, json.dumps(record))
+            pipe.zadd(PROFILE_INDEX_KEY, {profile.profile_id: profile.started})
+            pipe.zremrangebyscore(PROFILE_INDEX_KEY, 0, time.time() - PROFILE_RETENTION_SECONDS)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"Failed to store profile in Redis, keeping it on this worker: {e}")
+    _local.append(record)
+
+
+def recent_profiles(limit=50):
+    """Summaries of stored profiles, newest first."""
+    records = []
+    if _redis is not None:
+        try:
+            ids = _redis.zrevrange(PROFILE_INDEX_KEY, 0, limit - 1)
+            if ids:
+                for raw in _redis.mget([PROFILE_KEY.format(i.decode() if isinstance(i, bytes) else i) for i in ids]):
+                    if raw:
+                        records.append(json.loads(raw))
+        except Exception as e:
+            logger.warning(f"Failed to list profiles from Redis: {e}")
+    records.extend(reversed(_local))
+    records.sort(key=lambda r: r['started'], reverse=True)
+    return [{k: v for k, v in r.items() if k != 'collapsed'} for r in records[:limit]]
+
+
+def find_profile(profile_id):
+    if _redis is not None:
+        try:
+            raw = _redis.get(PROFILE_KEY.format(profile_id))
+            if raw:
+                return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Failed to load profile from Redis: {e}")
+    for record in _local:
+        if record['profile_id'] == profile_id:
+            return record
+    return None
@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+from providers import DeadlineExceeded
+from metrics import PROVIDER_FALLBACKS, PROVIDER_ROUTES, WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+# Each call goes to the backend with the lowest expected cost: its EWMA latency, plus a
+# penalty for its recent error rate, minus a bonus per quality tier (so Chirp 3 keeps
+# winning over V1 unless it is clearly slower). Backends whose circuit is open are
+# skipped until a probe succeeds. State is per worker; it converges within a few calls.
+ROUTING_EWMA_ALPHA = float(os.environ.get('ROUTING_EWMA_ALPHA', '0.2'))
+# Latency a backend one quality tier higher may cost before a faster one wins
+ROUTING_QUALITY_SLACK_MS = float(os.environ.get('ROUTING_QUALITY_SLACK_MS', '400'))
+# Expected cost of a failure (roughly one fallback round trip), weighted by the error rate
+ROUTING_ERROR_PENALTY_MS = float(os.environ.get('ROUTING_ERROR_PENALTY_MS', '2000'))
+# Share of calls sent to a non-preferred healthy backend so its numbers stay current
+ROUTING_EXPLORE_RATE = float(os.environ.get('ROUTING_EXPLORE_RATE', '0.05'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_COOLDOWN_SECONDS = float(os.environ.get('CIRCUIT_COOLDOWN_SECONDS', '30'))
+ROUTING_LATENCY_WINDOW = 200  # successful call latencies kept per backend for percentiles
+ROUTING_DECISION_HISTORY = 200
+# Workers publish their routing state so the admin view covers every dyno
+ROUTING_PUBLISH_INTERVAL = 10
+ROUTING_WORKER_TTL_SECONDS = 60
+ROUTING_KEY = 'routing:workers'
+
+_redis = None
+_routers = {}
+_routers_lock = threading.Lock()
+_published_at = 0.0
+
+
+def init_provider_router(redis_client=None):
+    """Without Redis the admin view shows only the worker that served it."""
+    global _redis
+    _redis = redis_client
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls for
+    `cooldown_seconds`; then one probe call is let through (half-open) and its outcome
+    closes or re-opens the circuit."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown_seconds=CIRCUIT_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _cooled_down(self):
+        return self.state == self.OPEN and time.time() - self.opened_at >= self.cooldown_seconds
+
+    def available(self):
+        """Whether allow() would currently let a call through (without claiming the probe)."""
+        with self._lock:
+            return self.state == self.CLOSED or self._cooled_down() or (self.state == self.HALF_OPEN and not self._probing)
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self._cooled_down():
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"✅ CIRCUIT: {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                logger.warning(f"⛔ CIRCUIT: {self.name} open for {self.cooldown_seconds:.0f}s after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self._probing = False
+
+    def release(self):
+        """Give back a half-open probe whose outcome says nothing about the vendor."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'opened_at': self.opened_at or None,
+            }
+
+
+class Backend:
+    """One way of serving a capability (e.g. STT via Chirp 3), with its live telemetry."""
+
+    def __init__(self, component, name, call, model=None, quality=0, available=None):
+        self.name = name
+        self.call = call
+        self.model = model
+        self.quality = quality
+        self._available = available
+        self.breaker = CircuitBreaker(f"{component}/{name}")
+        self.latency_ms = None  # EWMA over successful calls
+        self.error_rate = 0.0   # EWMA of failures (1) and successes (0)
+        self.calls = 0
+        self.errors = 0
+        self.last_error = None
+        self._latencies = deque(maxlen=ROUTING_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def configured(self):
+        if self._available is None:
+            return True
+        try:
+            return bool(self._available())
+        except Exception:
+            return False
+
+    def record(self, ok, elapsed_ms, error=None):
+        with self._lock:
+            self.calls += 1
+            self.error_rate = ROUTING_EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - ROUTING_EWMA_ALPHA) * self.error_rate
+            if ok:
+                self.latency_ms = elapsed_ms if self.latency_ms is None else (
+                    ROUTING_EWMA_ALPHA * elapsed_ms + (1 - ROUTING_EWMA_ALPHA) * self.latency_ms)
+                self._latencies.append(elapsed_ms)
+            else:
+                self.errors += 1
+                self.last_error = error
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def score(self):
+        """Expected cost in ms; unmeasured backends score 0 so they get tried."""
+        return ((self.latency_ms or 0.0) + self.error_rate * ROUTING_ERROR_PENALTY_MS
+                - self.quality * ROUTING_QUALITY_SLACK_MS)
+
+    def percentile(self, p):
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p / 100.0 * len(samples)))]
+
+    def snapshot(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            'name': self.name,
+            'model': self.model,
+            'quality': self.quality,
+            'configured': self.configured(),
+            'ewma_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'p50_ms': round(p50, 1) if p50 is not None else None,
+            'p95_ms': round(p95, 1) if p95 is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'calls': self.calls,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'score': round(self.score(), 1),
+            'circuit': self.breaker.snapshot(),
+        }
+
+
+class Router:
+    """Sends each call to the best healthy backend and falls through the rest on failure.
+
+    A backend fails only when it raises. Whatever it returns, including an empty
+    transcript for a silent clip, is the result: retrying elsewhere would cost another
+    paid call and count against a healthy backend. If every backend fails, call()
+    returns None (the providers' "None on failure" contract). min_quality drops
+    backends below a quality tier.
+    """
+
+    def __init__(self, component, min_quality=0):
+        self.component = component
+        self.min_quality = min_quality
+        self._backends = []
+        self._decisions = deque(maxlen=ROUTING_DECISION_HISTORY)
+
+    def add(self, name, call, model=None, quality=0, available=None):
+        self._backends.append(Backend(self.component, name, call, model=model, quality=quality, available=available))
+        return self
+
+    def plan(self):
+        """(ordered backends to try, reason for the first choice)."""
+        eligible = [b for b in self._backends if b.quality >= self.min_quality and b.configured()]
+        healthy = sorted((b for b in eligible if b.breaker.available()), key=lambda b: b.score())
+        if not healthy:
+            # Every circuit is open: try the one that tripped longest ago rather than fail outright
+            return sorted(eligible, key=lambda b: b.breaker.opened_at), 'all_open'
+        if len(healthy) > 1 and random.random() < ROUTING_EXPLORE_RATE:
+            healthy.insert(0, healthy.pop(random.randrange(1, len(healthy))))
+            return healthy, 'explore'
+        return healthy, 'fastest'
+
+    def call(self, *args, **kwargs):
+        order, reason = self.plan()
+        if not order:
+            logger.error(f"❌ ROUTING: no {self.component} backend configured")
+            return None
+
+        ranking = [{'backend': b.name, 'score': round(b.score(), 1)} for b in order]
+        attempts = []
+        result = None
+        previous = None
+        for backend in order:
+            if reason != 'all_open' and not backend.breaker.allow():
+                continue  # another call took the half-open probe
+            if previous:
+                logger.info(f"🔄 ROUTING: {self.component} {previous.name} failed, falling back to {backend.name}")
+                PROVIDER_FALLBACKS.inc(component=self.component, from_backend=previous.name, to_backend=backend.name)
+            start = time.perf_counter()
+            error = None
+            try:
+                result = backend.call(*args, **kwargs)
+            except DeadlineExceeded as e:
+                # The caller's budget is spent, not the backend's fault; the others would fail the same way
+                logger.warning(f"⏱️ ROUTING: {self.component} skipped {backend.name}: {e}")
+                backend.breaker.release()
+                break
+            except Exception as e:
+                result = None
+                error = str(e)
+                logger.warning(f"❌ ROUTING: {self.component}/{backend.name} raised: {e}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            backend.record(error is None, elapsed_ms, error)
+            attempts.append({'backend': backend.name, 'ms': round(elapsed_ms, 1), 'ok': error is None})
+            if error is None:
+                break
+            previous = backend
+
+        chosen = attempts[0]['backend'] if attempts else None
+        PROVIDER_ROUTES.inc(component=self.component, backend=chosen, reason=reason)
+        self._decisions.append({
+            'time': time.time(),
+            'reason': reason,
+            'ranking': ranking,
+            'attempts': attempts,
+        })
+        _maybe_publish()
+        return result
+
+    def snapshot(self, limit=50):
+        return {
+            'min_quality': self.min_quality,
+            'backends': [b.snapshot() for b in self._backends],
+            'decisions': list(self._decisions)[-limit:][::-1],
+        }
+
+
+def router(component, min_quality=0):
+    """The process-wide router for a component (created on first use)."""
+    with _routers_lock:
+        if component not in _routers:
+            _routers[component] = Router(component, min_quality=min_quality)
+        return _routers[component]
+
+
+def _snapshot(limit):
+    return {component: r.snapshot(limit) for component, r in _routers.items()}
+
+
+def _maybe_publish():
+    global _published_at
+    now = time.time()
+    if _redis is None or now - _published_at < ROUTING_PUBLISH_INTERVAL:
+        return
+    _published_at = now
+    try:
+        _redis.hset(ROUTING_KEY, WORKER_ID, json.dumps({'updated_at': now, 'routers': _snapshot(20)}, ensure_ascii=False))
+    except Exception as e:
+        logger.debug(f"Failed to publish routing state: {e}")
+
+
+def routing_status(limit=50):
+    """This worker's routers, plus the latest state other workers published."""
+    workers = {}
+    if _redis is not None:
+        try:
+            now = time.time()
+            stale = []
+            for worker_id, raw in _redis.hgetall(ROUTING_KEY).items():
+                worker_id = worker_id.decode() if isinstance(worker_id, bytes) else worker_id
+                state = json.loads(raw)
+                if now - state.get('updated_at', 0) >= ROUTING_WORKER_TTL_SECONDS:
+                    stale.append(worker_id)
+                elif worker_id != WORKER_ID:
+                    workers[worker_id] = state
+            if stale:
+                _redis.hdel(ROUTING_KEY, *stale)
+        except Exception as e:
+            logger.warning(f"Failed to read routing state from Redis: {e}")
+    return {'worker': WORKER_ID, 'routers': _snapshot(limit), 'other_workers': workers}
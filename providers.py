@@ -0,0 +1,357 @@
+import io
+import os
+import json
+import math
+import time
+import wave
+import random
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+# PROVIDER_MODE=fake swaps every vendor (STT, TTS, LLM, transliteration) for the
+# in-process fakes below, so the full turn pipeline runs with no network or API keys.
+PROVIDER_MODE = os.environ.get('PROVIDER_MODE', 'live').lower()
+FAKE_PROVIDER_SEED = int(os.environ.get('FAKE_PROVIDER_SEED', '1234'))
+
+# Default fake latency (median_ms, p95_ms) per capability, roughly what production logs show.
+# Streaming LLM calls use llm_first_chunk (time to first chunk) and llm_chunk_gap (between
+# chunks) instead of llm, e.g. FAKE_LLM_FIRST_CHUNK_LATENCY_MS=500,1200.
+FAKE_LATENCY_DEFAULTS = {
+    'stt': (600, 1500),
+    'tts': (450, 1100),
+    'llm': (700, 1800),
+    'llm_first_chunk': (300, 800),
+    'llm_chunk_gap': (30, 80),
+    'transliteration': (80, 200),
+}
+
+
+class ProviderError(Exception):
+    """Raised by a provider call that failed (including injected fake failures)."""
+
+
+class DeadlineExceeded(ProviderError):
+    """The request's time budget ran out before a provider call could be made."""
+
+
+class STTProvider(ABC):
+    """Speech-to-text. transcribe() returns the transcript, or None on failure / no speech."""
+    name = None
+    model = None
+
+    @abstractmethod
+    def transcribe(self, audio_data, child_name=None):
+        """Transcript of audio_data, or None."""
+
+
+class TTSProvider(ABC):
+    """Text-to-speech. synthesize() returns raw audio bytes, or None on failure.
+
+    synthesize_stream() yields audio chunks as they are produced; providers that
+    can't stream yield the whole clip once.
+    """
+    name = None
+    model = None
+    content_type = 'audio/mpeg'
+
+    @abstractmethod
+    def synthesize(self, text):
+        """Audio bytes for text, or None."""
+
+    def synthesize_stream(self, text):
+        audio = self.synthesize(text)
+        if audio:
+            yield audio
+
+
+class LLMProvider(ABC):
+    """Text generation. Both methods raise on failure.
+
+    `tier` picks the model class: 'chat' (fast replies), 'eval' (grammar evaluation)
+    or 'hints' (higher quality suggestions / picks).
+    """
+    name = None
+    model = None
+
+    def model_for(self, tier):
+        """Model name used for a tier (metrics labels)."""
+        return self.model
+
+    @abstractmethod
+    def generate(self, prompt, response_format='json', tier='chat'):
+        """Full response text (JSON text when response_format='json')."""
+
+    @abstractmethod
+    def stream(self, prompt):
+        """Yield text chunks for a plain-text response."""
+
+
+class TransliterationProvider(ABC):
+    """Devanagari <-> Roman transliteration. Both methods return '' on failure."""
+    name = None
+
+    @abstractmethod
+    def to_roman(self, text):
+        """Roman script for Devanagari text."""
+
+    @abstractmethod
+    def to_hindi(self, text):
+        """Devanagari for Roman-script text."""
+
+
+CAPABILITIES = {
+    'stt': STTProvider,
+    'tts': TTSProvider,
+    'llm': LLMProvider,
+    'transliteration': TransliterationProvider,
+}
+
+
+class ProviderRegistry:
+    """Maps each capability to named provider factories and hands out the active instance.
+
+    Providers subclass the capability's ABC, so one missing a method raises TypeError
+    when it is created here rather than on its first call.
+
+    Factories are called lazily on first use, so a vendor client is only built if that
+    provider is actually selected. Selection order: use() override, PROVIDER_MODE=fake,
+    then the configured name, then the capability's default.
+    """
+
+    def __init__(self):
+        self._factories = {capability: {} for capability in CAPABILITIES}
+        self._defaults = {}
+        self._configured = {}
+        self._overrides = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, capability, name, factory, default=False):
+        if capability not in CAPABILITIES:
+            raise ValueError(f"Unknown provider capability: {capability}")
+        self._factories[capability][name] = factory
+        if default or capability not in self._defaults:
+            self._defaults[capability] = name
+
+    def configure(self, capability, name):
+        """Set the provider name from config (e.g. STT_PROVIDER)."""
+        self._configured[capability] = (name or '').lower()
+
+    def use(self, capability, name):
+        """Force a provider at runtime (benchmarks, tests). Pass None to clear."""
+        with self._lock:
+            if name is None:
+                self._overrides.pop(capability, None)
+            else:
+                self._overrides[capability] = name
+            self._instances.pop(capability, None)
+
+    def active_name(self, capability):
+        factories = self._factories[capability]
+        for candidate in (self._overrides.get(capability),
+                          'fake' if PROVIDER_MODE == 'fake' else None,
+                          self._configured.get(capability)):
+            if candidate and candidate in factories:
+                return candidate
+            if candidate:
+                logger.warning(f"No '{candidate}' {capability} provider registered, "
+                               f"using '{self._defaults.get(capability)}'")
+                break
+        return self._defaults.get(capability)
+
+    def get(self, capability):
+        provider = self._instances.get(capability)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self._instances.get(capability)
+            if provider is None:
+                name = self.active_name(capability)
+                if name is None:
+                    raise ProviderError(f"No {capability} provider registered")
+                provider = self._factories[capability][name]()
+                provider.name = name
+                self._instances[capability] = provider
+                logger.info(f"🔌 PROVIDERS: {capability} → {name}")
+            return provider
+
+    def describe(self):
+        return {capability: self.active_name(capability) for capability in CAPABILITIES}
+
+
+class LatencyModel:
+    """Log-normal latency with a given median/p95, plus an independent failure rate.
+
+    Seeded so a run with the same FAKE_PROVIDER_SEED replays the same sequence.
+    """
+
+    def __init__(self, median_ms, p95_ms, failure_rate=0.0, seed=FAKE_PROVIDER_SEED):
+        self.median_ms = float(median_ms)
+        self.p95_ms = max(float(p95_ms), self.median_ms)
+        self.failure_rate = float(failure_rate)
+        # p95 of a log-normal sits 1.645 sigma above the median in log space
+        self._sigma = math.log(self.p95_ms / self.median_ms) / 1.645 if self.median_ms > 0 else 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, capability, seed_offset=0):
+        median_ms, p95_ms = FAKE_LATENCY_DEFAULTS[capability]
+        spec = os.environ.get(f'FAKE_{capability.upper()}_LATENCY_MS')
+        if spec:
+            parts = [float(p) for p in spec.split(',')]
+            median_ms = parts[0]
+            p95_ms = parts[1] if len(parts) > 1 else parts[0]
+        failure_rate = float(os.environ.get(f'FAKE_{capability.upper()}_FAILURE_RATE', '0'))
+        return cls(median_ms, p95_ms, failure_rate, seed=FAKE_PROVIDER_SEED + seed_offset)
+
+    def sample_ms(self):
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            return self.median_ms * math.exp(self._rng.gauss(0.0, self._sigma))
+
+    def should_fail(self):
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    def wait(self):
+        """Sleep for one sampled latency. Returns True if this call should fail."""
+        delay_ms = self.sample_ms()
+        failed = self.should_fail()
+        time.sleep(delay_ms / 1000.0)
+        return failed
+
+
+def _pick(options, key):
+    """Deterministically choose from options based on the input, not the RNG."""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    digest = hashlib.sha1(key or b'').digest()
+    return options[int.from_bytes(digest[:4], 'big') % len(options)]
+
+
+FAKE_TRANSCRIPTS = [
+    'मुझे आम बहुत पसंद है',
+    'मैं स्कूल गया था',
+    'मेरी मम्मी खाना बना रही हैं',
+    'हाँ, मेरे पास एक कुत्ता है',
+    'मुझे नहीं पता',
+    'आज मैंने पार्क में खेला',
+]
+
+FAKE_REPLIES = [
+    'वाह, बहुत बढ़िया! तुम्हें और क्या पसंद है?',
+    'अच्छा! फिर क्या हुआ?',
+    'कितनी मज़ेदार बात है! तुम्हारा दोस्त कौन है?',
+    'शाबाश! तुमने आज क्या खाया?',
+]
+
+
+class FakeSTTProvider(STTProvider):
+    model = 'fake'
+
+    def __init__(self):
+        self.latency = LatencyModel.from_env('stt', seed_offset=1)
+
+    def transcribe(self, audio_data, child_name=None):
+        if self.latency.wait():
+            logger.warning("❌ FAKE STT: injected failure")
+            return None
+        return _pick(FAKE_TRANSCRIPTS, audio_data)
+
+
+class FakeTTSProvider(TTSProvider):
+    """Returns silent 8kHz WAV audio, ~60ms per character (the browser plays it as-is)."""
+    content_type = 'audio/wav'
+    model = 'fake'
+    SAMPLE_RATE = 8000
+    MS_PER_CHAR = 60
+    MAX_MS = 10000
+
+    def __init__(self):
+        self.latency = LatencyModel.from_env('tts', seed_offset=2)
+
+    def synthesize(self, text):
+        if self.latency.wait():
+            logger.warning("❌ FAKE TTS: injected failure")
+            return None
+        duration_ms = min(self.MAX_MS, max(200, len(text or '') * self.MS_PER_CHAR))
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(1)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes(b'\x80' * (self.SAMPLE_RATE * duration_ms // 1000))
+        return buffer.getvalue()
+
+
+class FakeLLMProvider(LLMProvider):
+    """JSON responses carry every key any caller reads (reply, hint, evaluation, ASR
+    correction, best-turn pick), so one fake serves all prompts."""
+    model = 'fake'
+
+    def __init__(self):
+        self.latency = LatencyModel.from_env('llm', seed_offset=3)
+        self.first_chunk = LatencyModel.from_env('llm_first_chunk', seed_offset=4)
+        self.chunk_gap = LatencyModel.from_env('llm_chunk_gap', seed_offset=5)
+
+    def generate(self, prompt, response_format='json', tier='chat'):
+        if self.latency.wait():
+            raise ProviderError("Fake LLM injected failure")
+        reply = _pick(FAKE_REPLIES, prompt)
+        if response_format != 'json':
+            return reply
+        return json.dumps({
+            'response': reply,
+            'hint': _pick(FAKE_TRANSCRIPTS, prompt),
+            'should_end': False,
+            'score': 8,
+            'is_complete': True,
+            'is_grammatically_correct': True,
+            'issues': [],
+            'corrected_response': _pick(FAKE_TRANSCRIPTS, prompt),
+            'feedback_type': 'green',
+            'corrected': '',
+            'was_corrected': False,
+            'confidence': 0.0,
+            'best_turn': 1,
+            'reason': 'fake provider',
+        }, ensure_ascii=False)
+
+    def stream(self, prompt):
+        if self.first_chunk.wait() or self.latency.should_fail():
+            raise ProviderError("Fake LLM injected failure")
+        words = _pick(FAKE_REPLIES, prompt).split(' ')
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.chunk_gap.sample_ms() / 1000.0)
+            yield word if i == 0 else ' ' + word
+
+
+class FakeTransliterationProvider(TransliterationProvider):
+    def __init__(self):
+        self.latency = LatencyModel.from_env('transliteration', seed_offset=6)
+
+    def to_roman(self, text):
+        if not text or self.latency.wait():
+            return ''
+        return f"[roman] {text}"
+
+    def to_hindi(self, text):
+        if not text or self.latency.wait():
+            return ''
+        return _pick(FAKE_TRANSCRIPTS, text)
+
+
+providers = ProviderRegistry()
+providers.register('stt', 'fake', FakeSTTProvider)
+providers.register('tts', 'fake', FakeTTSProvider)
+providers.register('llm', 'fake', FakeLLMProvider)
+providers.register('transliteration', 'fake', FakeTransliterationProvider)
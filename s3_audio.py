@@ -1,12 +1,21 @@
 import os
+import io
+import time
+import socket
 import base64
 import logging
+import threading
 import concurrent.futures
+from collections import OrderedDict
 from datetime import datetime
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config as BotoConfig
 
+from audio_transcode import transcode_for_archive
+from metrics import CACHE_REQUESTS, EXECUTOR_QUEUE_DEPTH, register_gauge_callback
+
 logger = logging.getLogger(__name__)
 
 # Configuration from environment
@@ -14,10 +23,53 @@ AWS_S3_BUCKET = os.environ.get('AWS_S3_BUCKET', '')
 AWS_S3_REGION = os.environ.get('AWS_S3_REGION', 'ap-south-1')
 ENABLE_AUDIO_STORAGE = os.environ.get('ENABLE_AUDIO_STORAGE', 'false').lower() == 'true'
 
+# Presigned URLs are reused within an expiry bucket, so a URL handed out is
+# always valid for at least (expiration - PRESIGN_CACHE_BUCKET_SECONDS)
+PRESIGN_CACHE_BUCKET_SECONDS = int(os.environ.get('PRESIGN_CACHE_BUCKET_SECONDS', '900'))
+PRESIGN_CACHE_MAX_ENTRIES = int(os.environ.get('PRESIGN_CACHE_MAX_ENTRIES', '10000'))
+
 # Lazy-initialized S3 client
 _s3_client = None
 
-# Background executor for async uploads
+# (s3_key, expiration, expiry bucket) -> presigned URL, in LRU order
+_presign_cache = OrderedDict()
+_presign_lock = threading.Lock()
+
+# Durable upload queue (Redis sorted set scored by next-attempt time)
+UPLOAD_WORKER_THREADS = int(os.environ.get('UPLOAD_WORKER_THREADS', '2'))
+UPLOAD_MAX_ATTEMPTS = int(os.environ.get('UPLOAD_MAX_ATTEMPTS', '8'))
+UPLOAD_BACKOFF_BASE_SECONDS = 2.0
+UPLOAD_BACKOFF_MAX_SECONDS = 300.0
+# A claimed job is leased for this long; if the worker dies it becomes due again
+UPLOAD_LEASE_SECONDS = 120
+UPLOAD_PAYLOAD_TTL_SECONDS = 24 * 3600
+# Sweeper: pending rows older than this are re-driven (or failed if the bytes are gone)
+UPLOAD_STALE_SECONDS = int(os.environ.get('UPLOAD_STALE_SECONDS', '600'))
+UPLOAD_SWEEP_INTERVAL_SECONDS = 300
+MULTIPART_THRESHOLD_BYTES = 8 * 1024 * 1024
+# Archived utterances never change, so playback clients may cache them
+AUDIO_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+UPLOAD_QUEUE_KEY = 'audio_uploads:due'
+UPLOAD_PAYLOAD_KEY = 'audio_uploads:payload:{}'
+UPLOAD_META_KEY = 'audio_uploads:meta:{}'
+UPLOAD_SWEEP_LOCK_KEY = 'audio_uploads:sweep_lock'
+
+# Atomically take the earliest due job and push its score out by the lease
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #due == 0 then return nil end
+redis.call('ZADD', KEYS[1], ARGV[2], due[1])
+return due[1]
+"""
+
+_app = None
+_redis = None
+_claim_script = None
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+# Without Redis, uploads fall back to this process-local pool (not durable)
 _upload_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
 
 
@@ -47,14 +99,26 @@ def generate_s3_key(user_id, conversation_id, turn_index, role, audio_format='we
 
 
 def upload_audio_bytes(audio_bytes, s3_key, content_type='audio/webm'):
-    """Upload raw audio bytes to S3. Returns the s3_key on success."""
+    """Upload raw audio bytes to S3. Returns the s3_key on success.
+
+    Large payloads go through boto3's managed transfer, which switches to a
+    multipart upload above MULTIPART_THRESHOLD_BYTES.
+    """
     client = get_s3_client()
-    client.put_object(
-        Bucket=AWS_S3_BUCKET,
-        Key=s3_key,
-        Body=audio_bytes,
-        ContentType=content_type,
-    )
+    if len(audio_bytes) >= MULTIPART_THRESHOLD_BYTES:
+        client.upload_fileobj(
+            io.BytesIO(audio_bytes), AWS_S3_BUCKET, s3_key,
+            ExtraArgs={'ContentType': content_type, 'CacheControl': AUDIO_CACHE_CONTROL},
+            Config=TransferConfig(multipart_threshold=MULTIPART_THRESHOLD_BYTES),
+        )
+    else:
+        client.put_object(
+            Bucket=AWS_S3_BUCKET,
+            Key=s3_key,
+            Body=audio_bytes,
+            ContentType=content_type,
+            CacheControl=AUDIO_CACHE_CONTROL,
+        )
     logger.info(f"S3 upload complete: {s3_key} ({len(audio_bytes)} bytes)")
     return s3_key
 
@@ -66,62 +130,290 @@ def upload_base64_audio(base64_string, s3_key, content_type='audio/webm'):
 
 
 def generate_presigned_url(s3_key, expiration=3600):
-    """Generate a presigned URL for audio playback (default 1 hour)."""
-    client = get_s3_client()
-    url = client.generate_presigned_url(
-        'get_object',
-        Params={'Bucket': AWS_S3_BUCKET, 'Key': s3_key},
-        ExpiresIn=expiration,
-    )
-    return url
+    """Generate a presigned URL for audio playback (default 1 hour).
+
+    Served from the presign cache when a URL for the current expiry bucket exists.
+    """
+    return generate_presigned_urls([s3_key], expiration)[s3_key]
+
+
+def generate_presigned_urls(s3_keys, expiration=3600):
+    """Batch-sign playback URLs for several keys. Returns {s3_key: url}.
+
+    Cache hits skip signing entirely; misses are signed with one client lookup.
+    """
+    bucket = int(time.time() // PRESIGN_CACHE_BUCKET_SECONDS)
+    urls = {}
+    missing = []
+    with _presign_lock:
+        for s3_key in s3_keys:
+            cache_key = (s3_key, expiration, bucket)
+            url = _presign_cache.get(cache_key)
+            if url is not None:
+                _presign_cache.move_to_end(cache_key)
+                urls[s3_key] = url
+            elif s3_key not in urls:
+                missing.append(s3_key)
+    hits = len(urls)
+
+    if missing:
+        client = get_s3_client()
+        signed = {}
+        for s3_key in missing:
+            signed[s3_key] = client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': AWS_S3_BUCKET, 'Key': s3_key},
+                ExpiresIn=expiration,
+            )
+        with _presign_lock:
+            for s3_key, url in signed.items():
+                _presign_cache[(s3_key, expiration, bucket)] = url
+            while len(_presign_cache) > PRESIGN_CACHE_MAX_ENTRIES:
+                _presign_cache.popitem(last=False)
+        urls.update(signed)
+
+    CACHE_REQUESTS.inc(hits, cache='presign', result='hit')
+    CACHE_REQUESTS.inc(len(missing), cache='presign', result='miss')
+
+    return urls
 
 
-def upload_audio_async(app, audio_bytes, user_id, conversation_id, turn_index,
+def init_upload_queue(app, redis_client=None):
+    """Bind the upload queue to the Flask app (for status updates) and Redis (for durability)."""
+    global _app, _redis, _claim_script
+    _app = app
+    _redis = redis_client
+    if _redis is not None:
+        _claim_script = _redis.register_script(_CLAIM_SCRIPT)
+    elif ENABLE_AUDIO_STORAGE:
+        logger.warning("Audio upload queue has no Redis - uploads are process-local and not durable")
+    register_gauge_callback(EXECUTOR_QUEUE_DEPTH, _upload_executor._work_queue.qsize, pool='s3_upload')
+    if ENABLE_AUDIO_STORAGE:
+        _ensure_upload_workers()
+
+
+def queue_audio_upload(audio_bytes, user_id, conversation_id, turn_index,
                        role='user', audio_format='webm', content_type='audio/webm'):
-    """Submit an audio upload to the background thread pool.
+    """Enqueue an audio upload and return its pending ConversationAudio row (unsaved).
 
-    Creates a ConversationAudio DB record with status tracking:
-    pending -> uploaded / failed.
+    The caller adds the returned record to the session alongside the turn's other
+    writes, so no extra commit happens on the request thread. Returns None when
+    audio storage is disabled.
     """
     if not ENABLE_AUDIO_STORAGE:
-        return
+        return None
+
+    from models import ConversationAudio
 
     s3_key = generate_s3_key(user_id, conversation_id, turn_index, role, audio_format)
-    file_size = len(audio_bytes)
+    record = ConversationAudio(
+        conversation_id=conversation_id,
+        turn_index=turn_index,
+        role=role,
+        s3_key=s3_key,
+        audio_format=audio_format,
+        file_size_bytes=len(audio_bytes),
+        upload_status='pending',
+    )
+
+    if _redis is not None:
+        try:
+            pipe = _redis.pipeline(transaction=True)
+            pipe.set(UPLOAD_PAYLOAD_KEY.format(s3_key), audio_bytes, ex=UPLOAD_PAYLOAD_TTL_SECONDS)
+            pipe.hset(UPLOAD_META_KEY.format(s3_key), mapping={
+                'content_type': content_type, 'attempts': 0, 'uploaded': 0,
+            })
+            pipe.expire(UPLOAD_META_KEY.format(s3_key), UPLOAD_PAYLOAD_TTL_SECONDS)
+            pipe.zadd(UPLOAD_QUEUE_KEY, {s3_key: time.time()})
+            pipe.execute()
+            _ensure_upload_workers()
+            return record
+        except Exception as e:
+            logger.error(f"Failed to enqueue durable upload for {s3_key}, using local pool: {e}")
+
+    _upload_executor.submit(_upload_locally, audio_bytes, s3_key, content_type)
+    return record
 
-    # Create pending DB record inside app context
+
+def _backoff_seconds(attempts):
+    return min(UPLOAD_BACKOFF_BASE_SECONDS * (2 ** attempts), UPLOAD_BACKOFF_MAX_SECONDS)
+
+
+def _set_upload_status(s3_key, status, archive_info=None):
+    """Update the ConversationAudio row. Returns False if the row isn't committed yet.
+
+    archive_info carries file_size_bytes / duration_ms / bitrate_kbps of the stored object.
+    """
     from models import db, ConversationAudio
-    with app.app_context():
-        record = ConversationAudio(
-            conversation_id=conversation_id,
-            turn_index=turn_index,
-            role=role,
-            s3_key=s3_key,
-            audio_format=audio_format,
-            file_size_bytes=file_size,
-            upload_status='pending',
-        )
-        db.session.add(record)
-        db.session.commit()
-        record_id = record.id
-
-    def _do_upload():
-        with app.app_context():
-            try:
-                upload_audio_bytes(audio_bytes, s3_key, content_type)
-                rec = ConversationAudio.query.get(record_id)
-                if rec:
-                    rec.upload_status = 'uploaded'
-                    db.session.commit()
+    values = {'upload_status': status}
+    for field in ('file_size_bytes', 'duration_ms', 'bitrate_kbps'):
+        if archive_info and archive_info.get(field) is not None:
+            values[field] = int(archive_info[field])
+    with _app.app_context():
+        try:
+            updated = ConversationAudio.query.filter_by(s3_key=s3_key).update(
+                values, synchronize_session=False
+            )
+            db.session.commit()
+            return updated > 0
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to set upload_status={status} for {s3_key}: {e}")
+            return False
+        finally:
+            db.session.remove()
+
+
+def _upload_locally(audio_bytes, s3_key, content_type):
+    """Fallback without Redis: retry with backoff inside this process."""
+    uploaded = False
+    archive_bytes, archive_info = transcode_for_archive(audio_bytes)
+    archive_info['file_size_bytes'] = len(archive_bytes)
+    for attempt in range(UPLOAD_MAX_ATTEMPTS):
+        try:
+            if not uploaded:
+                upload_audio_bytes(archive_bytes, s3_key, archive_info.get('content_type', content_type))
+                uploaded = True
+            if _set_upload_status(s3_key, 'uploaded', archive_info):
                 logger.info(f"Background upload succeeded: {s3_key}")
-            except Exception as e:
-                logger.error(f"Background upload failed for {s3_key}: {e}")
-                try:
-                    rec = ConversationAudio.query.get(record_id)
-                    if rec:
-                        rec.upload_status = 'failed'
-                        db.session.commit()
-                except Exception:
-                    logger.error("Failed to update upload_status to 'failed'")
-
-    _upload_executor.submit(_do_upload)
+                return
+        except Exception as e:
+            logger.warning(f"Upload attempt {attempt + 1} failed for {s3_key}: {e}")
+        time.sleep(_backoff_seconds(attempt))
+    if not uploaded:
+        logger.error(f"Background upload failed for {s3_key} after {UPLOAD_MAX_ATTEMPTS} attempts")
+        _set_upload_status(s3_key, 'failed')
+
+
+def _ensure_upload_workers():
+    """Start the queue-draining threads once per process (re-started after a fork)."""
+    global _workers_pid
+    if _redis is None or _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        for i in range(UPLOAD_WORKER_THREADS):
+            threading.Thread(target=_upload_worker_loop, name=f's3-upload-{i}', daemon=True).start()
+        threading.Thread(target=_sweeper_loop, name='s3-upload-sweeper', daemon=True).start()
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _upload_worker_loop():
+    while True:
+        try:
+            now = time.time()
+            s3_key = _claim_script(keys=[UPLOAD_QUEUE_KEY], args=[now, now + UPLOAD_LEASE_SECONDS])
+            if s3_key is None:
+                time.sleep(1.0)
+                continue
+            _process_upload_job(_decode(s3_key))
+        except Exception as e:
+            logger.error(f"Upload worker error: {e}")
+            time.sleep(1.0)
+
+
+def _finish_job(s3_key):
+    pipe = _redis.pipeline(transaction=True)
+    pipe.zrem(UPLOAD_QUEUE_KEY, s3_key)
+    pipe.delete(UPLOAD_PAYLOAD_KEY.format(s3_key), UPLOAD_META_KEY.format(s3_key))
+    pipe.execute()
+
+
+def _retry_or_fail(s3_key, attempts, reason):
+    attempts += 1
+    if attempts >= UPLOAD_MAX_ATTEMPTS:
+        logger.error(f"Giving up on {s3_key} after {attempts} attempts: {reason}")
+        _set_upload_status(s3_key, 'failed')
+        _finish_job(s3_key)
+        return
+    delay = _backoff_seconds(attempts)
+    _redis.hset(UPLOAD_META_KEY.format(s3_key), 'attempts', attempts)
+    _redis.zadd(UPLOAD_QUEUE_KEY, {s3_key: time.time() + delay})
+    logger.warning(f"Upload retry {attempts} for {s3_key} in {delay:.0f}s: {reason}")
+
+
+def _process_upload_job(s3_key):
+    meta = {_decode(k): _decode(v) for k, v in _redis.hgetall(UPLOAD_META_KEY.format(s3_key)).items()}
+    attempts = int(meta.get('attempts', 0))
+
+    if meta.get('uploaded') != '1':
+        audio_bytes = _redis.get(UPLOAD_PAYLOAD_KEY.format(s3_key))
+        if audio_bytes is None:
+            logger.error(f"Upload payload expired for {s3_key}")
+            _set_upload_status(s3_key, 'failed')
+            _finish_job(s3_key)
+            return
+        # Trim + re-encode to the archival profile for its container before it leaves the box
+        archive_bytes, archive_info = transcode_for_archive(audio_bytes)
+        try:
+            upload_audio_bytes(archive_bytes, s3_key,
+                               archive_info.get('content_type', meta.get('content_type', 'audio/webm')))
+        except Exception as e:
+            _retry_or_fail(s3_key, attempts, e)
+            return
+        # Bytes are safely in S3; only the status update may still need retrying
+        archive_meta = {'uploaded': '1', 'file_size_bytes': len(archive_bytes)}
+        for field in ('duration_ms', 'bitrate_kbps'):
+            if archive_info.get(field) is not None:
+                archive_meta[field] = archive_info[field]
+        _redis.hset(UPLOAD_META_KEY.format(s3_key), mapping=archive_meta)
+        meta.update(archive_meta)
+        _redis.delete(UPLOAD_PAYLOAD_KEY.format(s3_key))
+
+    if _set_upload_status(s3_key, 'uploaded', meta):
+        logger.info(f"Background upload succeeded: {s3_key}")
+        _finish_job(s3_key)
+    else:
+        # The turn that owns this row hasn't committed yet
+        _retry_or_fail(s3_key, attempts, 'pending row not committed yet')
+
+
+def _sweeper_loop():
+    while True:
+        time.sleep(UPLOAD_SWEEP_INTERVAL_SECONDS)
+        try:
+            # One sweeper across all workers per interval
+            if _redis.set(UPLOAD_SWEEP_LOCK_KEY, socket.gethostname(), nx=True,
+                          ex=UPLOAD_SWEEP_INTERVAL_SECONDS - 5):
+                sweep_stale_uploads()
+        except Exception as e:
+            logger.error(f"Upload sweeper error: {e}")
+
+
+def sweep_stale_uploads():
+    """Re-drive `pending` rows whose job was lost; fail those whose bytes are gone."""
+    from datetime import timedelta
+    from models import db, ConversationAudio
+
+    cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_STALE_SECONDS)
+    redriven = failed = 0
+    with _app.app_context():
+        try:
+            stale = ConversationAudio.query.filter(
+                ConversationAudio.upload_status == 'pending',
+                ConversationAudio.created_at < cutoff,
+            ).limit(500).all()
+            for rec in stale:
+                if _redis.zscore(UPLOAD_QUEUE_KEY, rec.s3_key) is not None:
+                    continue  # still queued or retrying
+                meta_key = UPLOAD_META_KEY.format(rec.s3_key)
+                if _redis.exists(UPLOAD_PAYLOAD_KEY.format(rec.s3_key)) or \
+                        _decode(_redis.hget(meta_key, 'uploaded')) == '1':
+                    _redis.zadd(UPLOAD_QUEUE_KEY, {rec.s3_key: time.time()})
+                    redriven += 1
+                else:
+                    rec.upload_status = 'failed'
+                    failed += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to sweep stale uploads: {e}")
+        finally:
+            db.session.remove()
+    if redriven or failed:
+        logger.info(f"Upload sweeper: re-drove {redriven}, failed {failed} stale pending rows")
@@ -10,6 +10,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import app
 from models import db, Educator, EducatorTopic
+from educator_topic_cache import topic_cache
 
 EDUCATOR_CODE = 'kulturekool'
 PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts', 'kulturekool')
@@ -68,6 +69,9 @@ def main():
             else:
                 print(f"  {topic.full_key}: no prompt files found")
 
+        # Running workers serve topics from an in-process cache; tell them to reload
+        topic_cache.notify_changed()
+
     print("Done!")
 
 
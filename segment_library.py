@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import base64
+import logging
+import threading
+import concurrent.futures
+
+from providers import providers
+from metrics import CACHE_REQUESTS, TTS_CHARACTERS
+from audio_splice import concat_audio, strip_id3
+from tracing import span, wrap
+
+logger = logging.getLogger(__name__)
+
+# Kiki's replies reuse a small set of whole sentences ("वाह!", "बहुत अच्छा!", farewell lines).
+# build_segment_library.py mines them from past conversations and stores their audio here;
+# a reply is then stitched from library sentences plus freshly synthesized novel ones.
+SEGMENT_LIBRARY_ENABLED = os.environ.get('SEGMENT_LIBRARY_ENABLED', 'true').lower() == 'true'
+# How often a worker re-reads the library's sentence list
+SEGMENT_LIBRARY_REFRESH_SECONDS = 300
+SEGMENT_LIBRARY_KEY = 'tts_segments:{}'  # per voice: sentence -> base64 audio
+
+_SENTENCE_RE = re.compile(r'[^.!?।]+[.!?।]*\s*|[.!?।]+\s*')
+
+_redis = None
+_synthesize = None
+_sentences = None  # sentences in the current voice's library
+_loaded_at = 0.0
+_loaded_voice = None
+_load_lock = threading.Lock()
+
+
+def init_segment_library(redis_client=None, synthesize=None):
+    """synthesize(text) -> audio bytes or None, used for the novel parts of a reply.
+
+    The library lives in Redis so the offline job and every dyno share it; without
+    Redis every reply is synthesized whole.
+    """
+    global _redis, _synthesize
+    _redis = redis_client
+    _synthesize = synthesize
+
+
+def split_sentences(text):
+    """Split at sentence-ending punctuation, keeping the punctuation and trailing space."""
+    return [s for s in _SENTENCE_RE.findall(text or '') if s.strip()]
+
+
+def normalize(sentence):
+    return ' '.join(sentence.split())
+
+
+def voice_key():
+    tts = providers.get('tts')
+    return SEGMENT_LIBRARY_KEY.format(f"{tts.name}:{tts.model}")
+
+
+def library_sentences(refresh=False):
+    """The set of sentences in the current voice's library (cached per worker)."""
+    global _sentences, _loaded_at, _loaded_voice
+    if _redis is None:
+        return set()
+    key = voice_key()
+    now = time.time()
+    if not refresh and _sentences is not None and _loaded_voice == key and now - _loaded_at < SEGMENT_LIBRARY_REFRESH_SECONDS:
+        return _sentences
+    with _load_lock:
+        if refresh or _sentences is None or _loaded_voice != key or now - _loaded_at >= SEGMENT_LIBRARY_REFRESH_SECONDS:
+            try:
+                _sentences = {s.decode('utf-8') if isinstance(s, bytes) else s for s in _redis.hkeys(key)}
+                _loaded_voice = key
+            except Exception as e:
+                logger.warning(f"Failed to load TTS segment library: {e}")
+                _sentences = _sentences if _loaded_voice == key else set()
+            _loaded_at = now
+    return _sentences
+
+
+def add_segments(audio_by_sentence):
+    """Store {sentence: audio bytes} in the current voice's library."""
+    mapping = {normalize(s): base64.b64encode(audio) for s, audio in audio_by_sentence.items()}
+    if mapping:
+        _redis.hset(voice_key(), mapping=mapping)
+    library_sentences(refresh=True)
+
+
+def remove_segments(sentences):
+    sentences = [normalize(s) for s in sentences]
+    if sentences:
+        _redis.hdel(voice_key(), *sentences)
+    library_sentences(refresh=True)
+
+
+def _plan(text):
+    """Ordered pieces of a reply, ('segment', audio) or ('novel', text), or None if nothing is in the library.
+
+    Consecutive novel sentences are merged so they are synthesized together and
+    keep natural prosody.
+    """
+    if not SEGMENT_LIBRARY_ENABLED or _redis is None or _synthesize is None:
+        return None
+    known = library_sentences()
+    if not known:
+        return None
+    sentences = split_sentences(text)
+    hits = [normalize(s) for s in sentences if normalize(s) in known]
+    if not hits:
+        CACHE_REQUESTS.inc(cache='tts_segments', result='miss')
+        return None
+    try:
+        stored = dict(zip(hits, _redis.hmget(voice_key(), hits)))
+    except Exception as e:
+        logger.warning(f"Failed to read TTS segments: {e}")
+        return None
+
+    pieces = []
+    for sentence in sentences:
+        audio = stored.get(normalize(sentence))
+        if audio:
+            pieces.append(('segment', base64.b64decode(audio)))
+            CACHE_REQUESTS.inc(cache='tts_segments', result='hit')
+            TTS_CHARACTERS.inc(len(normalize(sentence)), source='segment_library')
+        elif pieces and pieces[-1][0] == 'novel':
+            pieces[-1] = ('novel', pieces[-1][1] + sentence)
+        else:
+            pieces.append(('novel', sentence))
+    logger.info(f"🧩 TTS SEGMENTS: {len(hits)}/{len(sentences)} sentences from library, "
+                f"{sum(1 for kind, _ in pieces if kind == 'novel')} to synthesize")
+    return pieces
+
+
+def synthesize_with_segments(text):
+    """Audio for text stitched from library sentences and synthesized novel runs.
+
+    Returns None when no sentence is in the library (or anything fails), and the
+    caller synthesizes the whole text as before.
+    """
+    pieces = _plan(text)
+    if pieces is None:
+        return None
+    with span('tts.segments', pieces=len(pieces)):
+        novel = [i for i, (kind, _) in enumerate(pieces) if kind == 'novel']
+        if novel:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(novel)) as executor:
+                futures = {i: executor.submit(wrap(_synthesize), pieces[i][1].strip()) for i in novel}
+                for i, future in futures.items():
+                    audio = future.result()
+                    if not audio:
+                        return None
+                    pieces[i] = ('novel', audio)
+    return concat_audio([audio for _, audio in pieces], providers.get('tts').content_type)
+
+
+def stream_with_segments(text, synthesize_stream):
+    """Like synthesize_with_segments, but yields audio in order as it becomes available.
+
+    Library sentences are sent at once and novel runs are streamed from
+    synthesize_stream(text). Only MP3 can be joined mid-stream; returns None for
+    other formats or when no sentence is in the library.
+    """
+    if providers.get('tts').content_type != 'audio/mpeg':
+        return None
+    pieces = _plan(text)
+    if pieces is None:
+        return None
+
+    def generate():
+        for kind, piece in pieces:
+            if kind == 'segment':
+                yield strip_id3(piece)
+            else:
+                yield from synthesize_stream(piece.strip())
+    return generate()
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Protocol 1: every `words` event re-sends the whole reply so far, ASCII-escaped JSON.
+# Protocol 2: numbered events, compact UTF-8 JSON, `delta` events carry only new text
+# (coalesced per window) and `complete.final_text` is the authoritative reply.
+# Clients opt in with the `stream_protocol=2` form field, so pages cached before a
+# deploy keep getting protocol 1.
+SSE_PROTOCOL_LATEST = 2
+SSE_COALESCE_MS = float(os.environ.get('SSE_COALESCE_MS', '50'))
+
+# Delta text is held back to the last of these so a word is never split across events
+_BOUNDARY_CHARS = ' \n.!?,।'
+
+
+def negotiate_protocol(value):
+    try:
+        protocol = int(value or 1)
+    except (TypeError, ValueError):
+        return 1
+    return protocol if protocol in (1, SSE_PROTOCOL_LATEST) else 1
+
+
+class EventStream:
+    """Encodes one turn's SSE events in the negotiated protocol.
+
+    Text from the LLM goes through add_text(), which returns an encoded event
+    only when the coalescing window has elapsed; flush_text() drains the rest.
+    """
+
+    def __init__(self, protocol=1, coalesce_ms=SSE_COALESCE_MS):
+        self.protocol = protocol
+        self.coalesce_s = coalesce_ms / 1000.0
+        self.last_event_id = 0
+        self.events_sent = 0
+        self.bytes_sent = 0
+        self.deltas_sent = 0
+        self.text = ''          # full reply so far
+        self._pending = ''      # text not yet sent
+        self._last_text_at = None
+
+    def event(self, payload):
+        """Encode one event (a dict with a 'type')."""
+        if self.protocol >= 2:
+            self.last_event_id += 1
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+            encoded = f"id: {self.last_event_id}\ndata: {body}\n\n"
+        else:
+            encoded = f"data: {json.dumps(payload)}\n\n"
+        self.events_sent += 1
+        self.bytes_sent += len(encoded.encode('utf-8'))
+        return encoded
+
+    def add_text(self, chunk):
+        """Buffer a chunk of reply text; returns an encoded event or None."""
+        self.text += chunk
+        self._pending += chunk
+        now = time.monotonic()
+        # The first words go out immediately; after that at most one event per window
+        if self._last_text_at is not None and now - self._last_text_at < self.coalesce_s:
+            return None
+        cut = max(self._pending.rfind(c) for c in _BOUNDARY_CHARS) + 1
+        if cut <= 0 or not self._pending[:cut].strip():
+            return None
+        return self._send_text(self._pending[:cut], now)
+
+    def flush_text(self):
+        """Encode whatever reply text is still buffered, or None."""
+        if not self._pending.strip():
+            return None
+        return self._send_text(self._pending, time.monotonic())
+
+    def _send_text(self, text, now):
+        self._pending = self._pending[len(text):]
+        self._last_text_at = now
+        self.deltas_sent += 1
+        if self.protocol >= 2:
+            return self.event({'type': 'delta', 'text': text})
+        sent = self.text[:len(self.text) - len(self._pending)]
+        return self.event({'type': 'words', 'content': text.strip(), 'accumulated': sent})
+
+    def complete(self, payload):
+        """The final reconciliation event: payload['final_text'] replaces the streamed text."""
+        if self.protocol >= 2:
+            payload = dict(payload, deltas=self.deltas_sent)
+        return self.event(payload)
@@ -412,6 +412,9 @@ let waveformCanvas = null;
 let waveformCtx = null;
 let waveformRAF = null;
 
+// Client-side voice tracking for silence trimming (see trimSilenceForUpload)
+let voiceTracker = null;
+
 // Timers
 let safetyTimeoutId = null;
 let autoStartDelayId = null;
@@ -420,6 +423,11 @@ let autoStartDelayId = null;
 const NOISE_FLOOR = 150;           // visual threshold (0-255) for ignoring background noise
 const SAFETY_TIMEOUT_MS = 60000; // 60s auto-stop timer
 const AUTO_START_DELAY_MS = 500; // delay after audio ends before mic opens
+const VAD_FRAME_MS = 20;           // mic level sampling interval while recording
+const VAD_MARGIN_DB = 12;          // voiced = this far above the recording's noise floor...
+const VAD_MIN_LEVEL_DBFS = -50;    // ...and above this absolute level (matches server VAD)
+const TRIM_PADDING_MS = 300;       // silence kept around speech so words aren't clipped
+const TRIM_MIN_SAVING_MS = 500;    // don't bother re-muxing for smaller savings
 
 /**
  * transitionTo(newState) — single source of truth for all UI state
@@ -1142,7 +1150,7 @@ async function toggleRecording() {
                 };
 
                 mediaRecorder.onstop = async () => {
-                    if (recordingCancelled) { recordingCancelled = false; audioChunks = []; return; }
+                    if (recordingCancelled) { recordingCancelled = false; audioChunks = []; stopVoiceTracking(); return; }
 
                     console.log('🛑 MediaRecorder stopped');
                     console.log('=== AUDIO DEBUG ===');
@@ -1166,11 +1174,12 @@ async function toggleRecording() {
                         return;
                     }
 
+                    const upload = await trimSilenceForUpload(audioBlob);
                     try {
-                        await sendAudioToServerStream(audioBlob);
+                        await sendAudioToServerStream(upload.blob, upload.trim);
                     } catch (error) {
                         console.log('Streaming failed, using fallback:', error);
-                        await sendAudioToServer(audioBlob);
+                        await sendAudioToServer(upload.blob, upload.trim);
                     }
                     // Note: audioChunks is reset in startRecordingAuto() before each new recording
                 };
@@ -1184,6 +1193,7 @@ async function toggleRecording() {
 
             // ★ iOS FIX: Start with timeslice to ensure data collection
             mediaRecorder.start(100); // Collect data every 100ms
+            startVoiceTracking();
 
             isRecording = true;
             transitionTo('LISTENING');
@@ -1215,6 +1225,7 @@ async function toggleRecording() {
         if (mediaRecorder && mediaRecorder.state === 'recording') {
             mediaRecorder.stop();
         }
+        stopVoiceTracking();
 
         isRecording = false;
         showThinkingLoader();
@@ -1276,7 +1287,7 @@ function setupMediaRecorderHandlers() {
     };
 
     mediaRecorder.onstop = async () => {
-        if (recordingCancelled) { recordingCancelled = false; audioChunks = []; return; }
+        if (recordingCancelled) { recordingCancelled = false; audioChunks = []; stopVoiceTracking(); return; }
 
         // ★ iOS FIX: Use actual MIME type from recorder, not hardcoded 'audio/wav'
         const actualMimeType = mediaRecorder.mimeType || 'audio/webm';
@@ -1300,11 +1311,12 @@ function setupMediaRecorderHandlers() {
         transitionTo('PROCESSING');
 
         // Try streaming version first, fallback to original if needed
+        const upload = await trimSilenceForUpload(audioBlob);
         try {
-            await sendAudioToServerStream(audioBlob);
+            await sendAudioToServerStream(upload.blob, upload.trim);
         } catch (error) {
             console.log('Streaming failed, using fallback:', error);
-            await sendAudioToServer(audioBlob);
+            await sendAudioToServer(upload.blob, upload.trim);
         }
         // Note: audioChunks is reset in startRecordingAuto() before each new recording
     };
@@ -1350,7 +1362,8 @@ async function startConversation() {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    conversation_type: conversationType
+                    conversation_type: conversationType,
+                    audio_delivery: AUDIO_DELIVERY
                 })
             });
         }
@@ -1426,8 +1439,8 @@ async function startConversation() {
         }
         
         // Play initial audio if available, then auto-start recording
-        if (data.audio) {
-            await playAudioResponse(data.audio);
+        if (audioFromResponse(data)) {
+            await playAudioResponse(audioFromResponse(data));
 
             // Show transliteration tooltip after Kiki's first message (one-time)
             if (!isResuming) {
@@ -1534,14 +1547,19 @@ function displayMessage(role, text, corrections = null, feedbackType = 'green')
         // Use the existing TTS system to speak the text
         const formData = new FormData();
         formData.append('text', text);
+        formData.append('audio_delivery', AUDIO_DELIVERY);
         fetch('/api/speak', {
             method: 'POST',
             body: formData
         })
         .then(response => response.json())
         .then(data => {
-            if (data.audio) {
-                playAudioResponse(data.audio);
+            if (data.error === 'rate_limited') {
+                showTranslation(data.message, speakButton);
+                return;
+            }
+            if (audioFromResponse(data)) {
+                playAudioResponse(audioFromResponse(data));
             }
         })
         .catch(error => {
@@ -1578,7 +1596,9 @@ function displayMessage(role, text, corrections = null, feedbackType = 'green')
                 body: JSON.stringify({ text })
             });
             const data = await response.json();
-            if (data.translation) {
+            if (data.error === 'rate_limited') {
+                showTranslation(data.message, translateButton);
+            } else if (data.translation) {
                 // Show translation in a tooltip or small popup
                 showTranslation(data.translation, translateButton);
             }
@@ -1929,15 +1949,31 @@ function showMicErrorUI(overlay, errorMessage) {
     });
 }
 
-// Play audio response (awaitable — resolves when audio finishes)
-async function playAudioResponse(base64Audio) {
-    debugLog(`playAudioResponse called, data length: ${base64Audio ? base64Audio.length : 'NULL'}`);
+// Audio comes back as a short-lived URL to the raw bytes (audio_delivery=url);
+// older responses carry it base64-encoded in the JSON
+const AUDIO_DELIVERY = 'url';
+const AUDIO_URL_PREFIX = '/api/audio/';
+
+function isAudioUrl(audioData) {
+    return typeof audioData === 'string' &&
+        (audioData.startsWith(AUDIO_URL_PREFIX) || audioData.startsWith('blob:'));
+}
+
+function audioFromResponse(data) {
+    return data.audio_url || data.audio;
+}
+
+// Play audio response (awaitable — resolves when audio finishes).
+// Accepts an /api/audio/ or blob: URL, or base64 audio data.
+async function playAudioResponse(audioData) {
+    const isUrl = isAudioUrl(audioData);
+    debugLog(`playAudioResponse called, ${isUrl ? 'url' : 'data length'}: ${audioData ? (isUrl ? audioData : audioData.length) : 'NULL'}`);
 
     transitionTo('KIKI_SPEAKING');
 
     try {
-        if (!base64Audio || base64Audio.length < 100) {
-            debugLog('ERROR: base64Audio is empty or too short!', true);
+        if (!audioData || (!isUrl && audioData.length < 100)) {
+            debugLog('ERROR: audio data is empty or too short!', true);
             return;
         }
 
@@ -1946,7 +1982,7 @@ async function playAudioResponse(base64Audio) {
         // during the user gesture, so it plays in the "media" audio category
         // and respects hardware volume buttons.
         const audio = getSharedAudioElement();
-        audio.src = `data:audio/wav;base64,${base64Audio}`;
+        audio.src = isUrl ? audioData : `data:audio/wav;base64,${audioData}`;
 
         debugLog(`Audio src set, attempting play...`);
 
@@ -2040,7 +2076,7 @@ async function startRecordingAuto() {
             };
 
             mediaRecorder.onstop = async () => {
-                if (recordingCancelled) { recordingCancelled = false; audioChunks = []; return; }
+                if (recordingCancelled) { recordingCancelled = false; audioChunks = []; stopVoiceTracking(); return; }
 
                 console.log('🛑 iOS auto MediaRecorder stopped');
                 const actualMimeType = mediaRecorder.mimeType || 'audio/webm';
@@ -2056,11 +2092,12 @@ async function startRecordingAuto() {
 
                 transitionTo('PROCESSING');
 
+                const upload = await trimSilenceForUpload(audioBlob);
                 try {
-                    await sendAudioToServerStream(audioBlob);
+                    await sendAudioToServerStream(upload.blob, upload.trim);
                 } catch (error) {
                     console.log('Streaming failed, using fallback:', error);
-                    await sendAudioToServer(audioBlob);
+                    await sendAudioToServer(upload.blob, upload.trim);
                 }
                 // Note: audioChunks is reset in startRecordingAuto() before each new recording
             };
@@ -2079,6 +2116,7 @@ async function startRecordingAuto() {
 
         // Start recording
         mediaRecorder.start(100);
+        startVoiceTracking();
         isRecording = true;
         transitionTo('LISTENING');
 
@@ -2115,6 +2153,7 @@ function stopRecordingAndSend() {
     if (mediaRecorder && mediaRecorder.state === 'recording') {
         mediaRecorder.stop();
     }
+    stopVoiceTracking();
 
     isRecording = false;
     clearTimeout(safetyTimeoutId);
@@ -2133,6 +2172,7 @@ function cancelRecording() {
     if (mediaRecorder && mediaRecorder.state === 'recording') {
         mediaRecorder.stop();
     }
+    stopVoiceTracking();
 
     isRecording = false;
     clearTimeout(safetyTimeoutId);
@@ -2143,7 +2183,7 @@ function cancelRecording() {
 /**
  * Display a "couldn't hear you" message bubble in the conversation
  */
-function displayNoSpeechMessage() {
+function displayNoSpeechMessage(message = "Sorry, we couldn't hear you. Please try recording again.") {
     const conversation = document.getElementById('conversation');
     if (!conversation) return;
 
@@ -2152,7 +2192,7 @@ function displayNoSpeechMessage() {
 
     const msgDiv = document.createElement('div');
     msgDiv.className = 'no-speech-msg bg-orange-50 border border-orange-200 rounded-lg p-3 text-center text-sm text-orange-700 my-2';
-    msgDiv.textContent = "Sorry, we couldn't hear you. Please try recording again.";
+    msgDiv.textContent = message;
     conversation.appendChild(msgDiv);
     window.scrollTo({ top: document.body.scrollHeight, behavior: 'smooth' });
 
@@ -2333,6 +2373,367 @@ function stopWaveform() {
     }
 }
 
+// ============================================
+// CLIENT-SIDE SILENCE TRIMMING
+// ============================================
+// While recording we sample the mic level every VAD_FRAME_MS. After stop, leading and
+// trailing silence is cut out of the WebM by dropping whole Opus packets (no re-encode).
+// The server re-reads the container duration and checks it against the trim we report.
+
+/**
+ * Start sampling mic levels for the current recording
+ */
+function startVoiceTracking() {
+    stopVoiceTracking();
+    voiceTracker = null;
+    try {
+        if (!audioContext) {
+            const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+            if (AudioContextClass) {
+                audioContext = new AudioContextClass();
+            }
+        }
+        if (!audioContext || !mediaStream) return;
+        if (audioContext.state === 'suspended') {
+            audioContext.resume();
+        }
+
+        const analyser = audioContext.createAnalyser();
+        analyser.fftSize = 1024;
+        const source = audioContext.createMediaStreamSource(mediaStream);
+        source.connect(analyser);
+
+        const samples = new Float32Array(analyser.fftSize);
+        const tracker = {
+            analyser,
+            source,
+            startTime: performance.now(),
+            times: [],
+            levels: [],
+            intervalId: null
+        };
+        tracker.intervalId = setInterval(() => {
+            analyser.getFloatTimeDomainData(samples);
+            let sumSquares = 0;
+            for (let i = 0; i < samples.length; i++) {
+                sumSquares += samples[i] * samples[i];
+            }
+            const rms = Math.sqrt(sumSquares / samples.length);
+            tracker.times.push(performance.now() - tracker.startTime);
+            tracker.levels.push(20 * Math.log10(Math.max(rms, 1e-10)));
+        }, VAD_FRAME_MS);
+        voiceTracker = tracker;
+    } catch (error) {
+        console.warn('Voice tracking unavailable:', error);
+        voiceTracker = null;
+    }
+}
+
+/**
+ * Stop sampling; the collected levels are kept for trimSilenceForUpload()
+ */
+function stopVoiceTracking() {
+    if (!voiceTracker || voiceTracker.intervalId === null) return;
+    clearInterval(voiceTracker.intervalId);
+    voiceTracker.intervalId = null;
+    try {
+        voiceTracker.source.disconnect();
+    } catch (e) {
+        console.warn('Error disconnecting voice tracker:', e);
+    }
+}
+
+/**
+ * First/last voiced time (ms from recording start), using the same
+ * noise-floor + margin rule as the server VAD. Returns null if nothing was voiced.
+ */
+function findVoicedSpan(tracker) {
+    if (!tracker || tracker.levels.length === 0) return null;
+    const sorted = Array.from(tracker.levels).sort((a, b) => a - b);
+    const noiseFloor = sorted[Math.floor(sorted.length * 0.1)];
+    const threshold = Math.max(noiseFloor + VAD_MARGIN_DB, VAD_MIN_LEVEL_DBFS);
+
+    let first = -1;
+    let last = -1;
+    for (let i = 0; i < tracker.levels.length; i++) {
+        if (tracker.levels[i] > threshold) {
+            if (first < 0) first = i;
+            last = i;
+        }
+    }
+    if (first < 0) return null;
+    return {
+        startMs: Math.max(0, tracker.times[first] - VAD_FRAME_MS),
+        endMs: tracker.times[last]
+    };
+}
+
+/**
+ * Trim leading/trailing silence from a finished recording.
+ * Returns { blob, trim } where trim holds the form fields the server verifies,
+ * or is null when the original blob is sent unchanged (non-WebM, no speech found,
+ * small saving, or any parse error).
+ */
+async function trimSilenceForUpload(audioBlob) {
+    stopVoiceTracking();
+    const tracker = voiceTracker;
+    voiceTracker = null;
+    const untouched = { blob: audioBlob, trim: null };
+
+    try {
+        const span = findVoicedSpan(tracker);
+        if (!span || !(audioBlob.type || '').includes('webm')) return untouched;
+
+        const buffer = new Uint8Array(await audioBlob.arrayBuffer());
+        const result = trimWebmOpus(buffer, span.startMs - TRIM_PADDING_MS, span.endMs + TRIM_PADDING_MS);
+        if (!result) return untouched;
+
+        const savedMs = result.leadMs + result.trailMs;
+        if (savedMs < TRIM_MIN_SAVING_MS) return untouched;
+
+        const trimmedBlob = new Blob([result.bytes], { type: audioBlob.type });
+        console.log(`✂️ Trimmed ${savedMs}ms of silence (${result.originalDurationMs}ms → ` +
+            `${result.originalDurationMs - savedMs}ms, ${audioBlob.size} → ${trimmedBlob.size} bytes)`);
+        return {
+            blob: trimmedBlob,
+            trim: {
+                trim_lead_ms: result.leadMs,
+                trim_trail_ms: result.trailMs,
+                original_duration_ms: result.originalDurationMs,
+                original_size: audioBlob.size
+            }
+        };
+    } catch (error) {
+        console.warn('Silence trimming failed, sending original audio:', error);
+        return untouched;
+    }
+}
+
+/**
+ * Add trim metadata to an audio upload form
+ */
+function appendTrimFields(formData, trim) {
+    if (!trim) return;
+    for (const [key, value] of Object.entries(trim)) {
+        formData.append(key, String(value));
+    }
+}
+
+// EBML element IDs (Matroska / WebM) — mirrors webm_audio.py
+const EBML_ID = {
+    EBML: 0x1A45DFA3,
+    SEGMENT: 0x18538067,
+    SEEK_HEAD: 0x114D9B74,
+    INFO: 0x1549A966,
+    TIMECODE_SCALE: 0x2AD7B1,
+    DURATION: 0x4489,
+    CUES: 0x1C53BB6B,
+    VOID: 0xEC,
+    CLUSTER: 0x1F43B675,
+    CLUSTER_TIMECODE: 0xE7,
+    SIMPLE_BLOCK: 0xA3,
+    BLOCK_GROUP: 0xA0
+};
+// Children of Cluster; everything else at this level belongs to the Segment
+const CLUSTER_CHILD_IDS = new Set([0xE7, 0xA3, 0xA0, 0xA7, 0xAB]);
+const EBML_UNKNOWN_SIZE = [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF];
+
+// Opus frame durations in ms, indexed by TOC config (RFC 6716 section 3.1)
+const OPUS_FRAME_MS = [
+    10, 20, 40, 60, 10, 20, 40, 60, 10, 20, 40, 60,
+    10, 20, 10, 20,
+    2.5, 5, 10, 20, 2.5, 5, 10, 20, 2.5, 5, 10, 20, 2.5, 5, 10, 20
+];
+
+function readEbmlVint(bytes, pos, stripMarker) {
+    const first = bytes[pos];
+    if (first === undefined || first === 0) throw new Error(`Invalid EBML vint at ${pos}`);
+    let length = 1;
+    let mask = 0x80;
+    while (!(first & mask)) {
+        mask >>= 1;
+        length++;
+    }
+    if (pos + length > bytes.length) throw new Error('Truncated EBML vint');
+    let value = stripMarker ? (first & (mask - 1)) : first;
+    let allOnes = stripMarker && (first & (mask - 1)) === mask - 1;
+    for (let i = 1; i < length; i++) {
+        value = value * 256 + bytes[pos + i];
+        if (bytes[pos + i] !== 0xFF) allOnes = false;
+    }
+    return { value, length, unknown: allOnes };
+}
+
+function readEbmlUint(bytes, start, end) {
+    let value = 0;
+    for (let i = start; i < end; i++) value = value * 256 + bytes[i];
+    return value;
+}
+
+function opusPacketDurationMs(bytes, start, end) {
+    if (end <= start) return 0;
+    const toc = bytes[start];
+    const code = toc & 0x03;
+    let frames = 1;
+    if (code === 1 || code === 2) frames = 2;
+    else if (code === 3) frames = end - start > 1 ? (bytes[start + 1] & 0x3F) : 1;
+    return OPUS_FRAME_MS[toc >> 3] * frames;
+}
+
+function encodeEbmlElement(idBytes, payload) {
+    // 8-byte size so the header length doesn't depend on the payload
+    const size = [0x01, 0, 0, 0, 0, 0, 0, 0];
+    let remaining = payload.length;
+    for (let i = 7; i >= 1; i--) {
+        size[i] = remaining & 0xFF;
+        remaining = Math.floor(remaining / 256);
+    }
+    return concatBytes([Uint8Array.from(idBytes), Uint8Array.from(size), payload]);
+}
+
+function concatBytes(parts) {
+    const total = parts.reduce((sum, part) => sum + part.length, 0);
+    const out = new Uint8Array(total);
+    let offset = 0;
+    for (const part of parts) {
+        out.set(part, offset);
+        offset += part.length;
+    }
+    return out;
+}
+
+/**
+ * Cut a MediaRecorder WebM/Opus file down to the packets between keepFromMs and
+ * keepUntilMs. Whole packets are dropped and the remaining timestamps rebased to 0,
+ * so no decoding or re-encoding is needed. Returns { bytes, leadMs, trailMs,
+ * originalDurationMs } or null if the file has a layout we don't rewrite.
+ */
+function trimWebmOpus(bytes, keepFromMs, keepUntilMs) {
+    if (bytes.length < 4 || readEbmlUint(bytes, 0, 4) !== EBML_ID.EBML) return null;
+
+    // Pass 1: index every block and the Segment-level elements we keep
+    const headerParts = [];
+    const blocks = [];
+    let timecodeScale = 1000000;
+    let clusterTc = 0;
+    let clusterIndex = -1;
+    let pos = 0;
+    try {
+        while (pos < bytes.length) {
+            const id = readEbmlVint(bytes, pos, false);
+            const size = readEbmlVint(bytes, pos + id.length, true);
+            const payloadStart = pos + id.length + size.length;
+
+            if (id.value === EBML_ID.SEGMENT || id.value === EBML_ID.CLUSTER) {
+                if (id.value === EBML_ID.CLUSTER) clusterIndex++;
+                pos = payloadStart;
+                continue;
+            }
+            if (size.unknown) return null;
+            const payloadEnd = Math.min(payloadStart + size.value, bytes.length);
+
+            if (id.value === EBML_ID.EBML) {
+                headerParts.push(bytes.subarray(pos, payloadEnd));
+            } else if (id.value === EBML_ID.INFO) {
+                // Keep Info minus Duration (it would be stale after trimming)
+                const children = [];
+                let child = payloadStart;
+                while (child < payloadEnd) {
+                    const childId = readEbmlVint(bytes, child, false);
+                    const childSize = readEbmlVint(bytes, child + childId.length, true);
+                    const childStart = child + childId.length + childSize.length;
+                    const childEnd = childStart + childSize.value;
+                    if (childId.value === EBML_ID.TIMECODE_SCALE) {
+                        timecodeScale = readEbmlUint(bytes, childStart, childEnd) || timecodeScale;
+                    }
+                    if (childId.value !== EBML_ID.DURATION) {
+                        children.push(bytes.subarray(child, childEnd));
+                    }
+                    child = childEnd;
+                }
+                headerParts.push(encodeEbmlElement(
+                    bytes.subarray(pos, pos + id.length), concatBytes(children)));
+            } else if (id.value === EBML_ID.CLUSTER_TIMECODE) {
+                clusterTc = readEbmlUint(bytes, payloadStart, payloadEnd);
+            } else if (id.value === EBML_ID.SIMPLE_BLOCK) {
+                if (payloadEnd !== payloadStart + size.value) break;  // truncated tail
+                const track = readEbmlVint(bytes, payloadStart, true);
+                const relOffset = payloadStart + track.length;
+                const rel = (bytes[relOffset] << 24 >> 16) | bytes[relOffset + 1];
+                const flags = bytes[relOffset + 2];
+                if (flags & 0x06) return null;  // laced blocks: not produced by MediaRecorder
+                const ticks = clusterTc + rel;
+                const startMs = ticks * timecodeScale / 1e6;
+                blocks.push({
+                    start: pos,
+                    end: payloadEnd,
+                    relOffset,
+                    ticks,
+                    clusterTc,
+                    clusterIndex,
+                    startMs,
+                    endMs: startMs + opusPacketDurationMs(bytes, relOffset + 3, payloadEnd)
+                });
+            } else if (id.value === EBML_ID.BLOCK_GROUP) {
+                return null;
+            } else if (!CLUSTER_CHILD_IDS.has(id.value) && id.value !== EBML_ID.SEEK_HEAD &&
+                       id.value !== EBML_ID.CUES && id.value !== EBML_ID.VOID) {
+                // Tracks, Tags, ... (SeekHead/Cues hold byte offsets that trimming invalidates)
+                headerParts.push(bytes.subarray(pos, payloadEnd));
+            }
+            pos = payloadEnd;
+        }
+    } catch (error) {
+        // Truncated tail (recorder stopped mid-element) - use what was parsed
+        console.warn('WebM parse stopped early:', error.message);
+    }
+    if (blocks.length === 0) return null;
+
+    const originStartMs = Math.min(blocks[0].startMs, 0);
+    const originalEndMs = blocks.reduce((max, b) => Math.max(max, b.endMs), 0);
+    const kept = blocks.filter(b => b.endMs > keepFromMs && b.startMs < keepUntilMs);
+    if (kept.length === 0) return null;
+
+    // Pass 2: rebuild Segment (unknown size) with rebased clusters
+    const shiftTicks = kept[0].ticks;
+    const parts = [headerParts[0], Uint8Array.from([0x18, 0x53, 0x80, 0x67]),
+        Uint8Array.from(EBML_UNKNOWN_SIZE), ...headerParts.slice(1)];
+    let currentCluster = null;
+    let newClusterTc = 0;
+    for (const block of kept) {
+        if (block.clusterIndex !== currentCluster) {
+            currentCluster = block.clusterIndex;
+            newClusterTc = Math.max(0, block.clusterTc - shiftTicks);
+            const tcBytes = [];
+            let remaining = newClusterTc;
+            do {
+                tcBytes.unshift(remaining & 0xFF);
+                remaining = Math.floor(remaining / 256);
+            } while (remaining > 0);
+            parts.push(Uint8Array.from([0x1F, 0x43, 0xB6, 0x75, ...EBML_UNKNOWN_SIZE,
+                EBML_ID.CLUSTER_TIMECODE, 0x80 | tcBytes.length, ...tcBytes]));
+        }
+        const rel = block.ticks - shiftTicks - newClusterTc;
+        if (rel < -32768 || rel > 32767) return null;
+        const element = bytes.slice(block.start, block.end);
+        const relIndex = block.relOffset - block.start;
+        element[relIndex] = (rel >> 8) & 0xFF;
+        element[relIndex + 1] = rel & 0xFF;
+        parts.push(element);
+    }
+
+    const keptStartMs = kept[0].startMs;
+    const keptEndMs = kept.reduce((max, b) => Math.max(max, b.endMs), 0);
+    const originalDurationMs = Math.round(originalEndMs - originStartMs);
+    const leadMs = Math.round(keptStartMs - originStartMs);
+    return {
+        bytes: concatBytes(parts),
+        leadMs,
+        trailMs: originalDurationMs - leadMs - Math.round(keptEndMs - keptStartMs),
+        originalDurationMs
+    };
+}
+
 // Add CSS for tooltip animations
 const tooltipStyle = document.createElement('style');
 tooltipStyle.textContent = `
@@ -2416,12 +2817,48 @@ function createCorrectionSuggestion(message, corrections, onCorrect, onDismiss)
 }
 
 
+// Streaming protocol 2: numbered events, UTF-8 JSON, `delta` events with only the new
+// reply text; the `complete` event's final_text is authoritative
+const STREAM_PROTOCOL = 2;
+// Reconnects per turn after a dropped connection (the server finishes the turn regardless)
+const STREAM_MAX_RESUMES = 5;
+const STREAM_RESUME_ATTEMPTS = 3;
+
+// Reopen a turn's event stream, replaying everything after lastEventId
+async function resumeTurnStream(streamId, lastEventId) {
+    let lastError = null;
+    for (let attempt = 1; attempt <= STREAM_RESUME_ATTEMPTS; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+        try {
+            console.log(`🔁 Resuming turn stream ${streamId} after event ${lastEventId} (attempt ${attempt})`);
+            const response = await fetch(`/api/process_audio_stream/${streamId}`, {
+                headers: { 'Last-Event-ID': String(lastEventId) }
+            });
+            if (response.status === 404) {
+                throw new Error('Turn stream expired');
+            }
+            if (response.ok) {
+                return response.body.getReader();
+            }
+            lastError = new Error(`Resume failed: ${response.status}`);
+        } catch (error) {
+            lastError = error;
+            if (error.message === 'Turn stream expired') break;
+        }
+    }
+    // The server already has this turn; re-sending the audio would record it twice
+    lastError.turnInProgress = true;
+    throw lastError;
+}
+
 // Enhanced streaming version with typewriter effect
-async function sendAudioToServerStream(audioBlob) {
+async function sendAudioToServerStream(audioBlob, trim = null) {
     try {
         const formData = new FormData();
         formData.append('audio', audioBlob, 'audio.wav');
         formData.append('session_id', sessionId);
+        formData.append('stream_protocol', STREAM_PROTOCOL);
+        appendTrimFields(formData, trim);
 
         // Create EventSource for streaming
         const response = await fetch('/api/process_audio_stream', {
@@ -2429,6 +2866,14 @@ async function sendAudioToServerStream(audioBlob) {
             body: formData
         });
 
+        // Rate limited: retrying through the non-streaming endpoint would be refused too
+        if (response.status === 429) {
+            const limitData = await response.json().catch(() => ({}));
+            displayNoSpeechMessage(limitData.message || 'Please wait a moment and try again.');
+            transitionTo('IDLE');
+            return;
+        }
+
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -2446,22 +2891,54 @@ async function sendAudioToServerStream(audioBlob) {
         }
 
         // Handle the streaming response
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
+        const streamId = response.headers.get('X-Stream-Id');
+        let reader = response.body.getReader();
+        let decoder = new TextDecoder();
 
         let messageDiv = null;
         let textContentDiv = null;
         let transcript = '';
         let evaluation = null;
+        let sseBuffer = '';
+        let streamedText = '';
+        let lastEventId = 0;
+        let streamEnded = false;
+        let resumes = 0;
 
         while (true) {
-            const { done, value } = await reader.read();
-            if (done) break;
+            let chunk;
+            try {
+                chunk = await reader.read();
+            } catch (readError) {
+                chunk = { done: true, error: readError };
+            }
+            if (chunk.done) {
+                // Protocol 2 finishes with an `end` event; without it the connection was cut
+                // mid-turn, so pick the turn up where we left off instead of re-recording
+                if (streamEnded || !streamId || resumes >= STREAM_MAX_RESUMES) {
+                    if (chunk.error) throw chunk.error;
+                    break;
+                }
+                resumes++;
+                reader = await resumeTurnStream(streamId, lastEventId);
+                decoder = new TextDecoder();
+                sseBuffer = '';
+                continue;
+            }
+            const value = chunk.value;
 
-            const chunk = decoder.decode(value);
-            const lines = chunk.split('\n');
+            // stream: true keeps a UTF-8 character split across two reads intact;
+            // only complete events (terminated by a blank line) are parsed
+            sseBuffer += decoder.decode(value, { stream: true });
+            const events = sseBuffer.split('\n\n');
+            sseBuffer = events.pop();
+            const lines = events.flatMap(block => block.split('\n'));
 
             for (const line of lines) {
+                if (line.startsWith('id: ')) {
+                    lastEventId = Number(line.slice(4));
+                    continue;
+                }
                 if (line.startsWith('data: ')) {
                     try {
                         const data = JSON.parse(line.slice(6));
@@ -2509,7 +2986,10 @@ async function sendAudioToServerStream(audioBlob) {
                             }
                         }
 
-                        if (data.type === 'words') {
+                        if (data.type === 'words' || data.type === 'delta') {
+                            // Protocol 2 sends only the new text; protocol 1 re-sends it all
+                            const shownText = data.type === 'delta' ? (streamedText += data.text) : data.accumulated;
+
                             // Show white box on FIRST word chunk and hide thinking loader
                             if (!messageDiv) {
                                 const whiteBoxTime = performance.now();
@@ -2550,8 +3030,8 @@ async function sendAudioToServerStream(audioBlob) {
                             }
 
                             // Update text progressively with smooth flow animation
-                            textContentDiv.setAttribute('data-original-text', data.accumulated);
-                            textContentDiv.textContent = displayText(data.accumulated);
+                            textContentDiv.setAttribute('data-original-text', shownText);
+                            textContentDiv.textContent = displayText(shownText);
                             textContentDiv.classList.add('typing');
 
                             // Add smooth flow animation for new text
@@ -2668,6 +3148,10 @@ async function sendAudioToServerStream(audioBlob) {
                             }
                         }
 
+                        if (data.type === 'end') {
+                            streamEnded = true;
+                        }
+
                         if (data.type === 'error') {
                             throw new Error(data.message);
                         }
@@ -2685,9 +3169,14 @@ async function sendAudioToServerStream(audioBlob) {
         console.error('Streaming Error:', error);
         if (window.Sentry) Sentry.captureException(error);
 
+        if (error.turnInProgress) {
+            transitionTo('IDLE');
+            return;
+        }
+
         // Fallback to original method
         console.log('Falling back to original sendAudioToServer');
-        return sendAudioToServer(audioBlob);
+        return sendAudioToServer(audioBlob, trim);
     }
 }
 
@@ -2731,21 +3220,28 @@ function createMessageButtons() {
     speakButton.className = 'p-1 rounded hover:bg-gray-200';
     speakButton.innerHTML = '🔊';
     speakButton.onclick = function() {
-        const text = this.closest('.p-4').querySelector('.text-content').textContent.trim();
+        // The Devanagari original, not the (possibly romanized) visible text
+        const textEl = this.closest('.p-4').querySelector('.text-content');
+        const text = (textEl.getAttribute('data-original-text') || textEl.textContent).trim();
         if (!text) {
             console.warn('No text to speak - text content is empty');
             return;
         }
         const formData = new FormData();
         formData.append('text', text);
+        formData.append('audio_delivery', AUDIO_DELIVERY);
         fetch('/api/speak', {
             method: 'POST',
             body: formData
         })
         .then(response => response.json())
         .then(data => {
-            if (data.audio) {
-                playAudioResponse(data.audio);
+            if (data.error === 'rate_limited') {
+                showTranslation(data.message, speakButton);
+                return;
+            }
+            if (audioFromResponse(data)) {
+                playAudioResponse(audioFromResponse(data));
             }
         })
         .catch(error => {
@@ -2774,7 +3270,9 @@ function createMessageButtons() {
     translateButton.style.justifyContent = 'center';
     translateButton.onclick = async function() {
         try {
-            const text = this.closest('.p-4').querySelector('.text-content').textContent;
+            // Send the Devanagari original so it matches the prefetched translation and glossary
+            const textEl = this.closest('.p-4').querySelector('.text-content');
+            const text = textEl.getAttribute('data-original-text') || textEl.textContent;
             const response = await fetch('/api/translate', {
                 method: 'POST',
                 headers: {
@@ -2783,7 +3281,9 @@ function createMessageButtons() {
                 body: JSON.stringify({ text })
             });
             const data = await response.json();
-            if (data.translation) {
+            if (data.error === 'rate_limited') {
+                showTranslation(data.message, translateButton);
+            } else if (data.translation) {
                 showTranslation(data.translation, translateButton);
             }
         } catch (error) {
@@ -2796,22 +3296,72 @@ function createMessageButtons() {
     return buttonsDiv;
 }
 
+// Append one chunk to a SourceBuffer, resolving once it has been consumed
+function appendToSourceBuffer(sourceBuffer, chunk) {
+    return new Promise((resolve, reject) => {
+        sourceBuffer.addEventListener('updateend', resolve, { once: true });
+        sourceBuffer.addEventListener('error', reject, { once: true });
+        sourceBuffer.appendBuffer(chunk);
+    });
+}
+
+// Play a streamed /api/speak/stream response. With MediaSource, playback starts on the
+// first chunk; otherwise (e.g. older iOS Safari, WAV from fake providers) the whole clip
+// is buffered and played as a blob, which still skips base64 encoding.
+async function playAudioStream(response) {
+    const contentType = (response.headers.get('Content-Type') || 'audio/mpeg').split(';')[0];
+
+    if (!(window.MediaSource && MediaSource.isTypeSupported(contentType) && response.body)) {
+        const blobUrl = URL.createObjectURL(await response.blob());
+        try {
+            await playAudioResponse(blobUrl);
+        } finally {
+            URL.revokeObjectURL(blobUrl);
+        }
+        return;
+    }
+
+    const mediaSource = new MediaSource();
+    const mediaUrl = URL.createObjectURL(mediaSource);
+    mediaSource.addEventListener('sourceopen', async () => {
+        const sourceBuffer = mediaSource.addSourceBuffer(contentType);
+        const reader = response.body.getReader();
+        try {
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                await appendToSourceBuffer(sourceBuffer, value);
+            }
+            mediaSource.endOfStream();
+        } catch (error) {
+            debugLog(`❌ Audio stream error: ${error.message}`, true);
+            if (mediaSource.readyState === 'open') mediaSource.endOfStream('network');
+        }
+    }, { once: true });
+
+    try {
+        await playAudioResponse(mediaUrl);
+    } finally {
+        URL.revokeObjectURL(mediaUrl);
+    }
+}
+
 // Helper function to generate and play audio (now awaits playback + auto-starts)
 async function generateAndPlayAudio(text, options = {}) {
     try {
-        // Use existing TTS endpoint
+        // Stream the reply's audio so playback starts before synthesis finishes
         const formData = new FormData();
         formData.append('text', text);
-        const response = await fetch('/api/speak', {
+        const response = await fetch('/api/speak/stream', {
             method: 'POST',
             body: formData
         });
-        const data = await response.json();
-        if (data.audio) {
-            await playAudioResponse(data.audio);
-            if (!options.skipAutoRecord) {
-                scheduleAutoStartRecording();
-            }
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        await playAudioStream(response);
+        if (!options.skipAutoRecord) {
+            scheduleAutoStartRecording();
         }
     } catch (error) {
         console.error('TTS Error:', error);
@@ -2820,7 +3370,7 @@ async function generateAndPlayAudio(text, options = {}) {
 }
 
 // Process audio and handle responses (Original function - kept as fallback)
-async function sendAudioToServer(audioBlob) {
+async function sendAudioToServer(audioBlob, trim = null) {
     try {
         //status.textContent = 'Processing...';
         
@@ -2828,6 +3378,8 @@ async function sendAudioToServer(audioBlob) {
         formData.append('audio', audioBlob, 'audio.wav');
         formData.append('conversation_history', JSON.stringify(conversationHistory));
         formData.append('session_id', sessionId);
+        formData.append('audio_delivery', AUDIO_DELIVERY);
+        appendTrimFields(formData, trim);
 
         const response = await fetch('/api/process_audio', {
             method: 'POST',
@@ -2842,7 +3394,7 @@ async function sendAudioToServer(audioBlob) {
                 const newSession = await startConversation();
                 if (newSession) {
                     // Retry the audio send with new session
-                    return sendAudioToServer(audioBlob);
+                    return sendAudioToServer(audioBlob, trim);
                 }
             }
             throw new Error(errorData.error);
@@ -2894,7 +3446,7 @@ async function sendAudioToServer(audioBlob) {
                     displayMessage('assistant', data.text, []);
                     updateRewardsDisplay(data.sentence_count, data.reward_points);
                     updateProgressBar(data.sentence_count);
-                    await playAudioResponse(data.audio);
+                    await playAudioResponse(audioFromResponse(data));
                     if (pendingFunctionCall) {
                         handleFunctionCall(pendingFunctionCall, pendingConversationId);
                     } else {
@@ -2907,7 +3459,7 @@ async function sendAudioToServer(audioBlob) {
             displayMessage('assistant', data.text, []);
             updateRewardsDisplay(data.sentence_count, data.reward_points);
             updateProgressBar(data.sentence_count);
-            await playAudioResponse(data.audio);
+            await playAudioResponse(audioFromResponse(data));
             if (pendingFunctionCall) {
                 console.log('Function call detected, redirecting after TTS:', pendingFunctionCall);
                 handleFunctionCall(pendingFunctionCall, pendingConversationId);
@@ -0,0 +1,370 @@
+import os
+import time
+import queue
+import random
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+
+import requests
+from flask import make_response
+
+logger = logging.getLogger(__name__)
+
+# Fraction of turns traced. Untraced turns get no-op spans, so instrumentation is free.
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '1.0'))
+# Finished traces kept in memory per worker for /api/admin/traces
+TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', '200'))
+# Log a one-line stage breakdown for every finished trace
+TRACE_LOG_SUMMARY = os.environ.get('TRACE_LOG_SUMMARY', 'true').lower() == 'true'
+
+# OTLP/HTTP (JSON encoding) export, e.g. http://localhost:4318 for a local collector.
+# Uses the standard OpenTelemetry env vars; no OTel SDK is needed.
+OTEL_EXPORTER_OTLP_ENDPOINT = os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT')
+OTEL_EXPORTER_OTLP_HEADERS = os.environ.get('OTEL_EXPORTER_OTLP_HEADERS', '')
+OTEL_SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME', 'hindi-tutor')
+OTLP_EXPORT_INTERVAL = 2.0
+OTLP_EXPORT_BATCH = 50
+OTLP_EXPORT_TIMEOUT = 5
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_finished = deque(maxlen=TRACE_BUFFER_SIZE)
+_export_queue = queue.Queue(maxsize=1000)
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+
+class Trace:
+    """All spans of one turn. Finished when its root span ends."""
+
+    def __init__(self):
+        self.trace_id = '%032x' % random.getrandbits(128)
+        self.spans = []
+        self.root = None
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        root_start = self.root.start_ns
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'start': self.root.start_ns / 1e9,
+            'duration_ms': self.root.duration_ms,
+            'attributes': dict(self.root.attributes),
+            'spans': [dict(span.to_dict(), offset_ms=round((span.start_ns - root_start) / 1e6, 1))
+                      for span in spans],
+        }
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns',
+                 'error', '_token')
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._token = None
+        trace.add(self)
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns or time.time_ns()
+        return round((end_ns - self.start_ns) / 1e6, 1)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, exc):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self is self.trace.root:
+            _finish_trace(self.trace)
+
+    def to_dict(self):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'duration_ms': self.duration_ms if self.end_ns else None,
+            'attributes': dict(self.attributes),
+            'error': self.error,
+        }
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_error(exc)
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Returned when the turn isn't sampled; every method is a no-op."""
+    span_id = None
+    trace = None
+    duration_ms = 0.0
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def start_trace(name, **attributes):
+    """Start the root span of a new trace (one per turn). Sampled by TRACE_SAMPLE_RATE.
+
+    Use it as a context manager for request-scoped work, or pass it to
+    stream_in_span() when the work continues in a streaming generator.
+    """
+    if TRACE_SAMPLE_RATE < 1.0 and random.random() >= TRACE_SAMPLE_RATE:
+        return NOOP_SPAN
+    trace = Trace()
+    root = Span(trace, name, attributes=attributes)
+    trace.root = root
+    return root
+
+
+def span(name, **attributes):
+    """Child span of the current span, for `with span('stt', provider=...)`. No-op outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent_id=parent.span_id, attributes=attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name, **attributes):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def wrap(fn):
+    """Bind fn to the current span so it can run on an executor thread.
+
+    ThreadPoolExecutor workers don't inherit context vars, so submit wrap(fn)
+    instead of fn to keep spans created inside it in this turn's trace.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run_in_span(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return run_in_span
+
+
+def stream_in_span(generator, root):
+    """Iterate a streaming generator with `root` as the current span on every step.
+
+    A Flask streaming response keeps running after the view returns, outside the
+    view's context. The root span ends when the stream finishes or the client goes away.
+    """
+    try:
+        while True:
+            token = _current_span.set(root) if root is not NOOP_SPAN else None
+            try:
+                item = next(generator)
+            except StopIteration:
+                break
+            finally:
+                if token is not None:
+                    _current_span.reset(token)
+            yield item
+    except GeneratorExit:
+        root.set_attribute('client_disconnected', True)
+        raise
+    except Exception as e:
+        root.record_error(e)
+        raise
+    finally:
+        generator.close()
+        root.end()
+
+
+def trace_request(name):
+    """View decorator: run the view inside a new trace.
+
+    For streamed responses the root span stays open until the stream is consumed,
+    so stages yielded after the view returns are part of the same trace.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            root = start_trace(name)
+            if root is NOOP_SPAN:
+                return view(*args, **kwargs)
+            token = _current_span.set(root)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception as e:
+                root.record_error(e)
+                root.end()
+                raise
+            finally:
+                _current_span.reset(token)
+            root.set_attribute('http.status_code', response.status_code)
+            if response.is_streamed:
+                response.response = stream_in_span(iter(response.response), root)
+            else:
+                root.end()
+            return response
+        return wrapper
+    return decorator
+
+
+def recent_traces(limit=50):
+    return list(_finished)[-limit:][::-1]
+
+
+def find_trace(trace_id):
+    for trace in _finished:
+        if trace['trace_id'] == trace_id:
+            return trace
+    return None
+
+
+def format_summary(trace):
+    """'turn 2314ms | stt 812 | eval 1190 | llm.stream 1433 ...' (top-level children only)"""
+    root_id = trace['spans'][0]['span_id'] if trace['spans'] else None
+    parts = [f"{span['name']} {span['duration_ms']:.0f}" for span in trace['spans']
+             if span['parent_id'] == root_id and span['duration_ms'] is not None]
+    return f"{trace['name']} {trace['duration_ms']:.0f}ms | " + ' | '.join(parts)
+
+
+def _finish_trace(trace):
+    data = trace.to_dict()
+    _finished.append(data)
+    if TRACE_LOG_SUMMARY:
+        logger.info(f"🧭 TRACE {trace.trace_id[:8]}: {format_summary(data)}")
+    if OTEL_EXPORTER_OTLP_ENDPOINT:
+        _ensure_exporter()
+        try:
+            _export_queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_span(span):
+    data = {
+        'traceId': span.trace.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': 2 if span.parent_id is None else 1,  # SERVER for the root, INTERNAL otherwise
+        'startTimeUnixNano': str(span.start_ns),
+        'endTimeUnixNano': str(span.end_ns or span.trace.root.end_ns),
+        'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+        'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+    }
+    if span.parent_id:
+        data['parentSpanId'] = span.parent_id
+    return data
+
+
+def _otlp_headers():
+    headers = {'Content-Type': 'application/json'}
+    for pair in OTEL_EXPORTER_OTLP_HEADERS.split(','):
+        if '=' in pair:
+            key, value = pair.split('=', 1)
+            headers[key.strip()] = value.strip()
+    return headers
+
+
+def _ensure_exporter():
+    """Start the OTLP export thread once per process (re-started after a fork)."""
+    global _exporter_pid
+    if _exporter_pid == os.getpid():
+        return
+    with _exporter_lock:
+        if _exporter_pid == os.getpid():
+            return
+        _exporter_pid = os.getpid()
+        threading.Thread(target=_export_loop, name='trace-exporter', daemon=True).start()
+
+
+def _export_loop():
+    url = OTEL_EXPORTER_OTLP_ENDPOINT.rstrip('/') + '/v1/traces'
+    headers = _otlp_headers()
+    while True:
+        batch = [_export_queue.get()]
+        deadline = time.time() + OTLP_EXPORT_INTERVAL
+        while len(batch) < OTLP_EXPORT_BATCH and time.time() < deadline:
+            try:
+                batch.append(_export_queue.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                break
+        spans = [_otlp_span(span) for trace in batch for span in list(trace.spans)]
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': OTEL_SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }]}
+        try:
+            resp = requests.post(url, json=payload, headers=headers, timeout=OTLP_EXPORT_TIMEOUT)
+            if resp.status_code >= 300:
+                logger.warning(f"OTLP export returned {resp.status_code}: {resp.text[:200]}")
+        except Exception as e:
+            logger.warning(f"OTLP export failed for {len(batch)} traces: {e}")
@@ -0,0 +1,144 @@
+import os
+import queue
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS, EXECUTOR_QUEUE_DEPTH, register_gauge_callback
+from translation_glossary import GLOSSARY
+
+logger = logging.getLogger(__name__)
+
+# English translations of tutor lines for the translate button. The same lines recur across
+# children, so translations are cached by normalized text (per-worker LRU in front of Redis)
+# and every reply is translated in the background as soon as it is complete, before anyone
+# taps. Single words are looked up in a local glossary and never reach the LLM.
+TRANSLATION_CACHE_ENABLED = os.environ.get('TRANSLATION_CACHE_ENABLED', 'true').lower() == 'true'
+TRANSLATION_CACHE_TTL_SECONDS = 30 * 24 * 3600
+TRANSLATION_LRU_SIZE = int(os.environ.get('TRANSLATION_LRU_SIZE', '2000'))
+TRANSLATION_PREFETCH_QUEUE_SIZE = 500
+TRANSLATION_KEY = 'translation:en:{}'
+
+_WORD_PUNCTUATION = '।॥.,!?;:"\'()'
+
+_redis = None
+_translate = None
+_lru = OrderedDict()  # normalized text -> translation
+_lru_lock = threading.Lock()
+_prefetch_queue = queue.Queue(maxsize=TRANSLATION_PREFETCH_QUEUE_SIZE)
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def init_translation(redis_client=None, translate=None):
+    """translate(text) -> English text, raising on failure (the uncached path)."""
+    global _redis, _translate
+    _redis = redis_client
+    _translate = translate
+    register_gauge_callback(EXECUTOR_QUEUE_DEPTH, _prefetch_queue.qsize, pool='translation_prefetch')
+
+
+def normalize(text):
+    return ' '.join(unicodedata.normalize('NFC', text or '').split())
+
+
+def glossary_lookup(text):
+    """English for a single Hindi word, or None if text isn't one word in the glossary."""
+    word = normalize(text).strip(_WORD_PUNCTUATION)
+    if not word or ' ' in word:
+        return None
+    return GLOSSARY.get(word)
+
+
+def _cache_key(normalized):
+    return TRANSLATION_KEY.format(hashlib.sha1(normalized.encode('utf-8')).hexdigest())
+
+
+def _remember(normalized, translation):
+    with _lru_lock:
+        _lru[normalized] = translation
+        _lru.move_to_end(normalized)
+        while len(_lru) > TRANSLATION_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _lookup(normalized):
+    """(translation, result) from the glossary, this worker's LRU or Redis; (None, 'miss') otherwise."""
+    word = glossary_lookup(normalized)
+    if word:
+        return word, 'glossary'
+    if not TRANSLATION_CACHE_ENABLED:
+        return None, 'miss'
+    with _lru_lock:
+        translation = _lru.get(normalized)
+        if translation is not None:
+            _lru.move_to_end(normalized)
+            return translation, 'hit'
+    if _redis is not None:
+        try:
+            stored = _redis.get(_cache_key(normalized))
+            if stored:
+                translation = stored.decode('utf-8')
+                _remember(normalized, translation)
+                return translation, 'hit'
+        except Exception as e:
+            logger.warning(f"Failed to read translation cache: {e}")
+    return None, 'miss'
+
+
+def translate(text, count=True):
+    """English translation of text. Raises if it isn't cached and the LLM call fails.
+
+    count=False keeps background prefetches out of the cache hit-rate metric.
+    """
+    normalized = normalize(text)
+    if not normalized:
+        return ''
+    translation, result = _lookup(normalized)
+    if count:
+        CACHE_REQUESTS.inc(cache='translation', result=result)
+    if translation is not None:
+        return translation
+    translation = (_translate(normalized) or '').strip()
+    if translation and TRANSLATION_CACHE_ENABLED:
+        _remember(normalized, translation)
+        if _redis is not None:
+            try:
+                _redis.set(_cache_key(normalized), translation, ex=TRANSLATION_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to write translation cache: {e}")
+    return translation
+
+
+def prefetch_translation(text):
+    """Translate a tutor line in the background so a later tap is a cache hit."""
+    if not TRANSLATION_CACHE_ENABLED or _translate is None or not normalize(text):
+        return
+    _ensure_worker()
+    try:
+        _prefetch_queue.put_nowait(text)
+    except queue.Full:
+        logger.debug("Translation prefetch queue full, skipping")
+
+
+def _ensure_worker():
+    """Start the prefetch thread once per process (re-started after a fork)."""
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+        threading.Thread(target=_prefetch_loop, name='translation-prefetch', daemon=True).start()
+
+
+def _prefetch_loop():
+    while True:
+        text = _prefetch_queue.get()
+        try:
+            translate(text, count=False)
+        except Exception as e:
+            logger.warning(f"Translation prefetch failed: {e}")
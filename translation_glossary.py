@@ -0,0 +1,134 @@
+# Hindi -> English for single words a child taps to translate. Served locally by
+# translation.py; anything not listed here goes through the cached LLM translation.
+# Keys are NFC Devanagari without punctuation.
+
+GLOSSARY = {
+    # Greetings and feedback Kiki uses a lot
+    'नमस्ते': 'hello',
+    'अलविदा': 'goodbye',
+    'धन्यवाद': 'thank you',
+    'शुक्रिया': 'thank you',
+    'शाबाश': 'well done',
+    'वाह': 'wow',
+    'बढ़िया': 'great',
+    'अच्छा': 'good',
+    'अच्छी': 'good',
+    'बहुत': 'very',
+    'सुंदर': 'beautiful',
+    'मज़ेदार': 'fun',
+    'हाँ': 'yes',
+    'हां': 'yes',
+    'नहीं': 'no',
+    'ठीक': 'okay',
+    'दोस्त': 'friend',
+
+    # Question words
+    'क्या': 'what',
+    'कौन': 'who',
+    'कहाँ': 'where',
+    'कहां': 'where',
+    'कब': 'when',
+    'क्यों': 'why',
+    'कैसे': 'how',
+    'कैसा': 'how',
+    'कैसी': 'how',
+    'कितना': 'how much',
+    'कितने': 'how many',
+    'कौनसा': 'which',
+
+    # Pronouns
+    'मैं': 'I',
+    'मुझे': 'to me',
+    'मेरा': 'my',
+    'मेरी': 'my',
+    'मेरे': 'my',
+    'तुम': 'you',
+    'तुम्हें': 'to you',
+    'तुम्हारा': 'your',
+    'तुम्हारी': 'your',
+    'तुम्हारे': 'your',
+    'आप': 'you',
+    'आपका': 'your',
+    'आपकी': 'your',
+    'हम': 'we',
+    'हमारा': 'our',
+    'वह': 'he / she / that',
+    'वो': 'he / she / that',
+    'यह': 'this',
+    'ये': 'these',
+    'उसका': 'his / her',
+    'उसकी': 'his / her',
+
+    # Family
+    'मम्मी': 'mom',
+    'माँ': 'mother',
+    'पापा': 'dad',
+    'पिताजी': 'father',
+    'भाई': 'brother',
+    'बहन': 'sister',
+    'दादा': 'grandfather (father\'s father)',
+    'दादी': 'grandmother (father\'s mother)',
+    'नाना': 'grandfather (mother\'s father)',
+    'नानी': 'grandmother (mother\'s mother)',
+    'परिवार': 'family',
+
+    # Everyday things
+    'खाना': 'food / to eat',
+    'पानी': 'water',
+    'दूध': 'milk',
+    'फल': 'fruit',
+    'आम': 'mango',
+    'सेब': 'apple',
+    'केला': 'banana',
+    'रोटी': 'flatbread',
+    'चावल': 'rice',
+    'मिठाई': 'sweets',
+    'घर': 'home',
+    'स्कूल': 'school',
+    'पार्क': 'park',
+    'खिलौना': 'toy',
+    'किताब': 'book',
+    'कुत्ता': 'dog',
+    'बिल्ली': 'cat',
+    'चिड़िया': 'bird',
+    'पेड़': 'tree',
+    'फूल': 'flower',
+    'रंग': 'colour',
+    'लाल': 'red',
+    'नीला': 'blue',
+    'हरा': 'green',
+    'पीला': 'yellow',
+    'त्योहार': 'festival',
+    'दिवाली': 'Diwali',
+    'होली': 'Holi',
+
+    # Time
+    'आज': 'today',
+    'कल': 'yesterday / tomorrow',
+    'अभी': 'now',
+    'सुबह': 'morning',
+    'शाम': 'evening',
+    'रात': 'night',
+    'दिन': 'day',
+
+    # Common verbs and feelings
+    'पसंद': 'like',
+    'खेलना': 'to play',
+    'खेला': 'played',
+    'जाना': 'to go',
+    'गया': 'went',
+    'गई': 'went',
+    'आना': 'to come',
+    'देखा': 'saw',
+    'पढ़ना': 'to read',
+    'बोलो': 'say',
+    'बताओ': 'tell',
+    'खुश': 'happy',
+    'दुखी': 'sad',
+    'थका': 'tired',
+    'भूख': 'hunger',
+    'प्यार': 'love',
+    'और': 'and',
+    'भी': 'also',
+    'फिर': 'then / again',
+}
@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+
+from models import db, Conversation, ConversationAudio
+from metrics import DB_COMMIT_LATENCY, EXECUTOR_QUEUE_DEPTH, register_gauge_callback
+
+logger = logging.getLogger(__name__)
+
+# Finished turns are journaled in Redis before the stream closes, then written to the
+# DB and session store by a background thread. A worker that dies mid-commit leaves
+# its journal entry behind for any other worker's sweeper to apply.
+TURN_JOURNAL_KEY = 'turn_journal'
+TURN_JOURNAL_LOCK_KEY = 'turn_journal:lock:{}'
+TURN_JOURNAL_DEAD_KEY = 'turn_journal:dead'
+TURN_COMMIT_MAX_ATTEMPTS = 5
+TURN_COMMIT_LOCK_SECONDS = 30
+# Journal entries older than this with no local owner are treated as orphaned
+TURN_COMMIT_ORPHAN_SECONDS = int(os.environ.get('TURN_COMMIT_ORPHAN_SECONDS', '60'))
+TURN_COMMIT_SWEEP_INTERVAL = 30
+# How long a request waits for an earlier turn of its session to land
+TURN_COMMIT_WAIT_SECONDS = 5
+
+_app = None
+_redis = None
+_session_store = None
+_queue = queue.Queue()
+_pending = {}  # journal key -> (record, threading.Event) submitted by this process
+_pending_lock = threading.Lock()
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def init_turn_committer(app, redis_client=None, session_store=None):
+    global _app, _redis, _session_store
+    _app = app
+    _redis = redis_client
+    _session_store = session_store
+    if _redis is None:
+        logger.warning("Turn committer has no Redis - journal is process-local and not crash-safe")
+    register_gauge_callback(EXECUTOR_QUEUE_DEPTH, _queue.qsize, pool='turn_committer')
+    _ensure_worker()
+
+
+def journal_key(record):
+    return f"{record['conversation_id'] or record['session_id']}:{record['turn_index']}"
+
+
+def submit_turn(session_id, session_data, turn_index, pending_audio=None):
+    """Journal a finished turn and queue it for persistence. Returns once the journal write is done.
+
+    Idempotent per (conversation_id, turn_index): re-applying a record never
+    duplicates the audio row or rolls the conversation back to an older turn.
+    """
+    snapshot = dict(session_data)
+    if isinstance(snapshot.get('created_at'), datetime):
+        snapshot['created_at'] = snapshot['created_at'].isoformat()
+    record = {
+        'session_id': session_id,
+        'conversation_id': session_data.get('conversation_id'),
+        'turn_index': turn_index,
+        'submitted_at': time.time(),
+        'session_data': snapshot,
+        'conversation': {
+            'sentences_count': turn_index,
+            'good_response_count': session_data.get('good_response_count', 0),
+            'reward_points': session_data.get('reward_points', 0) - session_data.get('base_reward_points', 0),
+            'conversation_data': session_data['conversation_history'],
+            'amber_data': session_data.get('amber_responses', []),
+            'updated_at': datetime.utcnow().isoformat(),
+        },
+        'audio': None,
+    }
+    if pending_audio is not None:
+        record['audio'] = {
+            column: getattr(pending_audio, column)
+            for column in ('conversation_id', 'turn_index', 'role', 's3_key', 'audio_format',
+                           'file_size_bytes', 'upload_status')
+        }
+    # Round-trip through JSON so the queued record can't be mutated by the caller
+    encoded = json.dumps(record, ensure_ascii=False)
+    record = json.loads(encoded)
+    key = journal_key(record)
+
+    if _redis is not None:
+        try:
+            _redis.hset(TURN_JOURNAL_KEY, key, encoded)
+        except Exception as e:
+            logger.error(f"Failed to journal turn {key}, committing from memory only: {e}")
+            record['journaled'] = False
+
+    with _pending_lock:
+        _pending[key] = (record, threading.Event())
+    _ensure_worker()
+    _queue.put(key)
+    return key
+
+
+def wait_for_turns(session_id=None, conversation_id=None, timeout=TURN_COMMIT_WAIT_SECONDS):
+    """Block until earlier turns of this session / conversation are persisted.
+
+    Call before reading session or conversation state. Turns queued on this
+    worker are waited for; journaled turns from other workers are applied here.
+    """
+    def matches(record):
+        return ((session_id and record.get('session_id') == session_id) or
+                (conversation_id and str(record.get('conversation_id')) == str(conversation_id)))
+
+    deadline = time.time() + timeout
+    with _pending_lock:
+        local = [(key, event) for key, (record, event) in _pending.items() if matches(record)]
+    for key, event in local:
+        if not event.wait(max(0.0, deadline - time.time())):
+            logger.warning(f"Timed out waiting for turn {key} to commit")
+
+    if _redis is None:
+        return
+    try:
+        journal = _redis.hgetall(TURN_JOURNAL_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to read turn journal: {e}")
+        return
+    records = [json.loads(raw) for raw in journal.values()]
+    for record in sorted(filter(matches, records), key=lambda r: r['turn_index']):
+        key = journal_key(record)
+        with _pending_lock:
+            if key in _pending:
+                continue
+        # Another worker may hold the lock; wait for it to finish rather than racing
+        while not _claim_and_apply(key, record) and time.time() < deadline:
+            time.sleep(0.05)
+            try:
+                if not _redis.hexists(TURN_JOURNAL_KEY, key):
+                    break
+            except Exception:
+                break
+
+
+def _ensure_worker():
+    """Start the commit thread and orphan sweeper once per process (re-started after a fork)."""
+    global _worker_pid
+    if _app is None or _worker_pid == os.getpid():
+        return
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+        threading.Thread(target=_worker_loop, name='turn-committer', daemon=True).start()
+        if _redis is not None:
+            threading.Thread(target=_sweeper_loop, name='turn-committer-sweeper', daemon=True).start()
+
+
+def _worker_loop():
+    while True:
+        key = _queue.get()
+        with _pending_lock:
+            record, event = _pending.get(key, (None, None))
+        if record is None:
+            continue
+        for attempt in range(TURN_COMMIT_MAX_ATTEMPTS):
+            try:
+                # False means a waiting request on another worker claimed it; nothing left to do
+                _claim_and_apply(key, record)
+                break
+            except Exception as e:
+                logger.warning(f"Turn commit attempt {attempt + 1} failed for {key}: {e}")
+                time.sleep(min(0.5 * (2 ** attempt), 8))
+        else:
+            _bury(key, record)
+        with _pending_lock:
+            _pending.pop(key, None)
+        event.set()
+
+
+def _sweeper_loop():
+    """Apply journal entries whose worker died before committing them."""
+    while True:
+        try:
+            journal = _redis.hgetall(TURN_JOURNAL_KEY)
+            cutoff = time.time() - TURN_COMMIT_ORPHAN_SECONDS
+            records = [json.loads(raw) for raw in journal.values()]
+            for record in sorted(records, key=lambda r: (r['submitted_at'], r['turn_index'])):
+                key = journal_key(record)
+                with _pending_lock:
+                    if key in _pending:
+                        continue
+                if record['submitted_at'] < cutoff:
+                    logger.info(f"Recovering orphaned turn {key} from journal")
+                    try:
+                        _claim_and_apply(key, record)
+                    except Exception as e:
+                        logger.warning(f"Failed to recover turn {key}: {e}")
+                        record['attempts'] = record.get('attempts', 0) + 1
+                        if record['attempts'] >= TURN_COMMIT_MAX_ATTEMPTS:
+                            _bury(key, record)
+                        else:
+                            _redis.hset(TURN_JOURNAL_KEY, key, json.dumps(record, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"Turn journal sweep failed: {e}")
+        time.sleep(TURN_COMMIT_SWEEP_INTERVAL)
+
+
+def _claim_and_apply(key, record):
+    """Apply a record under a short Redis lock. Returns False if another worker holds it."""
+    if _redis is None:
+        _apply(record)
+        return True
+    lock_key = TURN_JOURNAL_LOCK_KEY.format(key)
+    try:
+        if not _redis.set(lock_key, os.getpid(), nx=True, ex=TURN_COMMIT_LOCK_SECONDS):
+            return False
+    except Exception as e:
+        logger.warning(f"Turn journal lock unavailable for {key}, applying anyway: {e}")
+        _apply(record)
+        return True
+    try:
+        # Applied by someone else while we waited for the lock; re-applying could
+        # overwrite session state a newer request has written since
+        if record.get('journaled', True) and not _redis.hexists(TURN_JOURNAL_KEY, key):
+            return True
+        _apply(record)
+        _redis.hdel(TURN_JOURNAL_KEY, key)
+        return True
+    finally:
+        _redis.delete(lock_key)
+
+
+def _bury(key, record):
+    logger.error(f"Giving up on turn {key} after {TURN_COMMIT_MAX_ATTEMPTS} attempts")
+    if _redis is None:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=True)
+        pipe.hset(TURN_JOURNAL_DEAD_KEY, key, json.dumps(record, ensure_ascii=False))
+        pipe.hdel(TURN_JOURNAL_KEY, key)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to move turn {key} to the dead-letter hash: {e}")
+
+
+def _apply(record):
+    """Write one turn to the DB and session store. Safe to run more than once."""
+    start = time.time()
+    turn_index = record['turn_index']
+    if record['conversation_id']:
+        with _app.app_context():
+            try:
+                conversation = Conversation.query.get(record['conversation_id'])
+                if conversation is None:
+                    logger.warning(f"Conversation {record['conversation_id']} gone, skipping turn {turn_index}")
+                elif (conversation.sentences_count or 0) > turn_index:
+                    logger.info(f"Conversation {conversation.id} already past turn {turn_index}, skipping DB write")
+                else:
+                    values = record['conversation']
+                    conversation.sentences_count = values['sentences_count']
+                    conversation.good_response_count = values['good_response_count']
+                    conversation.reward_points = values['reward_points']
+                    conversation.conversation_data = values['conversation_data']
+                    conversation.amber_data = values['amber_data']
+                    conversation.updated_at = datetime.fromisoformat(values['updated_at'])
+                audio = record.get('audio')
+                if audio and not ConversationAudio.query.filter_by(s3_key=audio['s3_key']).first():
+                    db.session.add(ConversationAudio(**audio))
+                with DB_COMMIT_LATENCY.time(operation='turn'):
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    if _session_store is not None:
+        session_data = dict(record['session_data'])
+        if isinstance(session_data.get('created_at'), str):
+            session_data['created_at'] = datetime.fromisoformat(session_data['created_at'])
+        current = _session_store.load_session(record['session_id'])
+        if current and (len(current.get('conversation_history', [])) > len(session_data['conversation_history']) or
+                        current.get('sentences_count', 0) > session_data.get('sentences_count', 0)):
+            logger.info(f"Session {record['session_id'][:8]} already past turn {turn_index}, skipping save")
+        else:
+            _session_store.save_session(record['session_id'], session_data)
+
+    logger.info(f"💾 TURN COMMIT: {journal_key(record)} in {(time.time() - start) * 1000:.1f}ms "
+                f"(submitted {(start - record['submitted_at']) * 1000:.0f}ms ago)")
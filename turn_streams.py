@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import logging
+import threading
+
+from metrics import SSE_DISCONNECTS
+from tracing import wrap
+
+logger = logging.getLogger(__name__)
+
+# A turn's SSE events are kept this long so a client that lost its connection can
+# reconnect with Last-Event-ID and replay what it missed.
+TURN_STREAM_TTL_SECONDS = int(os.environ.get('TURN_STREAM_TTL_SECONDS', '300'))
+# How often a reader on another worker polls Redis for new events
+TURN_STREAM_POLL_SECONDS = 0.1
+# A reader gives up on a producer that has stopped publishing for this long
+TURN_STREAM_IDLE_TIMEOUT = 60
+TURN_STREAM_KEY = 'turn_stream:{}'
+TURN_STREAM_META_KEY = 'turn_stream:{}:meta'
+
+_redis = None
+_streams = {}  # stream_id -> TurnStream produced by this worker
+_streams_lock = threading.Lock()
+
+
+def init_turn_streams(redis_client=None):
+    """Without Redis, a dropped stream can only be resumed on the worker that produced it."""
+    global _redis
+    _redis = redis_client
+
+
+class TurnStream:
+    """Runs one turn's event generator to completion, independent of the client.
+
+    Encoded events are appended to an in-memory log (and mirrored to a Redis list),
+    so the turn is persisted even if nobody is listening, and any number of readers
+    can follow it from any event id. Event id N is log entry N-1.
+    """
+
+    def __init__(self, user_id):
+        self.stream_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.created = time.time()
+        self.done = False
+        self._events = []
+        self._cond = threading.Condition()
+
+    def run(self, generator):
+        """Start producing on a background thread (bound to the current trace span)."""
+        threading.Thread(target=wrap(self._produce), args=(generator,),
+                         name='turn-stream', daemon=True).start()
+        return self
+
+    def _produce(self, generator):
+        try:
+            for encoded in generator:
+                self._publish(encoded)
+        except Exception as e:
+            logger.error(f"Turn stream {self.stream_id[:8]} producer failed: {e}")
+        finally:
+            self._finish()
+
+    def _publish(self, encoded):
+        with self._cond:
+            self._events.append(encoded)
+            self._cond.notify_all()
+        if _redis is not None:
+            try:
+                key = TURN_STREAM_KEY.format(self.stream_id)
+                pipe = _redis.pipeline(transaction=False)
+                pipe.rpush(key, encoded)
+                if len(self._events) == 1:
+                    meta_key = TURN_STREAM_META_KEY.format(self.stream_id)
+                    pipe.hset(meta_key, mapping={'user_id': self.user_id, 'done': 0})
+                    pipe.expire(meta_key, TURN_STREAM_TTL_SECONDS)
+                pipe.expire(key, TURN_STREAM_TTL_SECONDS)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to buffer turn stream event in Redis: {e}")
+
+    def _finish(self):
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+        if _redis is not None:
+            try:
+                meta_key = TURN_STREAM_META_KEY.format(self.stream_id)
+                pipe = _redis.pipeline(transaction=False)
+                pipe.hset(meta_key, mapping={'user_id': self.user_id, 'done': 1})
+                pipe.expire(meta_key, TURN_STREAM_TTL_SECONDS)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to mark turn stream done in Redis: {e}")
+
+    def follow(self, after_id=0):
+        """Yield encoded events after `after_id` until the producer finishes."""
+        index = max(0, after_id)
+        while True:
+            with self._cond:
+                while index >= len(self._events) and not self.done:
+                    if not self._cond.wait(timeout=TURN_STREAM_IDLE_TIMEOUT):
+                        logger.warning(f"Turn stream {self.stream_id[:8]} idle, closing reader")
+                        return
+                pending = self._events[index:]
+                finished = self.done
+            for encoded in pending:
+                yield encoded
+            index += len(pending)
+            if finished and index >= len(self._events):
+                return
+
+
+class _RedisTurnStreamReader:
+    """Follows a turn produced by another worker through its Redis event list."""
+
+    def __init__(self, stream_id):
+        self.stream_id = stream_id
+
+    def follow(self, after_id=0):
+        key = TURN_STREAM_KEY.format(self.stream_id)
+        meta_key = TURN_STREAM_META_KEY.format(self.stream_id)
+        index = max(0, after_id)
+        last_progress = time.monotonic()
+        while True:
+            pipe = _redis.pipeline(transaction=False)
+            pipe.lrange(key, index, -1)
+            pipe.hget(meta_key, 'done')
+            events, done = pipe.execute()
+            for encoded in events:
+                yield encoded.decode('utf-8') if isinstance(encoded, bytes) else encoded
+            index += len(events)
+            if events:
+                last_progress = time.monotonic()
+            elif done in (b'1', '1'):
+                return
+            elif time.monotonic() - last_progress > TURN_STREAM_IDLE_TIMEOUT:
+                logger.warning(f"Turn stream {self.stream_id[:8]} idle in Redis, closing reader")
+                return
+            else:
+                time.sleep(TURN_STREAM_POLL_SECONDS)
+
+
+def start_turn_stream(generator, user_id):
+    """Run `generator` to completion in the background and return its TurnStream."""
+    stream = TurnStream(user_id)
+    cutoff = time.time() - TURN_STREAM_TTL_SECONDS
+    with _streams_lock:
+        for stream_id in [sid for sid, s in _streams.items() if s.done and s.created < cutoff]:
+            del _streams[stream_id]
+        _streams[stream.stream_id] = stream
+    return stream.run(generator)
+
+
+def open_turn_stream(stream_id, user_id):
+    """A reader for a recent turn owned by user_id, or None if unknown / expired / not theirs."""
+    with _streams_lock:
+        stream = _streams.get(stream_id)
+    if stream is not None:
+        return stream if str(stream.user_id) == str(user_id) else None
+    if _redis is None:
+        return None
+    try:
+        owner = _redis.hget(TURN_STREAM_META_KEY.format(stream_id), 'user_id')
+    except Exception as e:
+        logger.warning(f"Failed to look up turn stream in Redis: {e}")
+        return None
+    if isinstance(owner, bytes):
+        owner = owner.decode()
+    if owner is None or owner != str(user_id):
+        return None
+    return _RedisTurnStreamReader(stream_id)
+
+
+def follow_for_client(reader, after_id, route):
+    """reader.follow() for a Flask response; a client disconnect leaves the turn running."""
+    try:
+        yield from reader.follow(after_id)
+    except GeneratorExit:
+        SSE_DISCONNECTS.inc(route=route)
+        logger.info(f"📴 SSE: client disconnected from {route}, turn continues in the background")
+        raise
+
+
+def parse_last_event_id(value):
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
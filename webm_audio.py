@@ -0,0 +1,263 @@
+import os
+import struct
+import logging
+import subprocess
+
+try:
+    import numpy as np
+except ImportError:  # VAD is optional; container parsing works without it
+    np = None
+
+from audio_transcode import FFMPEG_PATH
+
+logger = logging.getLogger(__name__)
+
+# Energy VAD configuration (decoded PCM, 20 ms frames)
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 20
+# A frame is voiced if it is this far above the clip's noise floor...
+VAD_MARGIN_DB = float(os.environ.get('VAD_MARGIN_DB', '12'))
+# ...and above this absolute level (dBFS)
+VAD_MIN_LEVEL_DBFS = float(os.environ.get('VAD_MIN_LEVEL_DBFS', '-50'))
+# Clips with less voiced audio than this are treated as empty / noise-only
+VAD_MIN_VOICED_MS = int(os.environ.get('VAD_MIN_VOICED_MS', '200'))
+VAD_DECODE_TIMEOUT_SECONDS = 5
+ENABLE_VAD = (
+    os.environ.get('ENABLE_VAD', 'true').lower() == 'true' and np is not None and FFMPEG_PATH is not None
+)
+
+# EBML element IDs (Matroska / WebM)
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+CODEC_ID = 0x86
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+
+# Master elements whose children we read in-line. Everything else is skipped by size,
+# so unknown-size Segments/Clusters (as written by MediaRecorder) need no special casing.
+_DESCEND = {SEGMENT, INFO, TRACKS, TRACK_ENTRY, AUDIO, CLUSTER, BLOCK_GROUP}
+
+# Opus frame durations in ms, indexed by TOC config (RFC 6716 section 3.1)
+_OPUS_FRAME_MS = (
+    [10, 20, 40, 60] * 3 +     # SILK-only, configs 0-11
+    [10, 20] * 2 +             # Hybrid, configs 12-15
+    [2.5, 5, 10, 20] * 4       # CELT-only, configs 16-31
+)
+
+
+def _read_vint(data, pos, strip_marker=True):
+    """Read an EBML variable-length integer. Returns (value, length, is_unknown_size)."""
+    first = data[pos]
+    if first == 0:
+        raise ValueError(f"Invalid EBML vint at offset {pos}")
+    length = 1
+    mask = 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    if pos + length > len(data):
+        raise ValueError("Truncated EBML vint")
+    value = first & (mask - 1) if strip_marker else first
+    for b in data[pos + 1:pos + length]:
+        value = (value << 8) | b
+    unknown = strip_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _read_uint(payload):
+    value = 0
+    for b in payload:
+        value = (value << 8) | b
+    return value
+
+
+def _read_float(payload):
+    if len(payload) == 4:
+        return struct.unpack('>f', payload)[0]
+    if len(payload) == 8:
+        return struct.unpack('>d', payload)[0]
+    return None
+
+
+def opus_packet_duration_ms(packet):
+    """Duration of one Opus packet from its TOC byte."""
+    if not packet:
+        return 0.0
+    toc = packet[0]
+    frame_ms = _OPUS_FRAME_MS[toc >> 3]
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = (packet[1] & 0x3F) if len(packet) > 1 else 1
+    return frame_ms * frames
+
+
+def read_webm_info(data):
+    """Parse a WebM/Matroska audio file and return its real duration.
+
+    MediaRecorder output usually has no Duration element, so the duration is
+    taken from the last block timestamp plus that packet's Opus frame length.
+    Returns a dict (duration_ms, codec, sample_rate, channels, packets,
+    payload_bytes) or None if the data is not WebM.
+    """
+    if len(data) < 4 or _read_uint(data[:4]) != EBML_HEADER:
+        return None
+
+    timecode_scale = 1000000  # ns per tick (Matroska default)
+    info_duration = None
+    codec = None
+    sample_rate = None
+    channels = None
+    cluster_tc = 0
+    first_ts = None
+    last_end_ts = 0.0
+    packets = 0
+    payload_bytes = 0
+
+    pos = 0
+    end = len(data)
+    try:
+        while pos < end:
+            element_id, id_len, _ = _read_vint(data, pos, strip_marker=False)
+            size, size_len, unknown = _read_vint(data, pos + id_len)
+            payload_start = pos + id_len + size_len
+            if element_id in _DESCEND:
+                pos = payload_start
+                continue
+            if unknown:
+                break
+            payload_end = min(payload_start + size, end)
+            payload = data[payload_start:payload_end]
+
+            if element_id == TIMECODE_SCALE:
+                timecode_scale = _read_uint(payload) or timecode_scale
+            elif element_id == DURATION:
+                info_duration = _read_float(payload)
+            elif element_id == CODEC_ID:
+                codec = payload.decode('ascii', 'replace')
+            elif element_id == SAMPLING_FREQUENCY:
+                sample_rate = _read_float(payload)
+            elif element_id == CHANNELS:
+                channels = _read_uint(payload)
+            elif element_id == CLUSTER_TIMECODE:
+                cluster_tc = _read_uint(payload)
+            elif element_id in (SIMPLE_BLOCK, BLOCK) and len(payload) > 4:
+                _track, track_len, _ = _read_vint(payload, 0)
+                rel_tc = struct.unpack('>h', payload[track_len:track_len + 2])[0]
+                flags = payload[track_len + 2]
+                frame = payload[track_len + 3:]
+                lace_count = 1
+                if flags & 0x06 and frame:
+                    # Laced block: first byte is (number of frames - 1)
+                    lace_count = frame[0] + 1
+                    frame = frame[1:]
+                ts_ms = (cluster_tc + rel_tc) * timecode_scale / 1e6
+                if codec is None or codec == 'A_OPUS':
+                    frame_ms = opus_packet_duration_ms(frame) * lace_count
+                else:
+                    frame_ms = 0.0
+                if first_ts is None:
+                    first_ts = ts_ms
+                last_end_ts = max(last_end_ts, ts_ms + frame_ms)
+                packets += lace_count
+                payload_bytes += len(frame)
+
+            pos = payload_end
+    except (ValueError, IndexError, struct.error) as e:
+        # Truncated tail (e.g. recording stopped mid-cluster) - keep what we parsed
+        logger.debug(f"WebM parse stopped early at offset {pos}: {e}")
+
+    if packets:
+        duration_ms = last_end_ts - min(first_ts, 0.0)
+    elif info_duration is not None:
+        duration_ms = info_duration * timecode_scale / 1e6
+    else:
+        duration_ms = 0.0
+
+    return {
+        'duration_ms': int(round(duration_ms)),
+        'codec': codec,
+        'sample_rate': int(sample_rate) if sample_rate else None,
+        'channels': channels,
+        'packets': packets,
+        'payload_bytes': payload_bytes,
+    }
+
+
+def decode_to_pcm(audio_bytes, sample_rate=VAD_SAMPLE_RATE):
+    """Decode any ffmpeg-readable clip to mono int16 PCM. Returns a NumPy array or None."""
+    if FFMPEG_PATH is None or np is None:
+        return None
+    try:
+        proc = subprocess.run(
+            [FFMPEG_PATH, '-hide_banner', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+             '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', 'pipe:1'],
+            input=audio_bytes, capture_output=True, timeout=VAD_DECODE_TIMEOUT_SECONDS,
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.warning(f"PCM decode failed: {e}")
+        return None
+    if proc.returncode != 0:
+        return None
+    return np.frombuffer(proc.stdout, dtype=np.int16)
+
+
+def frame_levels_dbfs(pcm, sample_rate=VAD_SAMPLE_RATE, frame_ms=VAD_FRAME_MS):
+    """Per-frame RMS level in dBFS, computed over all frames at once."""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(pcm) // frame_len
+    if n_frames == 0:
+        return np.zeros(0)
+    frames = pcm[:n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_voice_activity(audio_bytes):
+    """Energy VAD on decoded PCM.
+
+    Returns a dict (voiced_ms, total_ms, noise_floor_dbfs, leading_silence_ms,
+    trailing_silence_ms) or None when VAD is unavailable or decoding failed.
+    """
+    if not ENABLE_VAD:
+        return None
+    pcm = decode_to_pcm(audio_bytes)
+    if pcm is None:
+        return None
+    levels = frame_levels_dbfs(pcm)
+    if levels.size == 0:
+        return {'voiced_ms': 0, 'total_ms': 0, 'noise_floor_dbfs': None,
+                'leading_silence_ms': 0, 'trailing_silence_ms': 0}
+
+    noise_floor = float(np.percentile(levels, 10))
+    threshold = max(noise_floor + VAD_MARGIN_DB, VAD_MIN_LEVEL_DBFS)
+    voiced = levels > threshold
+    voiced_idx = np.flatnonzero(voiced)
+    total_ms = levels.size * VAD_FRAME_MS
+    if voiced_idx.size:
+        leading_ms = int(voiced_idx[0]) * VAD_FRAME_MS
+        trailing_ms = (levels.size - 1 - int(voiced_idx[-1])) * VAD_FRAME_MS
+    else:
+        leading_ms = trailing_ms = total_ms
+    return {
+        'voiced_ms': int(voiced.sum()) * VAD_FRAME_MS,
+        'total_ms': total_ms,
+        'noise_floor_dbfs': round(noise_floor, 1),
+        'leading_silence_ms': leading_ms,
+        'trailing_silence_ms': trailing_ms,
+    }